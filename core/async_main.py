@@ -0,0 +1,911 @@
+import asyncio
+import logging
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+import pytz
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from groq import AsyncGroq
+from jira.resources import Comment, Issue
+
+from config import (
+    ASYNC_CONCURRENCY,
+    BACKLOG_REPLENISH_SIZE,
+    DRY_RUN,
+    EPIC_BUDGET_SECONDS,
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    GROQ_READ_TIMEOUT,
+    GROQ_STREAM,
+    HISTORY_CACHE_PATH,
+    HISTORY_COMMENTS_PAGE_SIZE,
+    HISTORY_DB_PATH,
+    HISTORY_SEGMENT_MAX_CHARS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_SIZE,
+    JIRA_HISTORY_KEY,
+    JIRA_PROJECT_KEY,
+    JIRA_READ_TIMEOUT,
+    JIRA_SEARCH_PAGE_SIZE,
+    JIRA_TOKEN,
+    JIRA_URL,
+    JIRA_USER,
+    PREGENERATE_DAYS,
+    PREGENERATE_HOUR,
+    PREGENERATE_MINUTE,
+    PREGENERATED_TASKS_PATH,
+    PROJECT_SCHEDULE,
+    RUN_CATCHUP_SECONDS,
+    RUN_DEADLINE_SECONDS,
+    SCHEDULER_DAYS,
+    SCHEDULER_HOUR,
+    SCHEDULER_MINUTE,
+    SCHEDULER_MISFIRE_GRACE_SECONDS,
+    SCHEDULER_TIMEZONE,
+    STATUS_BACKLOG,
+    STATUS_IN_PROGRESS,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_FLUSH_TIMEOUT,
+    THEME_DUPLICATE_THRESHOLD,
+    THEME_MAX_REGENERATIONS,
+    TRANSITION_VERIFY,
+    validate_config,
+)
+from deadline import DeadlineExceeded, deadline_scope, timeout_kwargs
+from epic_cache import EpicCache
+from history import (
+    HistorySnapshot,
+    cache_is_fresh,
+    format_topic_history_comment,
+    parse_jira_datetime,
+    plan_history_append,
+)
+from history_store import HistoryStore, HistorySync
+from http_pool import async_http_client, groq_stats, groq_timeout, jira_async_stats, log_http_stats
+from llm_cache import get_llm_cache
+from main import (
+    EPIC_FIELDS,
+    EPIC_ISSUE_FIELDS,
+    GROQ_NOT_FOUND_TASK,
+    RunContext,
+    already_in_progress_message,
+    backlog_issue_fields,
+    backlog_search_limit,
+    build_description_prompt,
+    build_new_task_prompt,
+    build_themes_prompt,
+    created_backlog_issues,
+    epic_issues_jql,
+    epic_status_jql,
+    get_today_weekday,
+    group_epic_issues,
+    is_groq_notfound_error,
+    moved_to_in_progress_message,
+    needs_replenishment,
+    new_issue_fields,
+    new_task_message,
+    parse_generated_task,
+    parse_heading,
+    pregenerate_tasks,
+    prioritized_schedule,
+    select_new_themes,
+    take_pregenerated_task,
+)
+from notifier import TelegramOutbox, get_outbox
+from retry_policy import DEFERRABLE_ERRORS, is_retryable, service_retry
+from task_store import PregeneratedTaskStore
+from themes import DuplicateThemeError, ThemeIndex, estimate_tokens, split_history
+from transitions import transition_resolver
+
+
+class AsyncJiraClient:
+    """
+    Минимальный асинхронный клиент Jira REST API v2 на httpx.
+    Возвращает те же ресурсы jira (Issue, Comment), что и синхронный клиент,
+    чтобы код разбора истории и задач был общим.
+    """
+
+    def __init__(
+        self,
+        server: Optional[str] = None,
+        user: Optional[str] = None,
+        token: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ):
+        # Пул keep-alive соединений на ASYNC_CONCURRENCY одновременных эпиков
+        self._client = async_http_client(
+            jira_async_stats,
+            size=HTTP_POOL_SIZE or ASYNC_CONCURRENCY,
+            base_url=f"{server or JIRA_URL}/rest/api/2/",
+            auth=(user or JIRA_USER, token or JIRA_TOKEN),
+            headers={"Accept": "application/json"},
+            transport=transport,
+            timeout=timeout or httpx.Timeout(JIRA_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+
+    @property
+    def server_url(self) -> str:
+        return str(self._client.base_url)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    @service_retry("jira")
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        response = await self._client.request(
+            method, path, **timeout_kwargs(JIRA_READ_TIMEOUT), **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def search_issues(
+        self,
+        jql: str,
+        max_results: Optional[int] = None,
+        page_size: int = JIRA_SEARCH_PAGE_SIZE,
+        fields: Optional[str] = None,
+        validate_query: bool = True,
+    ) -> List[Issue]:
+        """
+        Как main.IssueSearch: max_results — сколько задач нужно вызывающему коду
+        (None — все); страница не больше max_results, лишнего не запрашиваем.
+        """
+        if max_results:
+            page_size = min(page_size, max_results)
+        issues: List[Issue] = []
+        while max_results is None or len(issues) < max_results:
+            params = {"jql": jql, "startAt": len(issues), "maxResults": page_size}
+            if fields:
+                params["fields"] = fields
+            if not validate_query:
+                # Несуществующий ключ в key in (...) не должен ронять весь запрос
+                params["validateQuery"] = "false"
+            page = await self._request("GET", "search", params=params)
+            raw_issues = page.get("issues", [])
+            issues.extend(Issue({}, None, raw=raw) for raw in raw_issues)
+            total = page.get("total")
+            if not raw_issues or (total is not None and len(issues) >= total):
+                break
+            # Короткой странице верим, только когда total неизвестен
+            if total is None and len(raw_issues) < page_size:
+                break
+        return issues[:max_results] if max_results else issues
+
+    async def issue(self, issue_key: str, fields: Optional[str] = None) -> Issue:
+        params = {"fields": fields} if fields else None
+        raw = await self._request("GET", f"issue/{issue_key}", params=params)
+        return Issue({}, None, raw=raw)
+
+    async def transitions(self, issue_key: str) -> List[Dict[str, Any]]:
+        data = await self._request("GET", f"issue/{issue_key}/transitions")
+        return data.get("transitions", [])
+
+    async def transition_issue(self, issue_key: str, transition_id: str):
+        await self._request(
+            "POST", f"issue/{issue_key}/transitions", json={"transition": {"id": transition_id}})
+
+    async def create_issue(self, fields: dict) -> Issue:
+        created = await self._request("POST", "issue", json={"fields": fields})
+        # Ответ содержит только id и key — поля берём из запроса
+        return Issue({}, None, raw={**created, "fields": {
+            "summary": fields.get("summary"), "issuetype": fields.get("issuetype")}})
+
+    async def create_issues(self, field_list: List[dict]) -> List[Dict[str, Any]]:
+        """
+        Bulk create одним запросом. Результат в формате JIRA.create_issues
+        с prefetch=False: status, issue, error, input_fields для каждой задачи.
+        """
+        try:
+            data = await self._request("POST", "issue/bulk", json={
+                "issueUpdates": [{"fields": fields} for fields in field_list]})
+        except httpx.HTTPStatusError as e:
+            # Если не создалась ни одна задача, Jira отвечает 400 с тем же телом
+            if e.response.status_code != 400:
+                raise
+            data = e.response.json()
+        errors = {
+            error["failedElementNumber"]: error["elementErrors"]["errors"]
+            for error in data.get("errors", [])
+        }
+        created = list(data.get("issues", []))
+        results = []
+        for index, fields in enumerate(field_list):
+            if index in errors:
+                results.append(
+                    {"status": "Error", "error": errors[index], "issue": None, "input_fields": fields})
+            else:
+                results.append({
+                    "status": "Success", "error": None,
+                    "issue": Issue({}, None, raw=created.pop(0)), "input_fields": fields})
+        return results
+
+    async def update_issue(self, issue_key: str, fields: dict):
+        await self._request("PUT", f"issue/{issue_key}", json={"fields": fields})
+
+    async def add_comment(self, issue_key: str, body: str) -> Comment:
+        raw = await self._request("POST", f"issue/{issue_key}/comment", json={"body": body})
+        return Comment({}, None, raw=raw)
+
+    async def update_comment(self, issue_key: str, comment_id: str, body: str) -> Comment:
+        raw = await self._request(
+            "PUT", f"issue/{issue_key}/comment/{comment_id}", json={"body": body})
+        return Comment({}, None, raw=raw)
+
+    async def comments(self, issue_key: str, page_size: Optional[int] = None) -> List[Comment]:
+        page_size = page_size or HISTORY_COMMENTS_PAGE_SIZE
+        comments: List[Comment] = []
+        while True:
+            page = await self._request("GET", f"issue/{issue_key}/comment", params={
+                "startAt": len(comments), "maxResults": page_size, "orderBy": "created"})
+            raw_comments = page.get("comments", [])
+            comments.extend(Comment({}, None, raw=raw) for raw in raw_comments)
+            if len(raw_comments) < page_size or len(comments) >= page.get("total", 0):
+                return comments
+
+
+def send_notification(outbox: Optional[TelegramOutbox], issue_key: str, message: str):
+    """
+    Ставит сообщение в общую очередь Telegram, как main.notify: лимиты Telegram
+    и повторы соблюдает очередь, а цикл событий доставки не ждёт.
+    """
+    if DRY_RUN:
+        logging.info(f"[DRY-RUN] Would send message to telegram")
+        return
+    if outbox is None:
+        logging.warning(
+            f"Telegram is not configured, message for {issue_key} dropped")
+        return
+    outbox.send(TELEGRAM_CHAT_ID, message, context=issue_key)
+
+
+def send_critical_error(outbox: Optional[TelegramOutbox], message: str):
+    if DRY_RUN:
+        logging.info(
+            f"[DRY-RUN] Would send CRITICAL message to telegram: {message}")
+        return
+    if outbox is not None:
+        outbox.send(TELEGRAM_CHAT_ID, message, context="critical")
+    logging.error(f"CRITICAL: {message}")
+
+
+@service_retry("groq")
+async def call_groq_generate_content_async(
+    groq_client: AsyncGroq,
+    prompt: str,
+    use_cache: bool = True,
+    heading_check: Optional[Callable[[str], bool]] = None,
+) -> str:
+    if DRY_RUN:
+        logging.info(f"[DRY-RUN] Would call Groq API with prompt: {prompt}")
+        return "# DRY-RUN\nОписание задачи (DRY-RUN)"
+    cache = get_llm_cache() if use_cache else None
+    if cache:
+        cached = cache.get(GROQ_MODEL, prompt)
+        if cached is not None:
+            logging.info("Groq response served from LLM cache")
+            return cached
+    if heading_check and GROQ_STREAM:
+        content, aborted = await stream_groq_generate_content_async(
+            groq_client, prompt, heading_check)
+        if cache and not aborted:
+            cache.set(GROQ_MODEL, prompt, content)
+        return content
+    chat_completion = await groq_client.chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=GROQ_MODEL,
+        **timeout_kwargs(GROQ_READ_TIMEOUT),
+    )
+    content = chat_completion.choices[0].message.content
+    usage = getattr(chat_completion, "usage", None)
+    if usage is not None:
+        logging.info(
+            f"Groq usage: {usage.prompt_tokens} prompt tokens, "
+            f"{usage.completion_tokens} completion tokens")
+    if cache:
+        cache.set(GROQ_MODEL, prompt, content)
+    return content
+
+
+async def stream_groq_generate_content_async(
+    groq_client: AsyncGroq, prompt: str, heading_check: Callable[[str], bool]
+) -> Tuple[str, bool]:
+    """Асинхронный вариант stream_groq_generate_content."""
+    stream = await groq_client.chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=GROQ_MODEL,
+        stream=True,
+        **timeout_kwargs(GROQ_READ_TIMEOUT),
+    )
+    parts: List[str] = []
+    heading_checked = False
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            if heading_checked or "\n" not in delta:
+                continue
+            heading_checked = True
+            heading = "".join(parts).split("\n", 1)[0]
+            if heading_check(parse_heading(heading)):
+                logging.info(
+                    f"Groq stream aborted after heading '{parse_heading(heading)}'")
+                return heading, True
+    finally:
+        await stream.close()
+    return "".join(parts), False
+
+
+async def generate_task_async(
+    groq_client: AsyncGroq,
+    prompt: str,
+    use_cache: bool,
+    heading_check: Optional[Callable[[str], bool]] = None,
+) -> dict:
+    try:
+        content = await call_groq_generate_content_async(
+            groq_client, prompt, use_cache=use_cache, heading_check=heading_check)
+        return parse_generated_task(content)
+    except Exception as e:
+        if is_groq_notfound_error(e):
+            logging.error(f"Groq NotFoundError: {e}", exc_info=True)
+            return dict(GROQ_NOT_FOUND_TASK)
+        logging.error(f"Groq API error after retries: {e}", exc_info=True)
+        raise
+
+
+async def generate_new_task_async(groq_client: AsyncGroq, history: str, topic: str) -> dict:
+    """Как generate_new_task: повторы пройденных тем отсекаются до записи в Jira."""
+    index = ThemeIndex(split_history(history), THEME_DUPLICATE_THRESHOLD)
+    rejected: List[str] = []
+    for _ in range(THEME_MAX_REGENERATIONS + 1):
+        task = await generate_task_async(
+            groq_client, build_new_task_prompt(history, topic, rejected), use_cache=False,
+            heading_check=lambda summary: index.find_duplicate(summary) is not None)
+        if task == GROQ_NOT_FOUND_TASK:
+            return task
+        duplicate = index.find_duplicate(task["summary"])
+        if duplicate is None:
+            return task
+        logging.warning(
+            f"Generated theme '{task['summary']}' for '{topic}' repeats '{duplicate}', regenerating")
+        rejected.append(task["summary"])
+    raise DuplicateThemeError(
+        f"Groq kept repeating covered themes for '{topic}': {'; '.join(rejected)}")
+
+
+async def generate_new_themes_async(
+    groq_client: AsyncGroq, history: str, topic: str, count: int, queued: List[str]
+) -> List[str]:
+    """Асинхронный вариант main.generate_new_themes."""
+    prompt = build_themes_prompt(history, topic, count, queued)
+    logging.info(
+        f"Themes prompt for '{topic}': ~{estimate_tokens(prompt)} tokens, {count} themes requested")
+    content = await call_groq_generate_content_async(groq_client, prompt, use_cache=False)
+    return select_new_themes(content, history, topic, count, queued)
+
+
+async def load_history_snapshot_async(
+    jira: AsyncJiraClient, cache_path: Optional[str] = None
+) -> HistorySnapshot:
+    """Как HistorySnapshot.load: при неизменной задаче истории комментарии берутся из кеша."""
+    snapshot = HistorySnapshot(
+        issue_key=JIRA_HISTORY_KEY,
+        cache_path=HISTORY_CACHE_PATH if cache_path is None else cache_path)
+    cached = snapshot.load_cache()
+    if cached:
+        issue = await jira.issue(JIRA_HISTORY_KEY, fields="updated")
+        issue_updated = parse_jira_datetime(getattr(issue.fields, "updated", None))
+        if not cache_is_fresh(JIRA_HISTORY_KEY, cached, issue_updated):
+            cached = []
+    for comment in cached or await jira.comments(JIRA_HISTORY_KEY):
+        snapshot.add(comment)
+    logging.info(
+        f"Loaded history snapshot of {JIRA_HISTORY_KEY}: {len(snapshot.comments)} comments")
+    return snapshot
+
+
+async def create_topic_history_comment_async(
+    jira: AsyncJiraClient, epic_key: str, topic: str, part: int = 1, themes: List[str] = ()
+) -> Optional[Comment]:
+    comment_body = format_topic_history_comment(topic, epic_key, part, themes)
+    if DRY_RUN:
+        logging.info(
+            f"[DRY-RUN] Would create comment in issue {JIRA_HISTORY_KEY} with body'{comment_body}'"
+        )
+        return None
+    return await jira.add_comment(JIRA_HISTORY_KEY, comment_body)
+
+
+async def get_topic_history_async(
+    jira: AsyncJiraClient, epic_key: str, topic: str, snapshot: HistorySnapshot
+) -> str:
+    try:
+        if not snapshot.find(epic_key):
+            created = await create_topic_history_comment_async(jira, epic_key, topic)
+            if created is not None:
+                snapshot.add(created)
+            return ""
+        return "\n".join(snapshot.iter_themes(epic_key))
+    except Exception as e:
+        logging.error(
+            f"Error fetching history for {epic_key}: {e}", exc_info=True)
+        return ""
+
+
+async def update_topic_history_async(
+    jira: AsyncJiraClient,
+    epic_key: str,
+    new_theme: str,
+    snapshot: HistorySnapshot,
+    on_written: Optional[Callable[[int], None]] = None,
+) -> bool:
+    """Как main.update_topic_history: on_written получает число записанных тем."""
+    plan = plan_history_append(
+        snapshot, epic_key, new_theme, HISTORY_SEGMENT_MAX_CHARS)
+    if plan is None:
+        logging.warning(
+            f"No topic comment found for epic {epic_key} after supposed creation.")
+        return False
+    if plan.body is not None:
+        if DRY_RUN:
+            logging.info(
+                f"[DRY-RUN] Would update comment in issue {JIRA_HISTORY_KEY} to '{plan.body}'"
+            )
+        else:
+            await jira.update_comment(JIRA_HISTORY_KEY, plan.comment.id, plan.body)
+            snapshot.apply_update(plan.comment, plan.body)
+            if on_written:
+                on_written(plan.appended)
+    for part, themes in plan.iter_new_segments():
+        created = await create_topic_history_comment_async(
+            jira, epic_key, plan.topic, part=part, themes=themes)
+        if created is not None:
+            snapshot.add(created)
+            if on_written:
+                on_written(len(themes))
+    return True
+
+
+async def read_topic_history_async(
+    jira: AsyncJiraClient, epic_key: str, topic: str, run: RunContext
+) -> str:
+    """Как main.read_topic_history: при включённом локальном зеркале история читается из SQLite."""
+    store = run.history_store
+    if store and store.has_epic(epic_key):
+        return store.get_history(epic_key)
+    snapshot = run.history
+    if run.history_sync:
+        # Снимок грузит поток синхронизации; цикл событий его не ждёт
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None, run.history_sync.wait_ready)
+    if snapshot is None:
+        snapshot = await load_history_snapshot_async(jira)
+    history = await get_topic_history_async(jira, epic_key, topic, snapshot)
+    if store and snapshot.find(epic_key):
+        store.pull(epic_key, list(snapshot.iter_themes(epic_key)))
+    return history
+
+
+async def record_topic_theme_async(
+    jira: AsyncJiraClient, epic_key: str, theme: str, run: RunContext
+):
+    """Как main.record_topic_theme: в локальном зеркале или сразу в Jira."""
+    if run.history_store and run.history_sync:
+        if DRY_RUN:
+            logging.info(
+                f"[DRY-RUN] Would record theme '{theme}' for epic {epic_key}")
+            return
+        run.history_store.add_theme(epic_key, theme)
+        run.history_sync.schedule()
+        return
+    await update_topic_history_async(jira, epic_key, theme, run.history)
+
+
+async def transition_issue_to_status_async(
+    jira: AsyncJiraClient, issue: Issue, status_name: str, verify: bool = TRANSITION_VERIFY
+) -> bool:
+    """Асинхронный вариант transition_issue_to_status с тем же кешем переходов."""
+    if DRY_RUN:
+        logging.info(
+            f"[DRY-RUN] Would transition issue {issue.key} to '{status_name}'")
+        return True
+    try:
+        key = transition_resolver.key(jira.server_url, issue, status_name)
+        transition = transition_resolver.get(key)
+        transition_done = False
+        if transition is not None:
+            try:
+                await jira.transition_issue(issue.key, transition["id"])
+                transition_done = True
+            except Exception as e:
+                if isinstance(e, DEFERRABLE_ERRORS) or is_retryable(e):
+                    raise
+                logging.warning(
+                    f"Cached transition to '{status_name}' failed for {issue.key}: {e}")
+                transition_resolver.invalidate(key)
+        if not transition_done:
+            transition = transition_resolver.store(
+                key, await jira.transitions(issue.key), status_name)
+            if transition is None:
+                logging.error(
+                    f"No transition found for status '{status_name}' on issue {issue.key}")
+                return False
+            await jira.transition_issue(issue.key, transition["id"])
+        logging.info(f"Issue {issue.key} transitioned to '{status_name}'")
+        if verify:
+            updated_issue = await jira.issue(issue.key, fields="status")
+            return getattr(updated_issue.fields.status, "name", None) == status_name
+        return True
+    except DEFERRABLE_ERRORS:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Failed to transition issue {issue.key}: {e}", exc_info=True)
+        return False
+
+
+async def find_epic_issues_async(
+    jira: AsyncJiraClient,
+    epic_key: str,
+    status: str,
+    run: RunContext,
+    limit: Optional[int] = None,
+) -> List[Issue]:
+    """Как main.find_epic_issues: limit — сколько задач нужно вызывающему коду."""
+    if run.epic_issues is not None and epic_key in run.epic_issues:
+        issues = run.epic_issues[epic_key].get(status, [])
+        return issues[:limit] if limit else issues
+    return await jira.search_issues(
+        epic_status_jql(epic_key, status), max_results=limit, fields=EPIC_ISSUE_FIELDS)
+
+
+async def replenish_backlog_async(
+    jira: AsyncJiraClient,
+    groq_client: AsyncGroq,
+    epic_key: str,
+    topic: str,
+    history: str,
+    backlog_issues: List[Issue],
+) -> List[Issue]:
+    """Асинхронный вариант main.replenish_backlog."""
+    queued = [issue.fields.summary for issue in backlog_issues]
+    themes = await generate_new_themes_async(
+        groq_client, history, topic, BACKLOG_REPLENISH_SIZE, queued)
+    if not themes:
+        return []
+    if DRY_RUN:
+        logging.info(
+            f"[DRY-RUN] Would create {len(themes)} backlog issues in epic '{epic_key}': {themes}")
+        return []
+    field_list = [backlog_issue_fields(epic_key, theme) for theme in themes]
+    return created_backlog_issues(epic_key, field_list, await jira.create_issues(field_list))
+
+
+async def validate_epics_async(
+    jira: AsyncJiraClient, epic_keys: List[str], cache: Optional[EpicCache] = None
+) -> Set[str]:
+    """Асинхронный аналог main.validate_epics: один запрос key in (...) и общий EpicCache."""
+    epic_keys = list(dict.fromkeys(epic_keys))
+    cache = cache or EpicCache()
+    stale = cache.stale(epic_keys)
+    if stale:
+        found = {
+            issue.key for issue in await jira.search_issues(
+                f"key in ({', '.join(stale)})", max_results=len(stale),
+                fields=EPIC_FIELDS, validate_query=False)
+        }
+        missing = [key for key in stale if key not in found]
+        cache.update(found, missing)
+        logging.info(
+            f"Validated {len(stale)} epics in one query, "
+            f"{len(epic_keys) - len(stale)} served from cache")
+    return {key for key in epic_keys if cache.fresh(key)}
+
+
+async def epic_exists_async(jira: AsyncJiraClient, epic_key: str, run: RunContext) -> bool:
+    """Проверяет эпик по результату validate_epics_async, а без него — отдельным запросом."""
+    if run.epics is not None:
+        if epic_key in run.epics:
+            return True
+        logging.error(f"Epic {epic_key} not found or inaccessible")
+        return False
+    try:
+        await jira.issue(epic_key, fields=EPIC_FIELDS)
+        return True
+    except DEFERRABLE_ERRORS:
+        raise
+    except Exception as e:
+        logging.error(
+            f"Epic {epic_key} not found or inaccessible: {e}", exc_info=True)
+        return False
+
+
+async def process_project_async(
+    jira: AsyncJiraClient,
+    groq_client: AsyncGroq,
+    outbox: Optional[TelegramOutbox],
+    epic_key: str,
+    topic: str,
+    history: str,
+    run: RunContext,
+):
+    """Асинхронный аналог main.process_project с тем же порядком шагов."""
+    try:
+        if not await epic_exists_async(jira, epic_key, run):
+            send_critical_error(
+                outbox,
+                f"Skipping topic '{topic}' because epic '{epic_key}' does not exist or is inaccessible.",
+            )
+            return
+
+        in_progress_issues = await find_epic_issues_async(
+            jira, epic_key, STATUS_IN_PROGRESS, run, limit=1)
+        if in_progress_issues:
+            issue = in_progress_issues[0]
+            send_notification(outbox, issue.key, already_in_progress_message(topic, issue))
+            return
+
+        backlog_issues = await find_epic_issues_async(
+            jira, epic_key, STATUS_BACKLOG, run, limit=backlog_search_limit(epic_key))
+        if needs_replenishment(epic_key, backlog_issues):
+            try:
+                backlog_issues = backlog_issues + await replenish_backlog_async(
+                    jira, groq_client, epic_key, topic, history, backlog_issues)
+            except Exception as e:
+                # Не вышло пополнить — ниже сработает обычное создание одной задачи
+                logging.error(
+                    f"Failed to replenish backlog of {epic_key}: {e}", exc_info=True)
+        if backlog_issues:
+            issue = backlog_issues[0]
+            await transition_issue_to_status_async(jira, issue, STATUS_IN_PROGRESS)
+            if not issue.fields.description:
+                existed_task = await generate_task_async(
+                    groq_client, build_description_prompt(topic, issue.fields.summary), use_cache=True)
+                if DRY_RUN:
+                    logging.info(
+                        f"[DRY-RUN] Would update description of {issue.key}")
+                else:
+                    await jira.update_issue(issue.key, {"description": existed_task["description"]})
+            send_notification(outbox, issue.key, moved_to_in_progress_message(topic, issue))
+            await record_topic_theme_async(jira, epic_key, issue.fields.summary, run)
+            return
+
+        pregenerated = take_pregenerated_task(run, epic_key, topic, history)
+        if pregenerated is not None:
+            pregenerated_id, task = pregenerated
+        else:
+            pregenerated_id, task = None, await generate_new_task_async(groq_client, history, topic)
+        if DRY_RUN:
+            logging.info(
+                f"[DRY-RUN] Would create issue in epic '{epic_key}' with summary '{task['summary']}'"
+            )
+            return
+
+        new_issue = await jira.create_issue(new_issue_fields(epic_key, task))
+        if pregenerated_id is not None:
+            # Задача удаляется только после создания: при ошибке её заберёт следующий запуск
+            run.task_store.delete(pregenerated_id)
+        await record_topic_theme_async(jira, epic_key, new_issue.fields.summary, run)
+        if not await transition_issue_to_status_async(jira, new_issue, STATUS_IN_PROGRESS):
+            send_critical_error(
+                outbox, f"Issue {new_issue.key} did not transition to '{STATUS_IN_PROGRESS}'")
+        else:
+            send_notification(outbox, new_issue.key, new_task_message(topic, new_issue))
+    except DEFERRABLE_ERRORS:
+        # Эпик не закончен: run_daily_async отложит его на повторный проход
+        raise
+    except Exception as e:
+        msg = f"Error processing {epic_key}: {e}"
+        logging.error(msg, exc_info=True)
+        send_critical_error(outbox, msg)
+
+
+async def process_epic_async(
+    jira: AsyncJiraClient,
+    groq_client: AsyncGroq,
+    outbox: Optional[TelegramOutbox],
+    epic: str,
+    topic: str,
+    run: RunContext,
+    semaphore: asyncio.Semaphore,
+) -> bool:
+    """Как main.process_epic: False — эпик отложен и его нужно повторить."""
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            with deadline_scope(EPIC_BUDGET_SECONDS, until=run.deadline):
+                history = await read_topic_history_async(jira, epic, topic, run)
+                await process_project_async(jira, groq_client, outbox, epic, topic, history, run)
+            return True
+        except DEFERRABLE_ERRORS as e:
+            logging.warning(f"Epic {epic} deferred: {e}")
+            return False
+        except Exception as e:
+            logging.error(
+                f"Exception in run_daily for epic={epic}, topic={topic}: {e}", exc_info=True)
+            return True
+        finally:
+            logging.info(
+                f"Epic {epic} processed in {time.monotonic() - started:.2f}s")
+
+
+async def catch_up_epics_async(
+    jira: AsyncJiraClient,
+    groq_client: AsyncGroq,
+    outbox: Optional[TelegramOutbox],
+    deferred: List[Tuple[str, str]],
+    run: RunContext,
+) -> List[Tuple[str, str]]:
+    """Как main.catch_up_epics: отложенные эпики по одному, с бюджетом RUN_CATCHUP_SECONDS."""
+    logging.warning(
+        f"Deferred to catch-up pass: {', '.join(epic for epic, _ in deferred)}")
+    if not RUN_CATCHUP_SECONDS:
+        return deferred
+    run.deadline = time.monotonic() + RUN_CATCHUP_SECONDS
+    semaphore = asyncio.Semaphore(1)
+    unfinished = []
+    for epic, topic in deferred:
+        if run.epic_issues is not None:
+            run.epic_issues.pop(epic, None)
+        if not await process_epic_async(jira, groq_client, outbox, epic, topic, run, semaphore):
+            unfinished.append((epic, topic))
+    return unfinished
+
+
+def start_history_sync(
+    jira: AsyncJiraClient, run: RunContext, epic_keys: List[str], loop: asyncio.AbstractEventLoop
+):
+    """
+    Запускает HistorySync, как main.run_daily: поток синхронизации грузит
+    и дописывает историю через асинхронный клиент в цикле событий запуска.
+    """
+    def load_snapshot() -> HistorySnapshot:
+        return asyncio.run_coroutine_threadsafe(
+            load_history_snapshot_async(jira), loop).result()
+
+    def push(snapshot: HistorySnapshot, epic: str, themes: List[str], on_written) -> bool:
+        return asyncio.run_coroutine_threadsafe(update_topic_history_async(
+            jira, epic, "\n".join(themes), snapshot, on_written), loop).result()
+
+    run.history_store = HistoryStore(HISTORY_DB_PATH)
+    run.history_sync = HistorySync(run.history_store, load_snapshot, push)
+    run.history_sync.start(epic_keys)
+
+
+async def run_daily_async(
+    concurrency: Optional[int] = None,
+    jira: Optional[AsyncJiraClient] = None,
+    groq_client: Optional[AsyncGroq] = None,
+    outbox: Optional[TelegramOutbox] = None,
+):
+    """
+    Асинхронный вариант run_daily: сетевые ожидания всех эпиков перекрываются
+    в одном потоке, одновременно обрабатывается не более concurrency эпиков.
+    """
+    owned = []
+    if jira is None or groq_client is None:
+        validate_config()
+    if jira is None:
+        jira = AsyncJiraClient()
+        owned.append(jira.aclose)
+    if groq_client is None:
+        groq_client = AsyncGroq(
+            api_key=GROQ_API_KEY, max_retries=0, timeout=groq_timeout(),
+            http_client=async_http_client(groq_stats, size=HTTP_POOL_SIZE or ASYNC_CONCURRENCY))
+        owned.append(groq_client.close)
+    outbox = outbox or get_outbox()
+    schedule = prioritized_schedule(PROJECT_SCHEDULE.get(get_today_weekday(), []))
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    run = RunContext()
+    try:
+        if RUN_DEADLINE_SECONDS:
+            run.deadline = started + RUN_DEADLINE_SECONDS
+        epic_keys = list(dict.fromkeys(epic for epic, _ in schedule))
+        if not epic_keys:
+            return
+        if PREGENERATED_TASKS_PATH:
+            run.task_store = PregeneratedTaskStore(PREGENERATED_TASKS_PATH)
+        if HISTORY_DB_PATH:
+            # История читается локально, а Jira загружается и обновляется в фоне
+            start_history_sync(jira, run, epic_keys, loop)
+            # Снимок загрузит поток синхронизации
+            load_history = asyncio.sleep(0, result=None)
+        else:
+            load_history = load_history_snapshot_async(jira)
+        epics, prefetch, snapshot = await asyncio.gather(
+            validate_epics_async(jira, epic_keys),
+            jira.search_issues(epic_issues_jql(epic_keys), fields=EPIC_ISSUE_FIELDS),
+            load_history,
+            return_exceptions=True,
+        )
+        if isinstance(epics, Exception):
+            # Без результата проверки каждый эпик проверяется отдельно
+            logging.error(f"Failed to validate epics: {epics}")
+        else:
+            run.epics = epics
+        if isinstance(prefetch, Exception):
+            logging.error(f"Failed to prefetch epic issues: {prefetch}")
+        else:
+            run.epic_issues = group_epic_issues(epic_keys, prefetch)
+        if isinstance(snapshot, Exception):
+            # Без истории не обойтись: её нужно и читать, и дописывать
+            logging.error(f"Failed to load history snapshot: {snapshot}")
+            send_critical_error(
+                outbox, f"Failed to load topic history: {snapshot}")
+            return
+        run.history = snapshot
+        semaphore = asyncio.Semaphore(concurrency or ASYNC_CONCURRENCY)
+        finished = await asyncio.gather(*(
+            process_epic_async(jira, groq_client, outbox,
+                               epic, topic, run, semaphore)
+            for epic, topic in schedule
+        ))
+        deferred = [item for item, done in zip(schedule, finished) if not done]
+        if deferred:
+            unfinished = await catch_up_epics_async(jira, groq_client, outbox, deferred, run)
+            if unfinished:
+                send_critical_error(
+                    outbox, f"Epics not finished in time: {', '.join(epic for epic, _ in unfinished)}")
+    finally:
+        if run.task_store:
+            run.task_store.close()
+        if run.history_sync:
+            # close() дописывает темы через цикл событий, поэтому ждём его в пуле потоков
+            await loop.run_in_executor(None, run.history_sync.close)
+            run.history = run.history_sync.snapshot
+            run.history_store.close()
+        if run.history:
+            try:
+                run.history.save()
+            except Exception as e:
+                logging.error(
+                    f"Failed to save history cache: {e}", exc_info=True)
+        for aclose in owned:
+            await aclose()
+        llm_cache = get_llm_cache()
+        if llm_cache:
+            llm_cache.log_stats()
+        log_http_stats()
+        if outbox and not await loop.run_in_executor(
+                None, outbox.flush, TELEGRAM_FLUSH_TIMEOUT):
+            logging.warning("Telegram outbox not drained, remaining messages keep sending in background")
+        logging.info(
+            f"Async daily run finished: {len(schedule)} epics, {time.monotonic() - started:.2f}s")
+
+
+async def serve():
+    scheduler = AsyncIOScheduler(timezone=pytz.timezone(SCHEDULER_TIMEZONE))
+    scheduler.add_job(
+        run_daily_async,
+        "cron",
+        day_of_week=SCHEDULER_DAYS,
+        hour=SCHEDULER_HOUR,
+        minute=SCHEDULER_MINUTE,
+        misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS,
+    )
+    if PREGENERATED_TASKS_PATH:
+        # Синхронное задание AsyncIOScheduler выполняет в пуле потоков
+        scheduler.add_job(
+            pregenerate_tasks,
+            "cron",
+            day_of_week=PREGENERATE_DAYS,
+            hour=PREGENERATE_HOUR,
+            minute=PREGENERATE_MINUTE,
+            misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS,
+        )
+    scheduler.start()
+    logging.info("Starting Jira automation (asyncio engine)...")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    validate_config()
+    asyncio.run(serve())
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Set
+
+from jira import JIRA, Issue
+
+from config import (
+    BACKFILL_CONCURRENCY,
+    BACKFILL_PROGRESS_PATH,
+    DRY_RUN,
+    JIRA_PROJECT_KEY,
+    PROJECT_SCHEDULE,
+    STATUS_BACKLOG,
+)
+from http_pool import log_http_stats
+from llm_cache import get_llm_cache
+from main import (
+    GROQ_NOT_FOUND_TASK,
+    generate_description_for_existing_task,
+    init_clients,
+    jira_search_issues,
+    jira_update_issue,
+)
+
+
+def scheduled_topics() -> Dict[str, str]:
+    """Эпики из PROJECT_SCHEDULE и их топики."""
+    topics: Dict[str, str] = {}
+    for day in sorted(PROJECT_SCHEDULE):
+        for epic_key, topic in PROJECT_SCHEDULE[day]:
+            topics.setdefault(epic_key, topic)
+    return topics
+
+
+def missing_descriptions_jql(epic_keys: Iterable[str]) -> str:
+    return (
+        f"project = {JIRA_PROJECT_KEY} "
+        f'AND status = "{STATUS_BACKLOG}" '
+        f"AND parent in ({', '.join(epic_keys)}) "
+        "AND description is EMPTY "
+        "ORDER BY key ASC"
+    )
+
+
+class BackfillProgress:
+    """
+    Ключи задач, которым уже записано описание. Поиск Jira обновляет индекс
+    с задержкой, поэтому после перезапуска задача может снова попасть в выборку.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done: Set[str] = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.done = set(json.load(f).get("done", []))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable backfill progress {path}: {e}")
+
+    def mark_done(self, issue_key: str):
+        with self._lock:
+            self.done.add(issue_key)
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"done": sorted(self.done)}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def backfill_issue(groq_client, issue: Issue, topic: str, progress: BackfillProgress) -> bool:
+    try:
+        task = generate_description_for_existing_task(
+            groq_client, topic, issue.fields.summary)
+        if task == GROQ_NOT_FOUND_TASK:
+            # Заглушку не записываем: задача должна попасть в следующий запуск
+            return False
+        if DRY_RUN:
+            logging.info(
+                f"[DRY-RUN] Would update description of {issue.key}")
+            return True
+        jira_update_issue(issue, {"description": task["description"]})
+        progress.mark_done(issue.key)
+        logging.info(f"Description written for {issue.key}: {issue.fields.summary}")
+        return True
+    except Exception as e:
+        logging.error(
+            f"Failed to backfill description of {issue.key}: {e}", exc_info=True)
+        return False
+
+
+def backfill_descriptions(
+    jira: JIRA, groq_client, workers: int = BACKFILL_CONCURRENCY, progress_path: str = BACKFILL_PROGRESS_PATH
+) -> int:
+    """
+    Заранее пишет описания задачам бэклога запланированных эпиков, чтобы
+    утренний перевод задачи в работу не ждал LLM. Возвращает число обновлённых задач.
+    """
+    topics = scheduled_topics()
+    if not topics:
+        return 0
+    progress = BackfillProgress(progress_path)
+    # maxResults=False — jira сама пройдёт по всем страницам выборки
+    issues: List[Issue] = [
+        issue for issue in jira_search_issues(
+            jira, missing_descriptions_jql(topics), maxResults=False, fields="summary,parent")
+        if issue.key not in progress.done
+    ]
+    logging.info(f"Backfilling descriptions of {len(issues)} backlog issues")
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="backfill") as executor:
+        results = list(executor.map(
+            lambda issue: backfill_issue(
+                groq_client, issue, topics.get(issue.fields.parent.key, ""), progress),
+            issues,
+        ))
+    updated = sum(results)
+    logging.info(
+        f"Backfill finished: {updated}/{len(issues)} issues, "
+        f"{time.monotonic() - started:.2f}s")
+    return updated
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    jira, groq_client = init_clients()
+    backfill_descriptions(jira, groq_client)
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        llm_cache.log_stats()
+    log_http_stats(jira)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,15 +12,77 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 JIRA_BOARD_ID = int(os.getenv("JIRA_BOARD_ID", "1"))
 JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY", "PRO")  # Jira project key
 JIRA_HISTORY_KEY = os.getenv("JIRA_HISTORY_KEY")
+# Размер страницы ленивого поиска задач (IssueSearch)
+JIRA_SEARCH_PAGE_SIZE = max(1, int(os.getenv("JIRA_SEARCH_PAGE_SIZE", 50)))
+# Размер страницы при постраничной загрузке комментариев задачи истории
+HISTORY_COMMENTS_PAGE_SIZE = int(os.getenv("HISTORY_COMMENTS_PAGE_SIZE", 100))
+# Файл локальной копии комментариев истории; пусто — кеш между запусками выключен
+HISTORY_CACHE_PATH = os.getenv("HISTORY_CACHE_PATH", "")
+# Максимальный размер одного комментария-сегмента истории (лимит Jira — 32767)
+HISTORY_SEGMENT_MAX_CHARS = int(os.getenv("HISTORY_SEGMENT_MAX_CHARS", 8000))
+# Локальное SQLite-зеркало истории топиков; пусто — история читается из Jira
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "")
+# Файл кеша проверенных эпиков и сколько секунд не перепроверять существующий эпик;
+# пустой путь — проверка раз за запуск без кеша между запусками
+EPIC_CACHE_PATH = os.getenv("EPIC_CACHE_PATH", "")
+EPIC_CACHE_TTL_SECONDS = int(os.getenv("EPIC_CACHE_TTL_SECONDS", 7 * 24 * 3600))
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
 GROQ_MODEL = os.getenv("GROQ_MODEL", default="meta-llama/llama-guard-4-12b")
+# Лимиты Groq до первого ответа с заголовками x-ratelimit-*
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", 30))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", 6000))
+# Сколько токенов ответа закладывать при резервировании лимита
+GROQ_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("GROQ_COMPLETION_TOKENS_ESTIMATE", 300))
+# Число потоков извлечения тем в core/create_history.py
+CREATE_HISTORY_WORKERS = max(1, int(os.getenv("CREATE_HISTORY_WORKERS", 8)))
+# Бюджет токенов на пачку задач в одном запросе извлечения тем (0 — по одной задаче)
+CREATE_HISTORY_PACK_TOKENS = int(os.getenv("CREATE_HISTORY_PACK_TOKENS", 4000))
+# Потоковая генерация новых задач: заголовок-повтор обрывает ответ сразу
+GROQ_STREAM = os.getenv("GROQ_STREAM", "false").lower() == "true"
+
+# Сколько токенов промпта новой задачи отдаётся под историю пройденных тем
+PROMPT_HISTORY_TOKEN_BUDGET = int(os.getenv("PROMPT_HISTORY_TOKEN_BUDGET", 1500))
+# Порог похожести (0..1), с которого сгенерированная тема считается повтором,
+# и сколько раз перегенерировать задачу с повтором
+THEME_DUPLICATE_THRESHOLD = float(os.getenv("THEME_DUPLICATE_THRESHOLD", 0.6))
+THEME_MAX_REGENERATIONS = max(0, int(os.getenv("THEME_MAX_REGENERATIONS", 2)))
+
+# Пополнение бэклога: сколько тем генерировать за раз (0 — выключено) и
+# минимум задач в бэклоге эпика, ниже которого он пополняется
+BACKLOG_REPLENISH_SIZE = max(0, int(os.getenv("BACKLOG_REPLENISH_SIZE", 0)))
+BACKLOG_LOW_WATER_DEFAULT = max(1, int(os.getenv("BACKLOG_LOW_WATER_DEFAULT", 1)))
+# Переопределения по эпикам: "PRO-1:3,PRO-3:2"
+BACKLOG_LOW_WATER = {
+    epic.strip(): int(mark)
+    for epic, mark in (
+        item.split(":", 1) for item in os.getenv("BACKLOG_LOW_WATER", "").split(",") if ":" in item
+    )
+}
+
+# Дисковый кеш ответов LLM; пусто — кеш выключен
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+# Повторы запросов к Jira и Groq: число попыток, потолок экспоненциальной паузы
+# и потолок паузы из Retry-After
+RETRY_MAX_ATTEMPTS = max(1, int(os.getenv("RETRY_MAX_ATTEMPTS", 5)))
+RETRY_MAX_WAIT_SECONDS = float(os.getenv("RETRY_MAX_WAIT_SECONDS", 30))
+RETRY_AFTER_MAX_SECONDS = float(os.getenv("RETRY_AFTER_MAX_SECONDS", 120))
+# Предохранитель: после скольких вызовов подряд, не удавшихся и после всех
+# повторов, сервис считается недоступным и сколько секунд запросы к нему сразу падают
+CIRCUIT_FAILURE_THRESHOLD = max(1, int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 3)))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", 60))
 
 # Status names in Jira workflow
 STATUS_IN_PROGRESS = "In Progress"
 STATUS_BACKLOG = "Backlog"
 STATUS_DONE = "Done"
+# Сколько секунд кешировать переходы workflow и перечитывать ли статус после перехода
+TRANSITION_CACHE_TTL_SECONDS = int(os.getenv("TRANSITION_CACHE_TTL_SECONDS", 24 * 3600))
+TRANSITION_VERIFY = os.getenv("TRANSITION_VERIFY", "false").lower() == "true"
 
 # Schedule: weekday -> list of (epic, topic)
 PROJECT_SCHEDULE = {
@@ -37,10 +99,57 @@ SCHEDULER_HOUR = int(os.getenv("SCHEDULER_HOUR", 8))
 SCHEDULER_MINUTE = int(os.getenv("SCHEDULER_MINUTE", 0))
 # строка, например "mon-fri" или "0-4"
 SCHEDULER_DAYS = os.getenv("SCHEDULER_DAYS", "mon-fri")
+# На сколько секунд запуск может опоздать и всё ещё выполниться
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", 3600))
+
+# Вечерняя предгенерация задач на следующий день; пусто — выключена
+PREGENERATED_TASKS_PATH = os.getenv("PREGENERATED_TASKS_PATH", "")
+PREGENERATE_HOUR = int(os.getenv("PREGENERATE_HOUR", 20))
+PREGENERATE_MINUTE = int(os.getenv("PREGENERATE_MINUTE", 0))
+PREGENERATE_DAYS = os.getenv("PREGENERATE_DAYS", "sun-thu")
+
+# Заполнение описаний задач бэклога (core/backfill_descriptions.py)
+BACKFILL_CONCURRENCY = max(1, int(os.getenv("BACKFILL_CONCURRENCY", 4)))
+BACKFILL_PROGRESS_PATH = os.getenv("BACKFILL_PROGRESS_PATH", "backfill_progress.json")
 
 DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"
 
+# HTTP-клиенты Jira и Groq: размер пула соединений (0 — по числу потоков),
+# таймауты подключения и чтения, время жизни keep-alive соединения и сжатие ответов
+HTTP_POOL_SIZE = max(0, int(os.getenv("HTTP_POOL_SIZE", 0)))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+JIRA_READ_TIMEOUT = float(os.getenv("JIRA_READ_TIMEOUT", 30))
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", 120))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", 60))
+HTTP_GZIP = os.getenv("HTTP_GZIP", "true").lower() == "true"
+
+# Количество потоков для параллельной обработки эпиков (1 — последовательно)
+RUN_WORKERS = max(1, int(os.getenv("RUN_WORKERS", 1)))
+# Сколько эпиков одновременно обрабатывает asyncio-движок (core/async_main.py)
+ASYNC_CONCURRENCY = max(1, int(os.getenv("ASYNC_CONCURRENCY", 10)))
+# Бюджет времени ежедневного запуска и одного эпика в секундах (0 — без ограничения)
+# и бюджет повторного прохода по отложенным эпикам (0 — без повторного прохода)
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", 0))
+EPIC_BUDGET_SECONDS = float(os.getenv("EPIC_BUDGET_SECONDS", 0))
+RUN_CATCHUP_SECONDS = float(os.getenv("RUN_CATCHUP_SECONDS", 600))
+# Приоритеты эпиков: "PRO-1:10,PRO-3:5"; эпики с большим приоритетом
+# обрабатываются первыми, остальные — в порядке PROJECT_SCHEDULE
+EPIC_PRIORITY = {
+    epic.strip(): int(priority)
+    for epic, priority in (
+        item.split(":", 1) for item in os.getenv("EPIC_PRIORITY", "").split(",") if ":" in item
+    )
+}
+
 TELEGRAM_SEND_MESSAGE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+# Очередь уведомлений Telegram: таймауты, лимиты (сообщений в секунду) и повторы
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", 5))
+TELEGRAM_READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", 10))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", 30))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", 1))
+TELEGRAM_MAX_ATTEMPTS = max(1, int(os.getenv("TELEGRAM_MAX_ATTEMPTS", 5)))
+# Сколько секунд в конце запуска ждать доставки оставшихся уведомлений
+TELEGRAM_FLUSH_TIMEOUT = float(os.getenv("TELEGRAM_FLUSH_TIMEOUT", 30))
 
 
 def validate_config():
@@ -1,114 +1,302 @@
+import json
 import logging
-from typing import List, Optional
+import threading
+import time
 
-from jira import Comment, Issue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-from config import JIRA_HISTORY_KEY, JIRA_PROJECT_KEY, STATUS_DONE
+from jira import Issue
+
+from config import (
+    CREATE_HISTORY_PACK_TOKENS,
+    CREATE_HISTORY_WORKERS,
+    JIRA_PROJECT_KEY,
+    STATUS_DONE,
+)
+from history import HistorySnapshot
+from http_pool import log_http_stats
+from llm_cache import get_llm_cache
 from main import (
+    DONE_ISSUE_FIELDS,
+    IssueSearch,
     call_groq_generate_content, 
     create_topic_history_comment, 
     init_clients, 
-    jira_search_issues,
-    parse_history_comment, 
-    seek_topic_history_comment, 
-    update_topic_history
+    update_topic_history,
+    validate_epics,
 )
+from themes import estimate_tokens
+from rate_limit import GroqRateLimiter, get_groq_limiter
 
 
-def main():
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    jira, groq_client = init_clients()
+EPICS = [
+    ("PRO-1", "Английский"),
+    ("PRO-3", "Алгоритмы и структуры данных"),
+    ("PRO-4", "Систем дизайн"),
+    ("PRO-5", "Поведенческие вопросы"),
+    ("PRO-6", "Python"),
+    ("PRO-7", "ML Ops и DevOps")
+]
+
+
+class Progress:
+    """Потокобезопасный счётчик выполненных запросов с оценкой оставшегося времени."""
+
+    def __init__(self, total: int, label: str):
+        self.total = total
+        self.label = label
+        self.done = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def advance(self, item: str):
+        with self._lock:
+            self.done += 1
+            elapsed = time.monotonic() - self._started
+            eta = elapsed / self.done * (self.total - self.done)
+            logging.info(
+                f'{self.label} {self.done}/{self.total} ({item}), '
+                f'elapsed {elapsed:.0f}s, eta {eta:.0f}s')
+
+
+def build_issue_themes_prompt(epic_title: str, issue: Issue) -> str:
+    summary = issue.fields.summary
+    description = issue.fields.description
+    comments_bodies = [i.body for i in issue.fields.comment.comments]
+    comments_text = '\n\n'.join(comments_bodies)
+    return (
+        'Твоя задача определить тему или список тем, которые были затронуты '
+        'в низлежащей задаче. Я приложу название задачи, её описание и комментарии, '
+        'которые были в этой задаче. В ответе я ожидаю получить только тему или список тем '
+        'без каких либо других комментариев. Клади в темы только те темы, которые относятся к '
+        f'топику {epic_title}. Если например топик на тему английского, то не надо класть туда '
+        'темы по типу тайм менеджмент и тп. '
+        '\n\n'
+        'Пример ответа, где есть одна тема: \n'
+        'Быстрая сортировка. \n\n'
+        'Пример ответа, где есть несколько тем: \n'
+        'Артикли\n'
+        'Present Simple\n\n'
+        f'Название задачи: {summary}\n'
+        f'Описание задачи: {description}\n'
+        f'Комментарии:\n {comments_text}'
+    )
 
-    epics = [
-        ("PRO-1", "Английский"),
-        ("PRO-3", "Алгоритмы и структуры данных"),
-        ("PRO-4", "Систем дизайн"),
-        ("PRO-5", "Поведенческие вопросы"),
-        ("PRO-6", "Python"),
-        ("PRO-7", "ML Ops и DevOps")
-    ]
 
+def build_final_themes_prompt(themes: List[str]) -> str:
+    themes_text = '\n'.join(themes)
+    return (
+        'Твоя задача из списка тем оставить только уникальные темы и в '
+        'ответ написать только список, без твоих комментариев и умозаключений. '
+        'Ответ дай без нумирации. Просто темы, разделенные переносом строки. '
+        '\n'
+        f'Список тем:\n{themes_text}'
+    )
+
+
+def collect_epics_to_backfill(
+    jira, history: HistorySnapshot, epics: List[Tuple[str, str]] = EPICS
+) -> Dict[str, Tuple[str, List[Issue]]]:
+    """Эпики с пустой историей и их выполненные задачи."""
+    result: Dict[str, Tuple[str, List[Issue]]] = {}
     for epic_key, epic_title in epics:
-        jql_done_issues = (
-            f'project = {JIRA_PROJECT_KEY} '
-            f'AND status = "{STATUS_DONE}" '
-            f'AND parent = {epic_key} '
-        )
-        done_issues: List[Issue] = jira_search_issues(jira, jql_done_issues)
+        topic_history_comment = history.find(epic_key)
 
-        history_issue = jira.issue(JIRA_HISTORY_KEY)
-        history_comments = history_issue.fields.comment.comments
-        topic_history_comment = seek_topic_history_comment(history_comments, epic_key)
-        
         if not topic_history_comment:
             topic_history_comment = create_topic_history_comment(jira, epic_key, epic_title)
+            if topic_history_comment is not None:
+                history.add(topic_history_comment)
             logging.info(f'Creat history for topic {epic_title}')
             continue
-        
-        topic_history = parse_history_comment(topic_history_comment.body)
 
-        if topic_history:
+        if any(history.iter_themes(epic_key)):
             continue
 
+        jql_done_issues = (
+            f'project = {JIRA_PROJECT_KEY} '
+            f'AND status = "{STATUS_DONE}" '
+            f'AND parent = {epic_key} '
+        )
+        # Постранично и только для эпиков, которым действительно нужна история
+        done_issues: List[Issue] = list(
+            IssueSearch(jira, jql_done_issues, fields=DONE_ISSUE_FIELDS))
         if not done_issues:
             continue
 
-        themes = []
-        for issue in done_issues:
-            summary = issue.fields.summary
-            description = issue.fields.description
-            comments_bodies = [i.body for i in issue.fields.comment.comments]
-            comments_text = '\n\n'.join(comments_bodies)
-            issue_prompt = (
-                'Твоя задача определить тему или список тем, которые были затронуты '
-                'в низлежащей задаче. Я приложу название задачи, её описание и комментарии, '
-                'которые были в этой задаче. В ответе я ожидаю получить только тему или список тем '
-                'без каких либо других комментариев. Клади в темы только те темы, которые относятся к '
-                f'топику {epic_title}. Если например топик на тему английского, то не надо класть туда '
-                'темы по типу тайм менеджмент и тп. '
-                '\n\n'
-                'Пример ответа, где есть одна тема: \n'
-                'Быстрая сортировка. \n\n'
-                'Пример ответа, где есть несколько тем: \n'
-                'Артикли\n'
-                'Present Simple\n\n'
-                f'Название задачи: {summary}\n'
-                f'Описание задачи: {description}\n'
-                f'Комментарии:\n {comments_text}'
-            )
-            logging.info(f'Getting theme from issue {issue.key}: {summary}')
-            try:
-                issue_themes = call_groq_generate_content(groq_client, issue_prompt)
-                themes.append(issue_themes)
-            except Exception as e:
-                logging.error(f"Error getting theme from issue {issue.key}: {e}", exc_info=True)
-                continue
+        result[epic_key] = (epic_title, done_issues)
+    return result
 
+
+def issue_block(issue: Issue) -> str:
+    comments_text = '\n\n'.join(i.body for i in issue.fields.comment.comments)
+    return (
+        f'Задача {issue.key}\n'
+        f'Название задачи: {issue.fields.summary}\n'
+        f'Описание задачи: {issue.fields.description}\n'
+        f'Комментарии:\n {comments_text}'
+    )
+
+
+def build_packed_themes_prompt(epic_title: str, issues: List[Issue]) -> str:
+    blocks = '\n\n---\n\n'.join(issue_block(issue) for issue in issues)
+    keys = ', '.join(issue.key for issue in issues)
+    return (
+        'Твоя задача для каждой из низлежащих задач определить тему или список тем, '
+        'которые были в ней затронуты. Для каждой задачи я приложу ключ, название, '
+        'описание и комментарии. Клади в темы только те темы, которые относятся к '
+        f'топику {epic_title}. Если например топик на тему английского, то не надо класть туда '
+        'темы по типу тайм менеджмент и тп. '
+        'Ответ дай только в виде JSON-объекта без каких либо других комментариев: '
+        'ключ задачи -> список тем. '
+        '\n\n'
+        'Пример ответа: \n'
+        '{"PRO-10": ["Быстрая сортировка"], "PRO-11": ["Артикли", "Present Simple"]}\n\n'
+        f'Ключи задач: {keys}\n\n'
+        f'{blocks}'
+    )
+
+
+def pack_issues(issues: List[Issue], budget_tokens: int) -> List[List[Issue]]:
+    """Раскладывает задачи по пачкам, каждая — не больше budget_tokens (кроме одиночных)."""
+    if budget_tokens <= 0:
+        return [[issue] for issue in issues]
+    packs: List[List[Issue]] = []
+    current: List[Issue] = []
+    used = 0
+    for issue in issues:
+        cost = estimate_tokens(issue_block(issue))
+        if current and used + cost > budget_tokens:
+            packs.append(current)
+            current, used = [], 0
+        current.append(issue)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def parse_packed_themes(content: str, keys: List[str]) -> Dict[str, str]:
+    """Достаёт из ответа JSON с темами; возвращает темы по ключам задач из keys."""
+    start, end = content.find('{'), content.rfind('}')
+    if start == -1 or end < start:
+        return {}
+    try:
+        data = json.loads(content[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    result = {}
+    for key in keys:
+        themes = data.get(key)
+        if isinstance(themes, str):
+            themes = [themes]
+        if isinstance(themes, list):
+            result[key] = '\n'.join(str(theme).strip() for theme in themes if str(theme).strip())
+    return result
+
+
+def extract_issue_themes(
+    groq_client, limiter: GroqRateLimiter, epic_title: str, issue: Issue, progress: Progress
+) -> Optional[str]:
+    logging.info(f'Getting theme from issue {issue.key}: {issue.fields.summary}')
+    try:
+        return call_groq_generate_content(
+            groq_client, build_issue_themes_prompt(epic_title, issue), limiter=limiter)
+    except Exception as e:
+        logging.error(f"Error getting theme from issue {issue.key}: {e}", exc_info=True)
+        return None
+    finally:
+        progress.advance(issue.key)
+
+
+def extract_themes(
+    groq_client, limiter: GroqRateLimiter, epic_title: str, issues: List[Issue], progress: Progress
+) -> Dict[str, Optional[str]]:
+    """
+    Темы пачки задач одним запросом. Задачи, для которых ответ не удалось
+    разобрать, переспрашиваются по одной.
+    """
+    if len(issues) == 1:
+        issue = issues[0]
+        return {issue.key: extract_issue_themes(groq_client, limiter, epic_title, issue, progress)}
+    keys = [issue.key for issue in issues]
+    logging.info(f'Getting themes from issues {", ".join(keys)}')
+    try:
+        content = call_groq_generate_content(
+            groq_client, build_packed_themes_prompt(epic_title, issues), limiter=limiter)
+        result: Dict[str, Optional[str]] = dict(parse_packed_themes(content, keys))
+    except Exception as e:
+        logging.error(f"Error getting themes from issues {keys}: {e}", exc_info=True)
+        result = {}
+    for issue in issues:
+        if issue.key in result:
+            progress.advance(issue.key)
+        else:
+            logging.warning(f'No themes for {issue.key} in packed answer, asking separately')
+            result[issue.key] = extract_issue_themes(
+                groq_client, limiter, epic_title, issue, progress)
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    jira, groq_client = init_clients()
+    # Комментарии задачи истории загружаются один раз на весь прогон
+    history = HistorySnapshot.load(jira)
+    limiter = get_groq_limiter()
+
+    # Несуществующие эпики отсекаются одним запросом (или по кешу эпиков)
+    existing = validate_epics(jira, [epic_key for epic_key, _ in EPICS])
+    for epic_key, _ in EPICS:
+        if epic_key not in existing:
+            logging.error(f'Epic {epic_key} not found or inaccessible, skipping')
+    epics = collect_epics_to_backfill(
+        jira, history, [(epic_key, title) for epic_key, title in EPICS if epic_key in existing])
+    # Несколько задач эпика уходят в один запрос, пока пачка влезает в CREATE_HISTORY_PACK_TOKENS
+    packs = [
+        (epic_title, pack)
+        for epic_title, done_issues in epics.values()
+        for pack in pack_issues(done_issues, CREATE_HISTORY_PACK_TOKENS)
+    ]
+    progress = Progress(
+        sum(len(done_issues) for _, done_issues in epics.values()), 'Extracted themes from')
+    logging.info(f'Extracting themes with {len(packs)} requests')
+    # Извлечение идёт параллельно по всем пачкам всех эпиков; темп задаёт лимитер Groq
+    with ThreadPoolExecutor(max_workers=CREATE_HISTORY_WORKERS, thread_name_prefix="extract") as executor:
+        results = list(executor.map(
+            lambda pack: extract_themes(groq_client, limiter, pack[0], pack[1], progress),
+            packs,
+        ))
+    issue_themes_by_key: Dict[str, Optional[str]] = {}
+    for result in results:
+        issue_themes_by_key.update(result)
+    themes_by_epic: Dict[str, List[str]] = {
+        epic_key: [
+            issue_themes_by_key[issue.key] for issue in done_issues
+            if issue_themes_by_key.get(issue.key)
+        ]
+        for epic_key, (_, done_issues) in epics.items()
+    }
+
+    for epic_key, themes in themes_by_epic.items():
         if not themes:
             continue
-
-        themes_text = '\n'.join(themes)
-        final_prompt = (
-            'Твоя задача из списка тем оставить только уникальные темы и в '
-            'ответ написать только список, без твоих комментариев и умозаключений. '
-            'Ответ дай без нумирации. Просто темы, разделенные переносом строки. '
-            '\n'
-            f'Список тем:\n{themes_text}'
-        )
         try:
-            final_themes = call_groq_generate_content(groq_client, final_prompt)
+            final_themes = call_groq_generate_content(
+                groq_client, build_final_themes_prompt(themes), limiter=limiter)
         except Exception as e:
             logging.error(f"Error getting final themes for epic {epic_key}: {e}", exc_info=True)
             continue
 
-        history_issue = jira.issue(JIRA_HISTORY_KEY)
-        history_comments = history_issue.fields.comment.comments
-        topic_history_comment: Optional[Comment] = seek_topic_history_comment(history_comments, epic_key)
+        update_topic_history(jira, epic_key, final_themes, snapshot=history)
 
-        if topic_history_comment:
-            update_topic_history(topic_history_comment, final_themes)
-        else:
-            logging.warning(f"No topic comment found for epic {epic_key} after supposed creation.")
+    history.save()
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        llm_cache.log_stats()
+    log_http_stats(jira)
 
 
 if __name__ == '__main__':
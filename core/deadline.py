@@ -0,0 +1,58 @@
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Момент (time.monotonic), к которому текущий эпик или запуск должен закончиться.
+# ContextVar, а не глобальная переменная: у каждого потока эпиков и каждой
+# asyncio-задачи свой срок.
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени эпика или запуска исчерпан: работа откладывается."""
+
+
+def remaining() -> Optional[float]:
+    """Сколько секунд осталось до срока; None — срока нет."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(what: str = "request"):
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"No time budget left for {what}")
+
+
+def timeout_kwargs(cap: Optional[float] = None) -> dict:
+    """
+    timeout= для HTTP-клиента, чтобы запрос не пережил срок, но и не ждал
+    дольше cap (обычного таймаута клиента); пусто без срока.
+    """
+    left = remaining()
+    if left is None:
+        return {}
+    timeout = max(left, 0.001)
+    return {"timeout": min(timeout, cap) if cap else timeout}
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None, until: Optional[float] = None) -> Iterator[Optional[float]]:
+    """
+    Ограничивает вложенный код сроком: через seconds секунд и не позже until
+    (time.monotonic). Внешний срок никогда не продлевается.
+    """
+    candidates = [d for d in (
+        _deadline.get(),
+        time.monotonic() + seconds if seconds else None,
+        until,
+    ) if d is not None]
+    token = _deadline.set(min(candidates) if candidates else None)
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,53 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from typing import Dict, Iterable, List
+
+from config import EPIC_CACHE_PATH, EPIC_CACHE_TTL_SECONDS
+
+
+class EpicCache:
+    """
+    Дисковый кеш проверенных эпиков: ключ -> время последней проверки.
+    Эпики почти не пропадают, поэтому существующий эпик не перепроверяется
+    ttl секунд. Отсутствующие эпики не кешируются: исправленное расписание
+    подхватывается следующим же запуском. Пустой path — кеш живёт только в памяти.
+    """
+
+    def __init__(self, path: str = EPIC_CACHE_PATH, ttl: float = EPIC_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._checked_at: Dict[str, float] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._checked_at = dict(json.load(f).get("epics", {}))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable epic cache {path}: {e}")
+
+    def fresh(self, epic_key: str) -> bool:
+        checked_at = self._checked_at.get(epic_key)
+        return checked_at is not None and time.time() - checked_at <= self.ttl
+
+    def stale(self, epic_keys: Iterable[str]) -> List[str]:
+        """Эпики, которые нужно проверить в Jira, без повторов и в исходном порядке."""
+        with self._lock:
+            return [key for key in dict.fromkeys(epic_keys) if not self.fresh(key)]
+
+    def update(self, existing: Iterable[str], missing: Iterable[str] = ()):
+        now = time.time()
+        with self._lock:
+            for epic_key in existing:
+                self._checked_at[epic_key] = now
+            for epic_key in missing:
+                self._checked_at.pop(epic_key, None)
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"epics": self._checked_at}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,410 @@
+import json
+import logging
+import os
+import threading
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jira import JIRA, Comment
+
+from config import HISTORY_CACHE_PATH, HISTORY_COMMENTS_PAGE_SIZE, JIRA_HISTORY_KEY
+from retry_policy import service_retry
+
+
+TOPIC_LABEL = "Топик"
+TOPIC_KEY_LABEL = "Ключ топика"
+TOPIC_PART_LABEL = "Часть"
+HISTORY_LABEL = "История топика"
+
+
+def _parse_header(body: str, label: str) -> Optional[str]:
+    for line in body.splitlines():
+        if line.strip().startswith(HISTORY_LABEL):
+            # Заголовок закончился, дальше идут темы
+            return None
+        if label in line:
+            _, _, value = line.partition(":")
+            return value.strip() or None
+    return None
+
+
+def parse_topic_key(body: str) -> Optional[str]:
+    """Возвращает ключ эпика из строки "Ключ топика: ..." или None."""
+    for line in body.splitlines():
+        if TOPIC_KEY_LABEL in line:
+            _, _, value = line.partition(":")
+            return value.strip() or None
+    return None
+
+
+def parse_topic_name(body: str) -> Optional[str]:
+    for line in body.splitlines():
+        if line.startswith(f"{TOPIC_LABEL}:"):
+            return line.partition(":")[2].strip() or None
+        if line.strip().startswith(HISTORY_LABEL):
+            return None
+    return None
+
+
+def parse_topic_part(body: str) -> int:
+    """Номер сегмента истории; комментарий без строки "Часть" — первый сегмент."""
+    value = _parse_header(body, TOPIC_PART_LABEL)
+    try:
+        return int(value) if value else 1
+    except ValueError:
+        return 1
+
+
+def format_topic_history_comment(
+    topic: str, epic_key: str, part: int = 1, themes: Iterable[str] = ()
+) -> str:
+    header = f"{TOPIC_LABEL}: {topic}\n{TOPIC_KEY_LABEL}: {epic_key}\n"
+    if part > 1:
+        header += f"{TOPIC_PART_LABEL}: {part}\n"
+    body = header + f"\n{HISTORY_LABEL}:"
+    for theme in themes:
+        body += f"\n{theme}"
+    return body
+
+
+def seek_topic_history_comment(
+    comments: List[Comment], epic_key: str
+) -> Optional[Comment]:
+    for comment in comments:
+        if parse_topic_key(comment.body) == epic_key:
+            return comment
+
+
+class HistoryIndex:
+    """
+    Индекс epic_key -> сегменты истории (комментарии), упорядоченные по номеру
+    части. Заголовок каждого комментария разбирается один раз при добавлении,
+    поиск — точное совпадение ключа.
+    """
+
+    def __init__(self, comments: Iterable[Comment] = ()):
+        self._by_epic: Dict[str, Dict[int, Comment]] = {}
+        for comment in comments:
+            self.add(comment)
+
+    def add(self, comment: Comment) -> Optional[str]:
+        epic_key = parse_topic_key(comment.body)
+        if not epic_key:
+            return None
+        parts = self._by_epic.setdefault(epic_key, {})
+        # Как и при линейном поиске, побеждает первый комментарий с ключом
+        parts.setdefault(parse_topic_part(comment.body), comment)
+        return epic_key
+
+    def segments(self, epic_key: str) -> List[Comment]:
+        parts = self._by_epic.get(epic_key, {})
+        return [parts[part] for part in sorted(parts)]
+
+    def get(self, epic_key: str) -> Optional[Comment]:
+        segments = self.segments(epic_key)
+        return segments[0] if segments else None
+
+    def latest(self, epic_key: str) -> Optional[Comment]:
+        segments = self.segments(epic_key)
+        return segments[-1] if segments else None
+
+    def __contains__(self, epic_key: str) -> bool:
+        return epic_key in self._by_epic
+
+    def __len__(self) -> int:
+        return len(self._by_epic)
+
+
+def parse_history_comment(topic_comment: str) -> str:
+    """
+    Извлекает список тем из секции "История топика:" в переданном тексте.
+    Если секция не найдена, возвращает пустую строку.
+    """
+    lines = topic_comment.splitlines()
+    result_lines = []
+    recording = False
+
+    for line in lines:
+        stripped = line.strip()
+        if recording:
+            if stripped:
+                result_lines.append(stripped)
+        elif stripped.startswith("История топика"):
+            # Как только встречаем метку, включаем сбор последующих строк
+            recording = True
+
+    return "\n".join(result_lines)
+
+
+JIRA_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def parse_jira_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, JIRA_DATETIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+@service_retry("jira")
+def fetch_comments_page(
+    jira: JIRA, issue_key: str, start_at: int, page_size: int
+) -> Dict[str, Any]:
+    return jira._get_json(
+        f"issue/{issue_key}/comment",
+        params={"startAt": start_at, "maxResults": page_size, "orderBy": "created"},
+    )
+
+
+@service_retry("jira")
+def fetch_issue_updated(jira: JIRA, issue_key: str) -> Optional[datetime]:
+    issue = jira.issue(issue_key, fields="updated")
+    return parse_jira_datetime(getattr(issue.fields, "updated", None))
+
+
+def iter_issue_comments(
+    jira: JIRA, issue_key: str, start_at: int = 0, page_size: Optional[int] = None
+) -> Iterator[Comment]:
+    """Постранично отдаёт комментарии задачи в порядке создания."""
+    page_size = page_size or HISTORY_COMMENTS_PAGE_SIZE
+    while True:
+        page = fetch_comments_page(jira, issue_key, start_at, page_size)
+        raw_comments = page.get("comments", [])
+        for raw in raw_comments:
+            yield Comment(jira._options, jira._session, raw=raw)
+        start_at += len(raw_comments)
+        # Неполная страница — последняя, лишний запрос не нужен
+        if len(raw_comments) < page_size or start_at >= page.get("total", start_at):
+            return
+
+
+def comments_watermark(comments: Iterable[Comment]) -> Tuple[int, Optional[datetime]]:
+    """Возвращает наибольший id и наибольшее время изменения среди комментариев."""
+    max_id, max_updated = 0, None
+    for comment in comments:
+        raw = getattr(comment, "raw", None) or {}
+        max_id = max(max_id, int(raw.get("id") or 0))
+        updated = parse_jira_datetime(raw.get("updated"))
+        if updated and (max_updated is None or updated > max_updated):
+            max_updated = updated
+    return max_id, max_updated
+
+
+def cache_is_fresh(
+    issue_key: str, cached: List[Comment], issue_updated: Optional[datetime]
+) -> bool:
+    """
+    Кеш годится, только если задача истории не менялась после последнего
+    сохранённого комментария. Новые комментарии не догружаются отдельно:
+    время изменения задачи не отличает добавление комментария от правки
+    старого перед ним, а устаревший кеш истории опаснее лишней полной загрузки.
+    """
+    _, max_updated = comments_watermark(cached)
+    if max_updated and issue_updated and issue_updated <= max_updated:
+        logging.info(f"History issue {issue_key} unchanged since last run")
+        return True
+    logging.info(f"History issue {issue_key} changed, reloading all comments")
+    return False
+
+
+class CommentCache:
+    """Локальная копия комментариев задачи истории, переживающая перезапуски."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, issue_key: str) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable history cache {self.path}: {e}")
+            return []
+        if data.get("issue_key") != issue_key:
+            return []
+        return data.get("comments", [])
+
+    def save(self, issue_key: str, comments: List[Comment]):
+        max_id, max_updated = comments_watermark(comments)
+        data = {
+            "issue_key": issue_key,
+            "max_id": max_id,
+            "max_updated": max_updated.strftime(JIRA_DATETIME_FORMAT) if max_updated else None,
+            "comments": [c.raw for c in comments if getattr(c, "raw", None)],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class HistorySnapshot:
+    """
+    Снимок комментариев задачи истории (JIRA_HISTORY_KEY).
+    Загружается один раз за запуск; все поиски обслуживаются из памяти,
+    а после записи в Jira снимок обновляется локально.
+    """
+
+    def __init__(
+        self,
+        comments: Iterable[Comment] = (),
+        issue_key: Optional[str] = None,
+        cache_path: str = "",
+    ):
+        self.issue_key = issue_key or JIRA_HISTORY_KEY
+        self.cache_path = cache_path
+        self._comments: List[Comment] = []
+        self._index = HistoryIndex()
+        self._lock = threading.Lock()
+        for comment in comments:
+            self.add(comment)
+
+    @classmethod
+    def load(
+        cls, jira: JIRA, issue_key: Optional[str] = None, cache_path: Optional[str] = None
+    ) -> "HistorySnapshot":
+        """
+        Загружает комментарии постранично. Если задан кеш и задача истории
+        не менялась после последнего сохранённого комментария, комментарии
+        берутся из кеша без единого запроса страниц.
+        """
+        cache_path = HISTORY_CACHE_PATH if cache_path is None else cache_path
+        snapshot = cls(issue_key=issue_key, cache_path=cache_path)
+        cached = snapshot.load_cache(jira._options, jira._session)
+        if cached and not cache_is_fresh(
+                snapshot.issue_key, cached, fetch_issue_updated(jira, snapshot.issue_key)):
+            cached = []
+        if cached:
+            for comment in cached:
+                snapshot.add(comment)
+        else:
+            # Индекс строится по мере поступления страниц
+            for comment in iter_issue_comments(jira, snapshot.issue_key):
+                snapshot.add(comment)
+        logging.info(
+            f"Loaded history snapshot of {snapshot.issue_key}: {len(snapshot._comments)} comments")
+        return snapshot
+
+    def load_cache(self, options: Optional[dict] = None, session=None) -> List[Comment]:
+        """Комментарии из локального кеша; пустой список, если кеш выключен или пуст."""
+        if not self.cache_path:
+            return []
+        return [
+            Comment(options or {}, session, raw=raw)
+            for raw in CommentCache(self.cache_path).load(self.issue_key)
+        ]
+
+    def save(self):
+        """Сохраняет локальную копию комментариев, если кеш включён."""
+        if self.cache_path:
+            CommentCache(self.cache_path).save(self.issue_key, self.comments)
+
+    @property
+    def comments(self) -> List[Comment]:
+        with self._lock:
+            return list(self._comments)
+
+    def find(self, epic_key: str) -> Optional[Comment]:
+        """Первый (заголовочный) сегмент истории эпика."""
+        with self._lock:
+            return self._index.get(epic_key)
+
+    def segments(self, epic_key: str) -> List[Comment]:
+        with self._lock:
+            return self._index.segments(epic_key)
+
+    def latest(self, epic_key: str) -> Optional[Comment]:
+        """Последний сегмент — единственный, в который дописываются темы."""
+        with self._lock:
+            return self._index.latest(epic_key)
+
+    def iter_themes(self, epic_key: str) -> Iterator[str]:
+        """Отдаёт темы эпика по сегментам в порядке их следования."""
+        for segment in self.segments(epic_key):
+            themes = parse_history_comment(segment.body)
+            if themes:
+                yield from themes.splitlines()
+
+    def add(self, comment: Comment):
+        """Регистрирует комментарий, только что созданный в Jira."""
+        with self._lock:
+            self._comments.append(comment)
+            self._index.add(comment)
+
+    def apply_update(self, comment: Comment, body: str):
+        """Отражает в снимке новый текст комментария после записи в Jira."""
+        with self._lock:
+            comment.body = body
+            raw = getattr(comment, "raw", None)
+            if isinstance(raw, dict):
+                raw["body"] = body
+
+
+@dataclass
+class HistoryAppendPlan:
+    """Что нужно записать в Jira, чтобы дописать темы в историю эпика."""
+    comment: Comment
+    # Новый текст последнего сегмента или None, если он не меняется
+    body: Optional[str]
+    topic: str
+    next_part: int
+    # Сколько тем дописывается в последний сегмент
+    appended: int = 0
+    # Темы, которые не поместились и пойдут в новые сегменты
+    new_segments: List[List[str]] = field(default_factory=list)
+
+    def iter_new_segments(self) -> Iterator[Tuple[int, List[str]]]:
+        for offset, themes in enumerate(self.new_segments):
+            yield self.next_part + offset, themes
+
+
+def plan_history_append(
+    snapshot: HistorySnapshot, epic_key: str, new_theme: str, max_chars: int
+) -> Optional[HistoryAppendPlan]:
+    """
+    Раскладывает новые темы по сегментам: сначала в последний сегмент,
+    пока он не превышает max_chars, затем в новые комментарии-сегменты.
+    Возвращает None, если у эпика нет комментария истории.
+    """
+    latest = snapshot.latest(epic_key)
+    if not latest:
+        return None
+
+    themes = [line.strip() for line in new_theme.splitlines() if line.strip()]
+    comment_body = latest.body
+    appended = 0
+    for theme in themes:
+        fits = len(comment_body) + len(theme) + 1 <= max_chars
+        # В пустой сегмент тема пишется даже сверх лимита, иначе ей негде поместиться
+        if not fits and (appended or parse_history_comment(comment_body)):
+            break
+        comment_body += f"\n{theme}"
+        appended += 1
+
+    topic = parse_topic_name(snapshot.find(epic_key).body) or epic_key
+    plan = HistoryAppendPlan(
+        comment=latest,
+        body=comment_body if appended else None,
+        topic=topic,
+        next_part=parse_topic_part(latest.body) + 1,
+        appended=appended,
+    )
+    remaining = themes[appended:]
+    part = plan.next_part
+    while remaining:
+        segment, size = [], len(format_topic_history_comment(topic, epic_key, part))
+        for theme in remaining:
+            if segment and size + len(theme) + 1 > max_chars:
+                break
+            segment.append(theme)
+            size += len(theme) + 1
+        plan.new_segments.append(segment)
+        remaining = remaining[len(segment):]
+        part += 1
+    return plan
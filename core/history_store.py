@@ -0,0 +1,229 @@
+import logging
+import sqlite3
+import threading
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from history import HistorySnapshot
+
+
+class HistoryStore:
+    """
+    Локальное зеркало истории топиков в SQLite. Темы хранятся построчно;
+    флаг synced показывает, записана ли тема в комментарий Jira.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS epics ("
+                "epic_key TEXT PRIMARY KEY, seeded_at TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS themes ("
+                "epic_key TEXT NOT NULL, position INTEGER NOT NULL, "
+                "theme TEXT NOT NULL, synced INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (epic_key, position))"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def has_epic(self, epic_key: str) -> bool:
+        """Был ли эпик засеян из Jira (в том числе с пустой историей)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM epics WHERE epic_key = ?", (epic_key,)).fetchone()
+        return row is not None
+
+    def get_themes(self, epic_key: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT theme FROM themes WHERE epic_key = ? ORDER BY position",
+                (epic_key,),
+            ).fetchall()
+        return [theme for (theme,) in rows]
+
+    def get_history(self, epic_key: str) -> str:
+        return "\n".join(self.get_themes(epic_key))
+
+    def add_theme(self, epic_key: str, theme: str, synced: bool = False):
+        with self._lock, self._conn:
+            self._insert(epic_key, [theme], synced)
+
+    def _insert(self, epic_key: str, themes: Iterable[str], synced: bool):
+        (position,) = self._conn.execute(
+            "SELECT COALESCE(MAX(position), 0) FROM themes WHERE epic_key = ?",
+            (epic_key,),
+        ).fetchone()
+        self._conn.executemany(
+            "INSERT INTO themes (epic_key, position, theme, synced) VALUES (?, ?, ?, ?)",
+            [(epic_key, position + i, theme, int(synced))
+             for i, theme in enumerate(themes, start=1)],
+        )
+
+    def pull(self, epic_key: str, jira_themes: List[str]) -> int:
+        """
+        Добавляет темы, появившиеся в Jira с прошлой синхронизации. История в Jira
+        только дописывается, поэтому новыми считаются темы после уже синхронизированных.
+        """
+        with self._lock, self._conn:
+            (synced_count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM themes WHERE epic_key = ? AND synced = 1",
+                (epic_key,),
+            ).fetchone()
+            pending = dict(self._conn.execute(
+                "SELECT theme, position FROM themes WHERE epic_key = ? AND synced = 0",
+                (epic_key,),
+            ).fetchall())
+            new_themes = []
+            for theme in jira_themes[synced_count:]:
+                if theme in pending:
+                    # Тема уже была отправлена, но отметка о синхронизации потерялась
+                    self._conn.execute(
+                        "UPDATE themes SET synced = 1 WHERE epic_key = ? AND position = ?",
+                        (epic_key, pending.pop(theme)),
+                    )
+                else:
+                    new_themes.append(theme)
+            self._insert(epic_key, new_themes, synced=True)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO epics (epic_key, seeded_at) "
+                "VALUES (?, datetime('now'))",
+                (epic_key,),
+            )
+        return len(new_themes)
+
+    def unsynced_rows(self) -> Dict[str, List[Tuple[int, str]]]:
+        """(позиция, тема) ещё не записанных в Jira тем, сгруппированные по эпикам."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT epic_key, position, theme FROM themes WHERE synced = 0 "
+                "ORDER BY epic_key, position"
+            ).fetchall()
+        result: Dict[str, List[Tuple[int, str]]] = {}
+        for epic_key, position, theme in rows:
+            result.setdefault(epic_key, []).append((position, theme))
+        return result
+
+    def unsynced(self) -> Dict[str, List[str]]:
+        """Темы, ещё не записанные в Jira, сгруппированные по эпикам."""
+        return {
+            epic_key: [theme for _, theme in rows]
+            for epic_key, rows in self.unsynced_rows().items()
+        }
+
+    def mark_synced(self, epic_key: str, positions: Iterable[int]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE themes SET synced = 1 WHERE epic_key = ? AND position = ?",
+                [(epic_key, position) for position in positions],
+            )
+
+
+class HistorySync:
+    """
+    Фоновая синхронизация HistoryStore с Jira: при старте загружает снимок
+    задачи истории и подтягивает новые темы, затем отправляет в Jira темы,
+    записанные локально. Если снимок не загрузился, загрузка повторяется
+    перед следующей отправкой. push отмечает записанные темы после каждого
+    комментария Jira, поэтому прерванная отправка не повторяет их.
+    """
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        load_snapshot: Callable[[], HistorySnapshot],
+        push: Callable[[HistorySnapshot, str, List[str], Callable[[int], None]], bool],
+    ):
+        self.store = store
+        self.snapshot: Optional[HistorySnapshot] = None
+        self._load_snapshot = load_snapshot
+        self._push = push
+        self._ready = threading.Event()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._epic_keys: List[str] = []
+
+    def start(self, epic_keys: Iterable[str] = ()):
+        self._epic_keys = list(epic_keys)
+        self._thread = threading.Thread(
+            target=self._run, name="history-sync", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        try:
+            snapshot = self._load_snapshot()
+            for epic_key in self._epic_keys:
+                if snapshot.find(epic_key):
+                    pulled = self.store.pull(
+                        epic_key, list(snapshot.iter_themes(epic_key)))
+                    if pulled:
+                        logging.info(
+                            f"Pulled {pulled} themes of {epic_key} from Jira")
+            self.snapshot = snapshot
+        except Exception as e:
+            logging.error(f"History sync failed to load Jira history: {e}", exc_info=True)
+
+    def _run(self):
+        try:
+            self._load()
+        finally:
+            self._ready.set()
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.push_pending()
+            if self._stopping:
+                return
+
+    def wait_ready(self, timeout: Optional[float] = None) -> Optional[HistorySnapshot]:
+        """Ждёт загрузки снимка Jira; возвращает его или None при ошибке."""
+        self._ready.wait(timeout)
+        return self.snapshot
+
+    def schedule(self):
+        """Просит фоновый поток отправить несинхронизированные темы."""
+        self._wakeup.set()
+
+    def push_pending(self) -> int:
+        if self.snapshot is None:
+            self._load()
+            if self.snapshot is None:
+                return 0
+        pushed = 0
+        for epic_key, rows in self.store.unsynced_rows().items():
+            try:
+                pushed += self._push_epic(epic_key, rows)
+            except Exception as e:
+                logging.error(
+                    f"Failed to push history of {epic_key} to Jira: {e}", exc_info=True)
+        return pushed
+
+    def _push_epic(self, epic_key: str, rows: List[Tuple[int, str]]) -> int:
+        pending = list(rows)
+
+        def on_written(count: int):
+            # Темы уходят в Jira по порядку: записанные отмечаются по позициям строк
+            written = pending[:count]
+            del pending[:count]
+            self.store.mark_synced(epic_key, [position for position, _ in written])
+
+        self._push(self.snapshot, epic_key, [theme for _, theme in rows], on_written)
+        return len(rows) - len(pending)
+
+    def close(self, timeout: Optional[float] = None):
+        """Отправляет оставшиеся темы и останавливает фоновый поток."""
+        if not self._thread:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            # Тема могла быть записана после последней отправки фонового потока
+            self.push_pending()
@@ -0,0 +1,177 @@
+import logging
+import threading
+
+from typing import Optional, Tuple
+
+import httpx
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from config import (
+    BACKFILL_CONCURRENCY,
+    CREATE_HISTORY_WORKERS,
+    GROQ_READ_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_GZIP,
+    HTTP_KEEPALIVE_SECONDS,
+    HTTP_POOL_SIZE,
+    JIRA_READ_TIMEOUT,
+    RUN_WORKERS,
+)
+from deadline import timeout_kwargs
+
+
+def pool_size() -> int:
+    """
+    Размер пула соединений: HTTP_POOL_SIZE или самое большое число потоков,
+    которые делят клиентов из init_clients (run_daily, create_history, backfill).
+    """
+    return HTTP_POOL_SIZE or max(RUN_WORKERS, CREATE_HISTORY_WORKERS, BACKFILL_CONCURRENCY)
+
+
+def accept_encoding() -> str:
+    return "gzip, deflate" if HTTP_GZIP else "identity"
+
+
+def jira_timeout() -> Tuple[float, float]:
+    return (HTTP_CONNECT_TIMEOUT, JIRA_READ_TIMEOUT)
+
+
+def groq_timeout() -> httpx.Timeout:
+    return httpx.Timeout(GROQ_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def http_limits(size: Optional[int] = None) -> httpx.Limits:
+    size = size or pool_size()
+    return httpx.Limits(
+        max_connections=size,
+        max_keepalive_connections=size,
+        keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+    )
+
+
+class DeadlineHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter, который урезает таймаут чтения запроса до остатка срока
+    deadline_scope. jira передаёт timeout сам, поэтому срок применяется здесь.
+    """
+
+    def send(self, request, timeout=None, **kwargs):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = (connect, timeout_kwargs(read).get("timeout", read))
+        else:
+            timeout = timeout_kwargs(timeout).get("timeout", timeout)
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def configure_requests_session(session: requests.Session, size: Optional[int] = None):
+    """
+    Пул keep-alive соединений requests на size соединений к хосту. Без этого
+    urllib3 держит 10 соединений, а лишние потоки каждый раз открывают новые.
+    Таймаут каждого запроса не выходит за срок deadline_scope.
+    """
+    size = size or pool_size()
+    adapter = DeadlineHTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = accept_encoding()
+
+
+def requests_pool_stats(session: requests.Session) -> Tuple[int, int]:
+    """(запросов, открытых соединений) по пулам urllib3 всех адаптеров сессии."""
+    requests_made, connections = 0, 0
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        manager = getattr(adapter, "poolmanager", None)
+        if manager is None:
+            continue
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+    return requests_made, connections
+
+
+class ConnectionStats:
+    """
+    Счётчики повторного использования соединений httpx: запросы считаются
+    event hook'ом, новые TCP-соединения — trace-событиями httpcore.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+
+    async def _trace_async(self, event: str, info: dict):
+        self._trace(event, info)
+
+    def on_request(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def on_request_async(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace_async
+
+    def event_hooks(self, is_async: bool = False) -> dict:
+        return {"request": [self.on_request_async if is_async else self.on_request]}
+
+
+def log_connection_stats(name: str, requests_made: int, connections: int):
+    if not requests_made:
+        return
+    reused = max(requests_made - connections, 0)
+    logging.info(
+        f"{name} connections: {requests_made} requests over {connections} connections, "
+        f"{reused / requests_made:.0%} reused")
+
+
+def groq_http_client(stats: Optional[ConnectionStats] = None, size: Optional[int] = None) -> httpx.Client:
+    return httpx.Client(
+        limits=http_limits(size),
+        timeout=groq_timeout(),
+        headers={"Accept-Encoding": accept_encoding()},
+        event_hooks=stats.event_hooks() if stats else None,
+    )
+
+
+def async_http_client(
+    stats: Optional[ConnectionStats] = None, size: Optional[int] = None, **kwargs
+) -> httpx.AsyncClient:
+    """httpx.AsyncClient с пулом на size соединений; kwargs уходят в конструктор."""
+    kwargs.setdefault("timeout", groq_timeout())
+    kwargs["headers"] = {"Accept-Encoding": accept_encoding(), **kwargs.get("headers", {})}
+    return httpx.AsyncClient(
+        limits=http_limits(size),
+        event_hooks=stats.event_hooks(is_async=True) if stats else None,
+        **kwargs,
+    )
+
+
+# Общие счётчики процесса для клиентов на httpx
+groq_stats = ConnectionStats("Groq")
+jira_async_stats = ConnectionStats("Jira")
+
+
+def log_http_stats(jira=None):
+    """Пишет в лог долю переиспользованных соединений Jira (requests) и Groq."""
+    session = getattr(jira, "_session", None)
+    if isinstance(session, requests.Session):
+        log_connection_stats("Jira", *requests_pool_stats(session))
+    for stats in (jira_async_stats, groq_stats):
+        log_connection_stats(stats.name, stats.requests, stats.connections)
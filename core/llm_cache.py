@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+from typing import Optional
+
+from config import LLM_CACHE_MAX_BYTES, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS
+
+
+def cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Дисковый кеш ответов LLM, адресуемый по (модель, хеш промпта).
+    Записи живут ttl секунд; при превышении max_bytes вытесняются
+    давно не использованные (LRU).
+    """
+
+    def __init__(self, path: str, ttl: float = LLM_CACHE_TTL_SECONDS, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def set(self, model: str, prompt: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, model, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(model, prompt), model, value, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        self._conn.execute(
+            "DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl,))
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        logging.info(f"LLM cache evicted {len(evicted)} entries")
+
+    def log_stats(self):
+        """Пишет счётчики с прошлого вызова и обнуляет их: под планировщиком — за запуск."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            self.hits = self.misses = 0
+        logging.info(f"LLM cache: {hits} hits, {misses} misses")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Общий кеш процесса; None, если LLM_CACHE_PATH не задан."""
+    global _cache
+    if not LLM_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(LLM_CACHE_PATH)
+        return _cache
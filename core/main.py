@@ -1,105 +1,244 @@
 import pytz
 import logging
+import time
 
-from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 from jira import JIRA, Comment, Issue
 from apscheduler.schedulers.blocking import BlockingScheduler
 from groq import Groq
-import requests
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    retry_if_exception,
-)
 
 from config import (
+    BACKLOG_LOW_WATER,
+    BACKLOG_LOW_WATER_DEFAULT,
+    BACKLOG_REPLENISH_SIZE,
     DRY_RUN,
+    EPIC_BUDGET_SECONDS,
+    EPIC_PRIORITY,
     GROQ_API_KEY,
+    GROQ_COMPLETION_TOKENS_ESTIMATE,
     GROQ_MODEL,
+    GROQ_READ_TIMEOUT,
+    GROQ_STREAM,
     JIRA_PROJECT_KEY,
+    JIRA_SEARCH_PAGE_SIZE,
     JIRA_TOKEN,
     JIRA_URL,
     JIRA_USER,
+    PREGENERATE_DAYS,
+    PREGENERATE_HOUR,
+    PREGENERATE_MINUTE,
+    PREGENERATED_TASKS_PATH,
     PROJECT_SCHEDULE,
+    PROMPT_HISTORY_TOKEN_BUDGET,
+    RUN_CATCHUP_SECONDS,
+    RUN_DEADLINE_SECONDS,
+    RUN_WORKERS,
     SCHEDULER_DAYS,
     SCHEDULER_HOUR,
     SCHEDULER_MINUTE,
+    SCHEDULER_MISFIRE_GRACE_SECONDS,
     SCHEDULER_TIMEZONE,
     STATUS_BACKLOG,
     STATUS_IN_PROGRESS,
     TELEGRAM_CHAT_ID,
-    TELEGRAM_SEND_MESSAGE_URL,
+    TELEGRAM_FLUSH_TIMEOUT,
+    THEME_DUPLICATE_THRESHOLD,
+    THEME_MAX_REGENERATIONS,
+    TRANSITION_VERIFY,
     validate_config,
     JIRA_HISTORY_KEY,
+    HISTORY_SEGMENT_MAX_CHARS,
+    HISTORY_DB_PATH,
+)
+from history import (
+    HistorySnapshot,
+    format_topic_history_comment,
+    parse_history_comment,
+    plan_history_append,
+    seek_topic_history_comment,
+)
+from deadline import DeadlineExceeded, deadline_scope, timeout_kwargs
+from epic_cache import EpicCache
+from history_store import HistoryStore, HistorySync
+from http_pool import (
+    configure_requests_session,
+    groq_http_client,
+    groq_stats,
+    groq_timeout,
+    jira_timeout,
+    log_http_stats,
+)
+from llm_cache import get_llm_cache
+from notifier import get_outbox
+from rate_limit import GroqRateLimiter
+from retry_policy import DEFERRABLE_ERRORS, is_retryable, service_retry
+from task_store import PregeneratedTaskStore
+from themes import (
+    DuplicateThemeError,
+    ThemeIndex,
+    compact_topic_history,
+    estimate_tokens,
+    split_history,
 )
+from transitions import transition_resolver
+
+
+@dataclass
+class RunContext:
+    """Общее состояние одного ежедневного запуска, разделяемое между эпиками."""
+    # epic_key -> status name -> issues; None, если предзагрузка не выполнялась
+    epic_issues: Optional[Dict[str, Dict[str, List[Issue]]]] = None
+    # Снимок комментариев задачи истории, общий для всех эпиков запуска
+    history: Optional[HistorySnapshot] = None
+    # Локальное зеркало истории и его фоновая синхронизация с Jira
+    history_store: Optional[HistoryStore] = None
+    history_sync: Optional[HistorySync] = None
+    # Задачи, сгенерированные накануне вечером
+    task_store: Optional[PregeneratedTaskStore] = None
+    # Существующие эпики расписания; None, если проверка при старте не выполнялась
+    epics: Optional[Set[str]] = None
+    # Срок текущего прохода (time.monotonic); None — без ограничения
+    deadline: Optional[float] = None
 
 
 def init_clients() -> Tuple[JIRA, Groq]:
     validate_config()
-    jira = JIRA(server=JIRA_URL, basic_auth=(JIRA_USER, JIRA_TOKEN))
-    groq_client = Groq(api_key=GROQ_API_KEY)
+    # Повторы выполняет retry_policy; встроенные повторы клиентов отключены,
+    # чтобы паузы не складывались
+    jira = JIRA(
+        server=JIRA_URL, basic_auth=(JIRA_USER, JIRA_TOKEN), max_retries=0, timeout=jira_timeout())
+    # Потоки эпиков делят клиентов: пул соединений по их числу, keep-alive и таймауты
+    configure_requests_session(jira._session)
+    groq_client = Groq(
+        api_key=GROQ_API_KEY, max_retries=0, timeout=groq_timeout(),
+        http_client=groq_http_client(groq_stats))
     return jira, groq_client
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,
-)
-def jira_search_issues(jira: JIRA, jql: str, maxResults: int = 1000):
-    return jira.search_issues(jql, maxResults=maxResults)
+# Проекции полей задач: код читает только перечисленные поля
+EPIC_ISSUE_FIELDS = "summary,status,description,parent,issuetype"
+EPIC_FIELDS = "key"
+DONE_ISSUE_FIELDS = "summary,description,comment"
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,
-)
+def projection(fields: Optional[str] = None, expand: Optional[str] = None) -> dict:
+    kwargs = {}
+    if fields is not None:
+        kwargs["fields"] = fields
+    if expand is not None:
+        kwargs["expand"] = expand
+    return kwargs
+
+
+@service_retry("jira")
+def jira_search_issues(
+    jira: JIRA, jql: str, maxResults: int = 1000,
+    fields: Optional[str] = None, expand: Optional[str] = None, startAt: int = 0,
+    validate_query: bool = True,
+):
+    """
+    fields/expand — проекция ответа; без них Jira отдаёт все поля задачи.
+    validate_query=False — несуществующие ключи в JQL не считаются ошибкой.
+    """
+    kwargs = projection(fields, expand)
+    if startAt:
+        kwargs["startAt"] = startAt
+    if not validate_query:
+        kwargs["validate_query"] = False
+    return jira.search_issues(jql, maxResults=maxResults, **kwargs)
+
+
+class IssueSearch:
+    """
+    Ленивый постраничный поиск. Страницы по page_size задач запрашиваются
+    по мере итерации; как только вызывающий код перестал читать, запросы
+    прекращаются.
+    """
+
+    def __init__(
+        self,
+        jira: JIRA,
+        jql: str,
+        page_size: int = JIRA_SEARCH_PAGE_SIZE,
+        fields: Optional[str] = None,
+        expand: Optional[str] = None,
+    ):
+        self.jira = jira
+        self.jql = jql
+        self.page_size = page_size
+        self.fields = fields
+        self.expand = expand
+
+    def __iter__(self) -> Iterator[Issue]:
+        return self._pages(self.page_size)
+
+    def _pages(self, page_size: int) -> Iterator[Issue]:
+        start_at = 0
+        while True:
+            page = jira_search_issues(
+                self.jira, self.jql, maxResults=page_size,
+                fields=self.fields, expand=self.expand, startAt=start_at)
+            yield from page
+            start_at += len(page)
+            total = getattr(page, "total", None)
+            if not page or (total is not None and start_at >= total):
+                return
+            # Jira Cloud может отдать страницу короче maxResults, не дойдя до конца;
+            # короткой странице верим, только когда total неизвестен
+            if total is None and len(page) < page_size:
+                return
+
+    def take(self, limit: int) -> List[Issue]:
+        """Первые limit задач; страница не больше limit, лишнего не запрашиваем."""
+        return list(islice(self._pages(min(self.page_size, limit)), limit))
+
+    def first(self) -> Optional[Issue]:
+        issues = self.take(1)
+        return issues[0] if issues else None
+
+    def exists(self) -> bool:
+        page = jira_search_issues(self.jira, self.jql, maxResults=1, fields="key")
+        return len(page) > 0
+
+
+@service_retry("jira")
 def jira_create_issue(jira: JIRA, fields: dict):
     return jira.create_issue(fields=fields)
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,
-)
+@service_retry("jira")
+def jira_create_issues(jira: JIRA, field_list: List[dict]) -> List[dict]:
+    # prefetch=False — без отдельного GET на каждую созданную задачу
+    return jira.create_issues(field_list=field_list, prefetch=False)
+
+
+@service_retry("jira")
 def jira_transition_issue(jira: JIRA, issue: Issue, transition_id):
     return jira.transition_issue(issue, transition_id)
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,
-)
+@service_retry("jira")
+def jira_transitions(jira: JIRA, issue: Issue) -> List[dict]:
+    return jira.transitions(issue)
+
+
+@service_retry("jira")
 def jira_add_comment(jira: JIRA, issue_key: str, message: str):
     return jira.add_comment(issue_key, message)
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,
-)
-def jira_issue(jira: JIRA, issue_key: str):
-    return jira.issue(issue_key)
+@service_retry("jira")
+def jira_issue(
+    jira: JIRA, issue_key: str, fields: Optional[str] = None, expand: Optional[str] = None
+):
+    return jira.issue(issue_key, **projection(fields, expand))
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,
-)
+@service_retry("jira")
 def jira_update_issue(issue: Issue, issue_fields):
     return issue.update(fields=issue_fields)
 
@@ -108,12 +247,13 @@ def notify(issue_key: str, message: str):
     if DRY_RUN:
         logging.info(f"[DRY-RUN] Would send message to telegram")
         return
-    try:
-        payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message}
-        requests.post(TELEGRAM_SEND_MESSAGE_URL, data=payload)
-    except Exception as e:
-        logging.error(
-            f"Failed to send message to telegram for {issue_key}: {e}", exc_info=True)
+    outbox = get_outbox()
+    if outbox is None:
+        logging.warning(
+            f"Telegram is not configured, message for {issue_key} dropped")
+        return
+    # Доставка идёт в фоне, обработка эпика её не ждёт
+    outbox.send(TELEGRAM_CHAT_ID, message, context=issue_key)
 
 
 def notify_critical_error(message: str):
@@ -121,8 +261,9 @@ def notify_critical_error(message: str):
         logging.info(
             f"[DRY-RUN] Would send CRITICAL message to telegram: {message}")
         return
-    payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message}
-    requests.post(TELEGRAM_SEND_MESSAGE_URL, data=payload)
+    outbox = get_outbox()
+    if outbox is not None:
+        outbox.send(TELEGRAM_CHAT_ID, message, context="critical")
     logging.error(f"CRITICAL: {message}")
 
 
@@ -130,42 +271,132 @@ def is_groq_notfound_error(e):
     return hasattr(e, "__class__") and e.__class__.__name__ == "NotFoundError"
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=2, max=30),
-    retry=(
-        retry_if_exception_type(Exception) &
-        retry_if_exception(lambda e: is_groq_notfound_error(e)
-                           or isinstance(e, Exception))
-    ),
-    reraise=True,
-)
-def call_groq_generate_content(groq_client: Groq, prompt: str) -> str:
+@service_retry("groq")
+def call_groq_generate_content(
+    groq_client: Groq,
+    prompt: str,
+    use_cache: bool = True,
+    heading_check: Optional[Callable[[str], bool]] = None,
+    limiter: Optional[GroqRateLimiter] = None,
+) -> str:
+    """
+    use_cache=False — для генераций, где нужен свежий ответ (новая задача),
+    а не повтор прошлого ответа на тот же промпт.
+    heading_check — при GROQ_STREAM ответ читается потоком, и если проверка
+    заголовка вернула True, генерация обрывается: возвращается только заголовок.
+    limiter — запрос ждёт разрешения лимитера, а лимитер подстраивается
+    под заголовки x-ratelimit-* ответа.
+    """
     if DRY_RUN:
         logging.info(f"[DRY-RUN] Would call Groq API with prompt: {prompt}")
         return "# DRY-RUN\nОписание задачи (DRY-RUN)"
+    cache = get_llm_cache() if use_cache else None
+    if cache:
+        cached = cache.get(GROQ_MODEL, prompt)
+        if cached is not None:
+            logging.info("Groq response served from LLM cache")
+            return cached
+    if heading_check and GROQ_STREAM:
+        content, aborted = stream_groq_generate_content(
+            groq_client, prompt, heading_check)
+        if cache and not aborted:
+            cache.set(GROQ_MODEL, prompt, content)
+        return content
+    messages = [
+        {
+            "role": "user",
+            "content": prompt,
+        }
+    ]
     try:
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                }
-            ],
-            model=GROQ_MODEL,
-        )
-        return chat_completion.choices[0].message.content
+        if limiter:
+            limiter.acquire(estimate_tokens(prompt) + GROQ_COMPLETION_TOKENS_ESTIMATE)
+            raw_response = groq_client.chat.completions.with_raw_response.create(
+                messages=messages, model=GROQ_MODEL, **timeout_kwargs(GROQ_READ_TIMEOUT))
+            limiter.update_from_headers(raw_response.headers)
+            chat_completion = raw_response.parse()
+        else:
+            chat_completion = groq_client.chat.completions.create(
+                messages=messages, model=GROQ_MODEL, **timeout_kwargs(GROQ_READ_TIMEOUT))
+        content = chat_completion.choices[0].message.content
+        usage = getattr(chat_completion, "usage", None)
+        if usage is not None:
+            logging.info(
+                f"Groq usage: {usage.prompt_tokens} prompt tokens, "
+                f"{usage.completion_tokens} completion tokens")
+        if cache:
+            cache.set(GROQ_MODEL, prompt, content)
+        return content
     except Exception as e:
+        # 429 и прочие ошибки Groq тоже несут заголовки лимитов и retry-after
+        response = getattr(e, "response", None)
+        if limiter and response is not None:
+            limiter.update_from_headers(response.headers)
         # Специальная обработка NotFoundError от groq
         if is_groq_notfound_error(e):
             logging.error(f"Groq API NotFoundError: {e}", exc_info=True)
-            # Пробрасываем исключение, чтобы tenacity сделал retry
-            raise
+        # 404 не повторяется: вызывающий код подставляет заглушку задачи
         raise
 
 
-def generate_new_task(groq_client: Groq, topic_history: str, topic: str) -> dict:
-    prompt = (
+def parse_heading(line: str) -> str:
+    return line.lstrip("# ").strip()
+
+
+def stream_groq_generate_content(
+    groq_client: Groq, prompt: str, heading_check: Callable[[str], bool]
+) -> Tuple[str, bool]:
+    """
+    Читает ответ Groq потоком. Как только пришла первая строка, заголовок
+    отдаётся в heading_check; если она вернула True, поток закрывается.
+    Возвращает (текст, оборван ли поток).
+    """
+    stream = groq_client.chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=GROQ_MODEL,
+        stream=True,
+        **timeout_kwargs(GROQ_READ_TIMEOUT),
+    )
+    parts: List[str] = []
+    heading_checked = False
+    try:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            if heading_checked or "\n" not in delta:
+                continue
+            heading_checked = True
+            heading = "".join(parts).split("\n", 1)[0]
+            if heading_check(parse_heading(heading)):
+                logging.info(
+                    f"Groq stream aborted after heading '{parse_heading(heading)}'")
+                return heading, True
+    finally:
+        stream.close()
+    return "".join(parts), False
+
+
+GROQ_NOT_FOUND_TASK = {
+    "summary": "Ошибка Groq API",
+    "description": "# Ошибка Groq API: модель не найдена или недоступна.\nПожалуйста, проверьте настройки модели или обратитесь к администратору.",
+}
+
+
+def rejected_themes_note(rejected: Iterable[str]) -> str:
+    rejected = list(rejected)
+    if not rejected:
+        return ""
+    themes = "; ".join(rejected)
+    return f"Не предлагай эти темы, они повторяют пройденные: {themes}. "
+
+
+def build_new_task_prompt(topic_history: str, topic: str, rejected: Iterable[str] = ()) -> str:
+    """История ужимается под PROMPT_HISTORY_TOKEN_BUDGET, чтобы промпт не рос с каждой темой."""
+    topic_history = compact_topic_history(
+        topic_history, PROMPT_HISTORY_TOKEN_BUDGET)
+    return (
         f"Твоя задача выбрать одну конкретную тему из топика '{topic}', "
         "но которая не пересекается со списком уже пройденных тем. "
         "После этого сгенерируй обучающий материал на выбранную ранее тему. "
@@ -183,25 +414,30 @@ def generate_new_task(groq_client: Groq, topic_history: str, topic: str) -> dict
         "Чтобы я мог достатать заголово таким кодом "
         "summary = content.splitlines()[0].lstrip('# ').strip(). \n"
         f"У меня уже были темы: {topic_history}. "
-    )
-    try:
-        content = call_groq_generate_content(groq_client, prompt)
-        summary = content.splitlines()[0].lstrip("# ").strip()
-        return {"summary": summary, "description": content}
-    except Exception as e:
-        # Если это NotFoundError, возвращаем заглушку, чтобы не падал процесс
-        if hasattr(e, "__class__") and e.__class__.__name__ == "NotFoundError":
-            summary = "Ошибка Groq API"
-            description = "# Ошибка Groq API: модель не найдена или недоступна.\nПожалуйста, проверьте настройки модели или обратитесь к администратору."
-            logging.error(
-                f"Groq NotFoundError in generate_new_task: {e}", exc_info=True)
-            return {"summary": summary, "description": description}
-        logging.error(f"Groq API error after retries: {e}", exc_info=True)
-        raise
+    ) + rejected_themes_note(rejected)
 
 
-def generate_description_for_existing_task(groq_client: Groq, topic: str, theme: str) -> dict:
+def build_themes_prompt(
+    topic_history: str, topic: str, count: int, queued: Iterable[str] = ()
+) -> str:
+    topic_history = compact_topic_history(
+        topic_history, PROMPT_HISTORY_TOKEN_BUDGET)
+    queued = list(queued)
     prompt = (
+        f"Выбери {count} разных конкретных тем из топика '{topic}', "
+        "которые не пересекаются со списком уже пройденных тем и между собой. "
+        "Мне нужно это для подготовки к собеседованию для разработчика. "
+        "Ответь только списком тем без описаний и нумерации: "
+        "каждая тема на отдельной строке в формате '# Тема'. \n"
+        f"У меня уже были темы: {topic_history}. "
+    )
+    if queued:
+        prompt += f"Эти темы уже запланированы: {'; '.join(queued)}. "
+    return prompt
+
+
+def build_description_prompt(topic: str, theme: str) -> str:
+    return (
         f"Сгенерируй обучающий материал по разделу '{topic}' на тему '{theme}'. "
         "Мне нужно это для подготовки к собеседованию. "
         "Сделай это в формате подходящим для описания задачи в "
@@ -217,92 +453,173 @@ def generate_description_for_existing_task(groq_client: Groq, topic: str, theme:
         "Чтобы я мог достатать заголово таким кодом "
         "summary = content.splitlines()[0].lstrip('# ').strip()"
     )
+
+
+def parse_generated_task(content: str) -> dict:
+    summary = parse_heading(content.splitlines()[0])
+    return {"summary": summary, "description": content}
+
+
+def parse_generated_themes(content: str) -> List[str]:
+    return [
+        parse_heading(line) for line in content.splitlines()
+        if line.strip().startswith("#") and parse_heading(line)
+    ]
+
+
+def generate_new_themes(
+    groq_client: Groq, topic_history: str, topic: str, count: int, queued: Iterable[str] = ()
+) -> List[str]:
+    """
+    Одним запросом получает count новых тем. Повторы пройденных и уже
+    запланированных тем, а также друг друга, отсекаются локальным индексом.
+    """
+    queued = list(queued)
+    prompt = build_themes_prompt(topic_history, topic, count, queued)
+    logging.info(
+        f"Themes prompt for '{topic}': ~{estimate_tokens(prompt)} tokens, {count} themes requested")
+    content = call_groq_generate_content(groq_client, prompt, use_cache=False)
+    return select_new_themes(content, topic_history, topic, count, queued)
+
+
+def select_new_themes(
+    content: str, topic_history: str, topic: str, count: int, queued: Iterable[str] = ()
+) -> List[str]:
+    """Темы из ответа Groq без повторов пройденных, запланированных и друг друга."""
+    queued = list(queued)
+    index = ThemeIndex(
+        split_history(topic_history) + queued, THEME_DUPLICATE_THRESHOLD)
+    themes: List[str] = []
+    for theme in parse_generated_themes(content):
+        duplicate = index.find_duplicate(theme)
+        if duplicate is not None:
+            logging.warning(
+                f"Generated theme '{theme}' for '{topic}' repeats '{duplicate}', skipped")
+            continue
+        index.add(theme)
+        themes.append(theme)
+    return themes[:count]
+
+
+def generate_new_task(groq_client: Groq, topic_history: str, topic: str) -> dict:
+    """
+    Сгенерированная тема сверяется с локальным индексом пройденных тем;
+    при повторе задача перегенерируется не больше THEME_MAX_REGENERATIONS раз.
+    """
+    index = ThemeIndex(split_history(topic_history), THEME_DUPLICATE_THRESHOLD)
+    rejected: List[str] = []
+    for _ in range(THEME_MAX_REGENERATIONS + 1):
+        prompt = build_new_task_prompt(topic_history, topic, rejected)
+        logging.info(
+            f"New task prompt for '{topic}': ~{estimate_tokens(prompt)} tokens, "
+            f"{len(index)} themes in history")
+        try:
+            content = call_groq_generate_content(
+                groq_client, prompt, use_cache=False,
+                heading_check=lambda summary: index.find_duplicate(summary) is not None)
+            task = parse_generated_task(content)
+        except Exception as e:
+            # Если это NotFoundError, возвращаем заглушку, чтобы не падал процесс
+            if is_groq_notfound_error(e):
+                logging.error(
+                    f"Groq NotFoundError in generate_new_task: {e}", exc_info=True)
+                return dict(GROQ_NOT_FOUND_TASK)
+            logging.error(f"Groq API error after retries: {e}", exc_info=True)
+            raise
+        duplicate = index.find_duplicate(task["summary"])
+        if duplicate is None:
+            return task
+        logging.warning(
+            f"Generated theme '{task['summary']}' for '{topic}' repeats '{duplicate}', regenerating")
+        rejected.append(task["summary"])
+    raise DuplicateThemeError(
+        f"Groq kept repeating covered themes for '{topic}': {'; '.join(rejected)}")
+
+
+def generate_description_for_existing_task(groq_client: Groq, topic: str, theme: str) -> dict:
+    prompt = build_description_prompt(topic, theme)
     try:
         content = call_groq_generate_content(groq_client, prompt)
-        summary = content.splitlines()[0].lstrip("# ").strip()
-        return {"summary": summary, "description": content}
+        return parse_generated_task(content)
     except Exception as e:
-        if hasattr(e, "__class__") and e.__class__.__name__ == "NotFoundError":
-            summary = "Ошибка Groq API"
-            description = "# Ошибка Groq API: модель не найдена или недоступна.\nПожалуйста, проверьте настройки модели или обратитесь к администратору."
+        if is_groq_notfound_error(e):
             logging.error(
                 f"Groq NotFoundError in generate_description_for_existing_task: {e}", exc_info=True)
-            return {"summary": summary, "description": description}
+            return dict(GROQ_NOT_FOUND_TASK)
         logging.error(f"Groq API error after retries: {e}", exc_info=True)
         raise
 
 
-def seek_topic_history_comment(
-    comments: List[Comment], epic_key: str
+def create_topic_history_comment(
+    jira: JIRA, epic_key: str, topic: str, part: int = 1, themes: List[str] = ()
 ) -> Optional[Comment]:
-    for comment in comments:
-        lines = comment.body.splitlines()
-        for line in lines:
-            if "Ключ топика" in line:
-                if epic_key in line:
-                    return comment
-                break
-
-
-def create_topic_history_comment(jira: JIRA, epic_key: str, topic: str):
-    comment_body = f"Топик: {topic}\nКлюч топика: {epic_key}\n\nИстория топика:"
+    comment_body = format_topic_history_comment(topic, epic_key, part, themes)
     if DRY_RUN:
         logging.info(
             f"[DRY-RUN] Would create comment in issue {JIRA_HISTORY_KEY} with body'{comment_body}'"
         )
         return
-    jira_add_comment(jira, JIRA_HISTORY_KEY, comment_body)
+    return jira_add_comment(jira, JIRA_HISTORY_KEY, comment_body)
 
 
-def update_topic_history(jira: JIRA, epic_key: str, new_theme: str):
-    history_issue = jira.issue(JIRA_HISTORY_KEY)
-    history_comments = history_issue.fields.comment.comments
-    topic_history_comment: Optional[Comment] = seek_topic_history_comment(
-        history_comments, epic_key)
-    if topic_history_comment:
-        comment_body = topic_history_comment.body + f"\n{new_theme}"
-        if DRY_RUN:
-            logging.info(
-                f"[DRY-RUN] Would update comment in issue {JIRA_HISTORY_KEY} to '{comment_body}'"
-            )
-            return
-        topic_history_comment.update(body=comment_body)
-    else:
+def update_topic_history(
+    jira: JIRA,
+    epic_key: str,
+    new_theme: str,
+    snapshot: Optional[HistorySnapshot] = None,
+    on_written: Optional[Callable[[int], None]] = None,
+) -> bool:
+    """
+    Дописывает темы в последний сегмент истории эпика. Когда сегмент
+    достигает HISTORY_SEGMENT_MAX_CHARS, создаётся следующий комментарий-сегмент,
+    так что каждая запись затрагивает только один небольшой комментарий.
+    После каждой записи в Jira on_written получает число записанных тем.
+    Возвращает False, если комментарий истории эпика не найден.
+    """
+    snapshot = snapshot or HistorySnapshot.load(jira)
+    plan = plan_history_append(
+        snapshot, epic_key, new_theme, HISTORY_SEGMENT_MAX_CHARS)
+    if plan is None:
         logging.warning(
             f"No topic comment found for epic {epic_key} after supposed creation.")
         # Не пытаемся обращаться к .body
+        return False
 
+    if plan.body is not None:
+        if DRY_RUN:
+            logging.info(
+                f"[DRY-RUN] Would update comment in issue {JIRA_HISTORY_KEY} to '{plan.body}'"
+            )
+        else:
+            plan.comment.update(body=plan.body)
+            snapshot.apply_update(plan.comment, plan.body)
+            if on_written:
+                on_written(plan.appended)
 
-def parse_history_comment(topic_comment: str) -> str:
-    """
-    Извлекает список тем из секции "История топика:" в переданном тексте.
-    Если секция не найдена, возвращает пустую строку.
-    """
-    lines = topic_comment.splitlines()
-    result_lines = []
-    recording = False
-
-    for line in lines:
-        stripped = line.strip()
-        if recording:
-            if stripped:
-                result_lines.append(stripped)
-        elif stripped.startswith("История топика"):
-            # Как только встречаем метку, включаем сбор последующих строк
-            recording = True
-
-    return "\n".join(result_lines)
+    for part, themes in plan.iter_new_segments():
+        logging.info(
+            f"Starting history segment {part} for epic {epic_key}")
+        created = create_topic_history_comment(
+            jira, epic_key, plan.topic, part=part, themes=themes)
+        if created is not None:
+            snapshot.add(created)
+            if on_written:
+                on_written(len(themes))
+    return True
 
 
-def get_topic_history(jira: JIRA, epic_key: str, topic: str) -> str:
+def get_topic_history(
+    jira: JIRA, epic_key: str, topic: str, snapshot: Optional[HistorySnapshot] = None
+) -> str:
     try:
-        history_issue = jira.issue(JIRA_HISTORY_KEY)
-        history_comments = history_issue.fields.comment.comments
-        topic_comment = seek_topic_history_comment(history_comments, epic_key)
+        snapshot = snapshot or HistorySnapshot.load(jira)
+        topic_comment = snapshot.find(epic_key)
         if not topic_comment:
-            create_topic_history_comment(jira, epic_key, topic)
+            created = create_topic_history_comment(jira, epic_key, topic)
+            if created is not None:
+                snapshot.add(created)
             return ""
-        passed_themes: str = parse_history_comment(topic_comment.body)
+        passed_themes: str = "\n".join(snapshot.iter_themes(epic_key))
         return passed_themes
     except Exception as e:
         logging.error(
@@ -310,84 +627,390 @@ def get_topic_history(jira: JIRA, epic_key: str, topic: str) -> str:
         return ""
 
 
-def transition_issue_to_status(jira: JIRA, issue: Issue, status_name: str):
+def read_topic_history(
+    jira: JIRA, epic_key: str, topic: str, run: Optional[RunContext] = None
+) -> str:
+    """
+    Возвращает историю эпика. При включённом локальном зеркале читает её из
+    SQLite, обращаясь к Jira только для эпиков, которых в зеркале ещё нет.
+    """
+    store = run.history_store if run else None
+    if store and store.has_epic(epic_key):
+        return store.get_history(epic_key)
+    snapshot = run.history if run else None
+    if run and run.history_sync:
+        snapshot = run.history_sync.wait_ready()
+    history = get_topic_history(jira, epic_key, topic, snapshot=snapshot)
+    if store and snapshot is not None and snapshot.find(epic_key):
+        store.pull(epic_key, list(snapshot.iter_themes(epic_key)))
+    return history
+
+
+def record_topic_theme(
+    jira: JIRA, epic_key: str, theme: str, run: Optional[RunContext] = None
+):
+    """Фиксирует пройденную тему: в локальном зеркале или сразу в Jira."""
+    if run and run.history_store and run.history_sync:
+        if DRY_RUN:
+            logging.info(
+                f"[DRY-RUN] Would record theme '{theme}' for epic {epic_key}")
+            return
+        run.history_store.add_theme(epic_key, theme)
+        run.history_sync.schedule()
+        return
+    update_topic_history(jira, epic_key, theme,
+                         snapshot=run.history if run else None)
+
+
+def transition_issue_to_status(
+    jira: JIRA, issue: Issue, status_name: str, verify: bool = TRANSITION_VERIFY
+) -> bool:
+    """
+    Переводит задачу в статус; переход берётся из кеша transition_resolver.
+    Успешный POST перехода уже означает смену статуса, поэтому статус
+    перечитывается только при verify=True. Возвращает, удался ли переход.
+    """
     if DRY_RUN:
         logging.info(
             f"[DRY-RUN] Would transition issue {issue.key} to '{status_name}'")
-        return
+        return True
     try:
-        transitions = jira.transitions(issue)
-        transition_id = next(t["id"]
-                             for t in transitions if t["name"] == status_name)
-        jira_transition_issue(jira, issue, transition_id)
+        key = transition_resolver.key(jira.server_url, issue, status_name)
+        transition = transition_resolver.get(key)
+        if transition is not None:
+            try:
+                jira_transition_issue(jira, issue, transition["id"])
+                transition_done = True
+            except Exception as e:
+                if isinstance(e, DEFERRABLE_ERRORS) or is_retryable(e):
+                    # Jira недоступна, а не переход устарел: повторы уже исчерпаны
+                    raise
+                # Workflow мог поменяться: переспросим переходы у Jira
+                logging.warning(
+                    f"Cached transition to '{status_name}' failed for {issue.key}: {e}")
+                transition_resolver.invalidate(key)
+                transition_done = False
+        else:
+            transition_done = False
+        if not transition_done:
+            transition = transition_resolver.store(
+                key, jira_transitions(jira, issue), status_name)
+            if transition is None:
+                logging.error(
+                    f"No transition found for status '{status_name}' on issue {issue.key}")
+                return False
+            jira_transition_issue(jira, issue, transition["id"])
         logging.info(f"Issue {issue.key} transitioned to '{status_name}'")
-    except StopIteration:
-        logging.error(
-            f"No transition found for status '{status_name}' on issue {issue.key}",
-            exc_info=True,
-        )
+        if verify:
+            updated_issue = jira_issue(jira, issue.key, fields="status")
+            return getattr(updated_issue.fields.status, "name", None) == status_name
+        return True
+    except DEFERRABLE_ERRORS:
+        raise
     except Exception as e:
         logging.error(
             f"Failed to transition issue {issue.key}: {e}", exc_info=True)
+        return False
+
+
+def validate_epics(jira: JIRA, epic_keys: Iterable[str], cache: Optional[EpicCache] = None) -> Set[str]:
+    """
+    Проверяет эпики одним запросом key in (...) и возвращает существующие.
+    Эпики, проверенные в пределах TTL кеша, в запрос не попадают.
+    """
+    epic_keys = list(dict.fromkeys(epic_keys))
+    cache = cache or EpicCache()
+    stale = cache.stale(epic_keys)
+    if stale:
+        found = {
+            issue.key for issue in jira_search_issues(
+                jira, f"key in ({', '.join(stale)})", maxResults=len(stale),
+                fields=EPIC_FIELDS, validate_query=False)
+        }
+        missing = [key for key in stale if key not in found]
+        cache.update(found, missing)
+        logging.info(
+            f"Validated {len(stale)} epics in one query, "
+            f"{len(epic_keys) - len(stale)} served from cache")
+    return {key for key in epic_keys if cache.fresh(key)}
 
 
-def epic_exists(jira: JIRA, epic_key: str) -> bool:
+def epic_exists(jira: JIRA, epic_key: str, run: Optional[RunContext] = None) -> bool:
     """Проверяет, существует ли эпик и доступен ли он."""
+    if run is not None and run.epics is not None:
+        if epic_key in run.epics:
+            return True
+        logging.error(f"Epic {epic_key} not found or inaccessible")
+        return False
     try:
-        epic = jira_issue(jira, epic_key)
+        epic = jira_issue(jira, epic_key, fields=EPIC_FIELDS)
         # Можно добавить дополнительные проверки, например, статус эпика
         return True
+    except DEFERRABLE_ERRORS:
+        raise
     except Exception as e:
         logging.error(
             f"Epic {epic_key} not found or inaccessible: {e}", exc_info=True)
         return False
 
 
+def epic_issues_jql(epic_keys: List[str]) -> str:
+    return (
+        f"project = {JIRA_PROJECT_KEY} "
+        f'AND status in ("{STATUS_IN_PROGRESS}", "{STATUS_BACKLOG}") '
+        f"AND parent in ({', '.join(epic_keys)}) "
+        "ORDER BY key ASC"
+    )
+
+
+def group_epic_issues(
+    epic_keys: List[str], issues: Iterable[Issue]
+) -> Dict[str, Dict[str, List[Issue]]]:
+    result: Dict[str, Dict[str, List[Issue]]] = {
+        epic_key: {STATUS_IN_PROGRESS: [], STATUS_BACKLOG: []} for epic_key in epic_keys
+    }
+    for issue in issues:
+        parent = getattr(issue.fields, "parent", None)
+        status = getattr(issue.fields.status, "name", None)
+        by_status = result.get(getattr(parent, "key", None))
+        if by_status is not None and status in by_status:
+            by_status[status].append(issue)
+    return result
+
+
+def prefetch_epic_issues(
+    jira: JIRA, epic_keys: Iterable[str]
+) -> Dict[str, Dict[str, List[Issue]]]:
+    """
+    Одним JQL-запросом загружает задачи "In Progress" и "Backlog" для всех
+    переданных эпиков и раскладывает их по эпику и статусу.
+    """
+    epic_keys = list(dict.fromkeys(epic_keys))
+    if not epic_keys:
+        return {}
+    # maxResults=False — jira сама пройдёт по всем страницам
+    issues = jira_search_issues(
+        jira, epic_issues_jql(epic_keys), maxResults=False, fields=EPIC_ISSUE_FIELDS)
+    return group_epic_issues(epic_keys, issues)
+
+
+def find_epic_issues(
+    jira: JIRA,
+    epic_key: str,
+    status: str,
+    run: Optional[RunContext] = None,
+    limit: Optional[int] = None,
+) -> List[Issue]:
+    """
+    Возвращает задачи эпика в статусе: из снимка запуска или поиском в Jira.
+    limit — сколько задач нужно вызывающему коду; больше не запрашивается.
+    """
+    if run and run.epic_issues is not None and epic_key in run.epic_issues:
+        issues = run.epic_issues[epic_key].get(status, [])
+        return issues[:limit] if limit else issues
+    search = IssueSearch(jira, epic_status_jql(epic_key, status), fields=EPIC_ISSUE_FIELDS)
+    return search.take(limit) if limit else list(search)
+
+
+def epic_status_jql(epic_key: str, status: str) -> str:
+    jql = (
+        f"project = {JIRA_PROJECT_KEY} "
+        f'AND status = "{status}" '
+        f"AND parent = {epic_key}"
+    )
+    if status == STATUS_BACKLOG:
+        jql += " ORDER BY key ASC"
+    return jql
+
+
+def issue_url(issue_key: str) -> str:
+    return f"{JIRA_URL}/browse/{issue_key}"
+
+
+def already_in_progress_message(topic: str, issue: Issue) -> str:
+    return (
+        f"У тебя уже есть задача в топике '{topic}' на тему '{issue.fields.summary}' в статусе 'В работе'! "
+        f"Ссылка на задачу: {issue_url(issue.key)}. "
+        "Продолжай учиться — ты на верном пути 🚀 Если возникнут вопросы, "
+        "не стесняйся их записывать прямо в задаче. Вперёд к новым знаниям и успехам! 💡"
+    )
+
+
+def moved_to_in_progress_message(topic: str, issue: Issue) -> str:
+    return (
+        f"Задача в топике '{topic}' на тему '{issue.fields.summary}' переведена в статус 'В работе'. "
+        f"Ссылка на задачу: {issue_url(issue.key)}. "
+        "Отличная возможность продолжить обучение! Удачи и приятного изучения 🚀"
+    )
+
+
+def new_task_message(topic: str, issue: Issue) -> str:
+    return (
+        f"Создана и переведена в рабочий статус новая задача "
+        f"в топике {topic} на тему {issue.fields.summary}. "
+        f"Ссылка на задачу: {issue_url(issue.key)}"
+    )
+
+
+def new_issue_fields(epic_key: str, task: dict) -> dict:
+    return {
+        "project": {"key": epic_key.split("-")[0]},
+        "parent": {"key": epic_key},
+        "summary": task["summary"],
+        "description": task["description"],
+        "issuetype": {"name": "Task"},
+    }
+
+
+def backlog_issue_fields(epic_key: str, theme: str) -> dict:
+    return {
+        "project": {"key": epic_key.split("-")[0]},
+        "parent": {"key": epic_key},
+        "summary": theme,
+        "issuetype": {"name": "Task"},
+    }
+
+
+def backlog_low_water(epic_key: str) -> int:
+    return BACKLOG_LOW_WATER.get(epic_key, BACKLOG_LOW_WATER_DEFAULT)
+
+
+def backlog_search_limit(epic_key: str) -> int:
+    """Для пополнения бэклога нужно знать, дотягивает ли он до нижней отметки."""
+    return backlog_low_water(epic_key) if BACKLOG_REPLENISH_SIZE else 1
+
+
+def needs_replenishment(epic_key: str, backlog_issues: List[Issue]) -> bool:
+    return bool(BACKLOG_REPLENISH_SIZE) and len(backlog_issues) < backlog_low_water(epic_key)
+
+
+def bulk_created_issue(issue: Issue, fields: dict) -> Issue:
+    """
+    Задачи из bulk create приходят без полей; дополняем их полями из запроса
+    создания (в том числе issuetype для кеша переходов), чтобы не запрашивать
+    каждую задачу повторно.
+    """
+    raw = dict(issue.raw)
+    raw["fields"] = {
+        **fields,
+        "description": None,
+        "status": {"name": STATUS_BACKLOG},
+    }
+    return Issue(issue._options, issue._session, raw=raw)
+
+
+def replenish_backlog(
+    jira: JIRA,
+    groq_client: Groq,
+    epic_key: str,
+    topic: str,
+    history: str,
+    backlog_issues: List[Issue],
+) -> List[Issue]:
+    """
+    Генерирует BACKLOG_REPLENISH_SIZE тем одним запросом и создаёт задачи
+    бэклога одним bulk-запросом. Описания дописываются позже.
+    """
+    queued = [issue.fields.summary for issue in backlog_issues]
+    themes = generate_new_themes(
+        groq_client, history, topic, BACKLOG_REPLENISH_SIZE, queued)
+    if not themes:
+        return []
+    if DRY_RUN:
+        logging.info(
+            f"[DRY-RUN] Would create {len(themes)} backlog issues in epic '{epic_key}': {themes}")
+        return []
+    field_list = [backlog_issue_fields(epic_key, theme) for theme in themes]
+    results = jira_create_issues(jira, field_list)
+    return created_backlog_issues(epic_key, field_list, results)
+
+
+def created_backlog_issues(
+    epic_key: str, field_list: List[dict], results: List[dict]
+) -> List[Issue]:
+    """Разбирает ответ bulk create: ошибки логируются, созданные задачи дополняются полями."""
+    created = []
+    for fields, result in zip(field_list, results):
+        if result["status"] != "Success":
+            logging.error(
+                f"Failed to create backlog issue '{fields['summary']}' in epic {epic_key}: "
+                f"{result['error']}")
+            continue
+        created.append(bulk_created_issue(result["issue"], fields))
+    logging.info(
+        f"Replenished backlog of {epic_key} with {len(created)} issues")
+    return created
+
+
+def take_pregenerated_task(
+    run: Optional[RunContext], epic_key: str, topic: str, history: str
+) -> Optional[Tuple[int, dict]]:
+    """
+    Находит задачу, сгенерированную накануне, и возвращает её id и задачу.
+    Задачи, тема которых с тех пор попала в историю, отбрасываются. Найденная
+    задача остаётся в хранилище, пока не будет создана в Jira.
+    """
+    store = run.task_store if run else None
+    if store is None or DRY_RUN:
+        return None
+    index = ThemeIndex(split_history(history), THEME_DUPLICATE_THRESHOLD)
+    while True:
+        found = store.peek(epic_key, topic)
+        if found is None:
+            return None
+        task_id, task = found
+        duplicate = index.find_duplicate(task["summary"])
+        if duplicate is None:
+            logging.info(
+                f"Using pre-generated task '{task['summary']}' for epic {epic_key}")
+            return found
+        store.delete(task_id)
+        logging.warning(
+            f"Dropped pre-generated task '{task['summary']}' for epic {epic_key}: "
+            f"repeats '{duplicate}'")
+
+
 def process_project(
-    jira: JIRA, groq_client: Groq, epic_key: str, topic: str, history: str
+    jira: JIRA,
+    groq_client: Groq,
+    epic_key: str,
+    topic: str,
+    history: str,
+    run: Optional[RunContext] = None,
 ):
     try:
-        if not epic_exists(jira, epic_key):
+        if not epic_exists(jira, epic_key, run):
             msg = f"Skipping topic '{topic}' because epic '{epic_key}' does not exist or is inaccessible."
             logging.error(msg)
             notify_critical_error(msg)
             return
 
         # Check "In Progress" tasks in the epic
-        jql_ip = (
-            f"project = {JIRA_PROJECT_KEY} "
-            f'AND status = "{STATUS_IN_PROGRESS}" '
-            f"AND parent = {epic_key}"
-        )
-        in_progress_issues = jira_search_issues(jira, jql_ip)
+        in_progress_issues = find_epic_issues(
+            jira, epic_key, STATUS_IN_PROGRESS, run, limit=1)
         if in_progress_issues:
-            key = in_progress_issues[0].key
+            issue = in_progress_issues[0]
             # TODO сделать так, чтобы gpt подсказывала как пройти этот тикет
-            notify(
-                key,
-                (
-                    f"У тебя уже есть задача в топике '{topic}' на тему '{in_progress_issues[0].fields.summary}' в статусе 'В работе'! "
-                    f"Ссылка на задачу: {JIRA_URL + '/browse/' + key}. "
-                    "Продолжай учиться — ты на верном пути 🚀 Если возникнут вопросы, "
-                    "не стесняйся их записывать прямо в задаче. Вперёд к новым знаниям и успехам! 💡"
-                ),
-            )
+            notify(issue.key, already_in_progress_message(topic, issue))
             return
 
         # Move backlog task to In Progress
-        jql_bl = (
-            f"project = {JIRA_PROJECT_KEY} "
-            f'AND status = "{STATUS_BACKLOG}" '
-            f"AND parent = {epic_key} "
-            "ORDER BY key ASC"
-        )
-        backlog_issues = jira_search_issues(jira, jql_bl)
+        backlog_issues = find_epic_issues(
+            jira, epic_key, STATUS_BACKLOG, run, limit=backlog_search_limit(epic_key))
+        if needs_replenishment(epic_key, backlog_issues):
+            try:
+                backlog_issues = backlog_issues + replenish_backlog(
+                    jira, groq_client, epic_key, topic, history, backlog_issues)
+            except Exception as e:
+                # Не вышло пополнить — ниже сработает обычное создание одной задачи
+                logging.error(
+                    f"Failed to replenish backlog of {epic_key}: {e}", exc_info=True)
         if backlog_issues:
             issue = backlog_issues[0]
             if DRY_RUN:
                 logging.info(
                     "[DRY-RUN] Would update issue status in epic "
-                    f"'{epic_key}' with summary '{task['summary']}' "
+                    f"'{epic_key}' with summary '{issue.fields.summary}' "
                     f"from '{issue.fields.status}' to '{STATUS_IN_PROGRESS}'"
                 )
             else:
@@ -398,45 +1021,36 @@ def process_project(
                 if DRY_RUN:
                     logging.info(
                         "[DRY-RUN] Would update issue description in epic "
-                        f"'{epic_key}' with summary '{task['summary']}' to "
+                        f"'{epic_key}' with summary '{issue.fields.summary}' to "
                         f"{existed_task['description']}"
                     )
                 else:
                     jira_update_issue(
                         issue, {'description': existed_task['description']})
-            notify(
-                issue.key,
-                (
-                    f"Задача в топике '{topic}' на тему '{issue.fields.summary}' переведена в статус 'В работе'. "
-                    f"Ссылка на задачу: {JIRA_URL + '/browse/' + issue.key}. "
-                    "Отличная возможность продолжить обучение! Удачи и приятного изучения 🚀"
-                ),
-            )
+            notify(issue.key, moved_to_in_progress_message(topic, issue))
             theme = issue.fields.summary
-            update_topic_history(jira, epic_key, theme)
+            record_topic_theme(jira, epic_key, theme, run)
             return
 
         # Create a new task under the epic
-        task = generate_new_task(groq_client, history, topic)
+        pregenerated = take_pregenerated_task(run, epic_key, topic, history)
+        if pregenerated is not None:
+            pregenerated_id, task = pregenerated
+        else:
+            pregenerated_id, task = None, generate_new_task(groq_client, history, topic)
         if DRY_RUN:
             logging.info(
                 f"[DRY-RUN] Would create issue in epic '{epic_key}' with summary '{task['summary']}'"
             )
             return
 
-        new_issue = jira_create_issue(
-            jira,
-            {
-                "project": {"key": epic_key.split("-")[0]},
-                "parent": {"key": epic_key},
-                "summary": task["summary"],
-                "description": task["description"],
-                "issuetype": {"name": "Task"},
-            },
-        )
+        new_issue = jira_create_issue(jira, new_issue_fields(epic_key, task))
+        if pregenerated_id is not None:
+            # Задача удаляется только после создания: при ошибке её заберёт следующий запуск
+            run.task_store.delete(pregenerated_id)
 
         theme = new_issue.fields.summary
-        update_topic_history(jira, epic_key, theme)
+        record_topic_theme(jira, epic_key, theme, run)
 
         # Проверка, что задача создана
         if not new_issue or not hasattr(new_issue, "key"):
@@ -446,28 +1060,22 @@ def process_project(
             return
 
         # Проверка перехода статуса
-        transition_issue_to_status(jira, new_issue, STATUS_IN_PROGRESS)
-        # Проверка, что задача действительно в нужном статусе
-        updated_issue = jira_issue(jira, new_issue.key)
-        if getattr(updated_issue.fields.status, "name", None) != STATUS_IN_PROGRESS:
+        if not transition_issue_to_status(jira, new_issue, STATUS_IN_PROGRESS):
             msg = f"Issue {new_issue.key} did not transition to '{STATUS_IN_PROGRESS}'"
             logging.error(msg, exc_info=True)
             notify_critical_error(msg)
         else:
-            text = (
-                f"Создана и переведена в рабочий статус новая задача "
-                f"в топике {topic} на тему {new_issue.fields.summary}. "
-                f"Ссылка на задачу: {JIRA_URL + '/browse/' + new_issue.key}"
-            )
-            notify(new_issue.key, text)
+            notify(new_issue.key, new_task_message(topic, new_issue))
+    except DEFERRABLE_ERRORS:
+        # Эпик не закончен, а не сломан: run_daily отложит его на повторный проход
+        raise
     except Exception as e:
         msg = f"Error processing {epic_key}: {e}"
         logging.error(msg, exc_info=True)
         notify_critical_error(msg)
 
 
-def run_daily():
-    jira, groq_client = init_clients()
+def get_today_weekday() -> int:
     # Для тестов: если datetime подменён, корректно вызываем today().weekday(self)
     today_func = getattr(datetime, "today", None)
     if callable(today_func):
@@ -475,21 +1083,193 @@ def run_daily():
         weekday_func = getattr(today_obj, "weekday", None)
         if callable(weekday_func):
             try:
-                today = weekday_func(today_obj)
+                return weekday_func(today_obj)
             except TypeError:
                 # Для обычного datetime weekday(self), для monkeypatch — без self
-                today = weekday_func()
-        else:
-            today = 0
+                return weekday_func()
+    return 0
+
+
+def prioritized_schedule(schedule: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Эпики по убыванию EPIC_PRIORITY; при равном приоритете — в порядке расписания."""
+    return sorted(schedule, key=lambda item: -EPIC_PRIORITY.get(item[0], 0))
+
+
+def process_epic(
+    jira: JIRA, groq_client: Groq, epic: str, topic: str, run: Optional[RunContext] = None
+) -> bool:
+    """
+    Обрабатывает один эпик: ошибки не выходят за пределы эпика.
+    Возвращает False, если эпик не уложился в бюджет времени (EPIC_BUDGET_SECONDS,
+    срок прохода) или упёрся в открытый предохранитель — его нужно повторить.
+    """
+    started = time.monotonic()
+    try:
+        with deadline_scope(EPIC_BUDGET_SECONDS, until=run.deadline if run else None):
+            history: str = read_topic_history(jira, epic, topic, run)
+            process_project(jira, groq_client, epic, topic, history, run=run)
+        return True
+    except DEFERRABLE_ERRORS as e:
+        logging.warning(f"Epic {epic} deferred: {e}")
+        return False
+    except Exception as e:
+        logging.error(
+            f"Exception in run_daily for epic={epic}, topic={topic}: {e}", exc_info=True)
+        return True
+    finally:
+        logging.info(
+            f"Epic {epic} processed in {time.monotonic() - started:.2f}s")
+
+
+def catch_up_epics(
+    jira: JIRA, groq_client: Groq, deferred: List[Tuple[str, str]], run: RunContext
+) -> List[Tuple[str, str]]:
+    """
+    Повторный проход по отложенным эпикам: последовательно, в порядке
+    приоритета, со своим бюджетом RUN_CATCHUP_SECONDS. Возвращает эпики,
+    которые так и не закончились.
+    """
+    logging.warning(
+        f"Deferred to catch-up pass: {', '.join(epic for epic, _ in deferred)}")
+    if not RUN_CATCHUP_SECONDS:
+        return deferred
+    run.deadline = time.monotonic() + RUN_CATCHUP_SECONDS
+    unfinished = []
+    for epic, topic in deferred:
+        # Снимок задач мог устареть: эпик успел создать или перевести задачу
+        if run.epic_issues is not None:
+            run.epic_issues.pop(epic, None)
+        if not process_epic(jira, groq_client, epic, topic, run):
+            unfinished.append((epic, topic))
+    return unfinished
+
+
+def run_daily(workers: Optional[int] = None):
+    jira, groq_client = init_clients()
+    today = get_today_weekday()
+    schedule = prioritized_schedule(PROJECT_SCHEDULE.get(today, []))
+    workers = min(workers or RUN_WORKERS, len(schedule)) or 1
+    started = time.monotonic()
+    run = RunContext()
+    if RUN_DEADLINE_SECONDS:
+        run.deadline = started + RUN_DEADLINE_SECONDS
+    if schedule and PREGENERATED_TASKS_PATH:
+        run.task_store = PregeneratedTaskStore(PREGENERATED_TASKS_PATH)
+    if schedule:
+        try:
+            run.epics = validate_epics(jira, [epic for epic, _ in schedule])
+        except Exception as e:
+            # Без результата проверки каждый эпик проверяется отдельно
+            logging.error(f"Failed to validate epics: {e}", exc_info=True)
+    try:
+        run.epic_issues = prefetch_epic_issues(
+            jira, [epic for epic, _ in schedule])
+    except Exception as e:
+        # Без снимка каждый эпик выполнит свои поисковые запросы
+        logging.error(f"Failed to prefetch epic issues: {e}", exc_info=True)
+    if schedule and HISTORY_DB_PATH:
+        # История читается локально, а Jira загружается и обновляется в фоне
+        run.history_store = HistoryStore(HISTORY_DB_PATH)
+        run.history_sync = HistorySync(
+            run.history_store,
+            lambda: HistorySnapshot.load(jira),
+            lambda snapshot, epic, themes, on_written: update_topic_history(
+                jira, epic, "\n".join(themes), snapshot=snapshot, on_written=on_written),
+        )
+        run.history_sync.start([epic for epic, _ in schedule])
+    elif schedule:
+        try:
+            run.history = HistorySnapshot.load(jira)
+        except Exception as e:
+            # Без снимка история загружается отдельно для каждого эпика
+            logging.error(
+                f"Failed to load history snapshot: {e}", exc_info=True)
+    # Эпики запускаются в порядке приоритета: важные успевают до исчерпания бюджета
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="epic") as executor:
+            futures = [
+                (epic, topic, executor.submit(process_epic, jira,
+                                              groq_client, epic, topic, run))
+                for epic, topic in schedule
+            ]
+            deferred = [(epic, topic) for epic, topic, future in futures if not future.result()]
     else:
-        today = 0
-    for epic, topic in PROJECT_SCHEDULE.get(today, []):
+        deferred = [
+            (epic, topic) for epic, topic in schedule
+            if not process_epic(jira, groq_client, epic, topic, run)
+        ]
+    unfinished = catch_up_epics(jira, groq_client, deferred, run) if deferred else []
+    if unfinished:
+        notify_critical_error(
+            f"Epics not finished in time: {', '.join(epic for epic, _ in unfinished)}")
+    if run.task_store:
+        run.task_store.close()
+    if run.history_sync:
+        run.history_sync.close()
+        run.history = run.history_sync.snapshot
+        run.history_store.close()
+    if run.history:
         try:
-            history: str = get_topic_history(jira, epic, topic)
-            process_project(jira, groq_client, epic, topic, history)
+            run.history.save()
         except Exception as e:
             logging.error(
-                f"Exception in run_daily for epic={epic}, topic={topic}: {e}", exc_info=True)
+                f"Failed to save history cache: {e}", exc_info=True)
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        llm_cache.log_stats()
+    log_http_stats(jira)
+    outbox = get_outbox()
+    if outbox and not outbox.flush(TELEGRAM_FLUSH_TIMEOUT):
+        logging.warning("Telegram outbox not drained, remaining messages keep sending in background")
+    logging.info(
+        f"Daily run finished: {len(schedule)} epics, {workers} workers, "
+        f"{len(deferred) - len(unfinished)}/{len(deferred)} deferred epics caught up, "
+        f"{time.monotonic() - started:.2f}s")
+
+
+def pregenerate_tasks():
+    """
+    Вечернее задание: заранее генерирует новые задачи для эпиков завтрашнего
+    расписания, у которых нет задач в бэклоге, чтобы утренний запуск
+    обошёлся без обращения к LLM.
+    """
+    jira, groq_client = init_clients()
+    schedule = PROJECT_SCHEDULE.get((get_today_weekday() + 1) % 7, [])
+    if not schedule:
+        return
+    started = time.monotonic()
+    epic_issues = prefetch_epic_issues(jira, [epic for epic, _ in schedule])
+    history = HistorySnapshot.load(jira)
+    store = PregeneratedTaskStore(PREGENERATED_TASKS_PATH)
+    generated = 0
+    try:
+        for epic, topic in schedule:
+            try:
+                if epic_issues.get(epic, {}).get(STATUS_BACKLOG):
+                    continue
+                if store.count(epic, topic):
+                    continue
+                themes = "\n".join(history.iter_themes(epic))
+                task = generate_new_task(groq_client, themes, topic)
+                if task == GROQ_NOT_FOUND_TASK:
+                    continue
+                if DRY_RUN:
+                    logging.info(
+                        f"[DRY-RUN] Would store pre-generated task '{task['summary']}' for epic {epic}")
+                    continue
+                store.put(epic, topic, task)
+                generated += 1
+            except Exception as e:
+                logging.error(
+                    f"Failed to pre-generate task for epic={epic}, topic={topic}: {e}", exc_info=True)
+    finally:
+        store.close()
+    try:
+        history.save()
+    except Exception as e:
+        logging.error(f"Failed to save history cache: {e}", exc_info=True)
+    logging.info(
+        f"Pre-generation finished: {generated} tasks, {time.monotonic() - started:.2f}s")
 
 
 if __name__ == "__main__":
@@ -504,7 +1284,16 @@ if __name__ == "__main__":
         day_of_week=SCHEDULER_DAYS,
         hour=SCHEDULER_HOUR,
         minute=SCHEDULER_MINUTE,
-        misfire_grace_time=3600,
+        misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS,
     )
+    if PREGENERATED_TASKS_PATH:
+        scheduler.add_job(
+            pregenerate_tasks,
+            "cron",
+            day_of_week=PREGENERATE_DAYS,
+            hour=PREGENERATE_HOUR,
+            minute=PREGENERATE_MINUTE,
+            misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS,
+        )
     logging.info("Starting Jira automation...")
     scheduler.start()
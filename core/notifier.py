@@ -0,0 +1,203 @@
+import atexit
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_CONNECT_TIMEOUT,
+    TELEGRAM_FLUSH_TIMEOUT,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_MAX_ATTEMPTS,
+    TELEGRAM_READ_TIMEOUT,
+    TELEGRAM_SEND_MESSAGE_URL,
+)
+from rate_limit import TokenBucket
+
+
+@dataclass
+class OutboxMessage:
+    chat_id: str
+    text: str
+    context: str = ""
+    attempt: int = 0
+
+
+@dataclass(order=True)
+class _Scheduled:
+    ready_at: float
+    seq: int
+    message: OutboxMessage = field(compare=False)
+
+
+class TelegramOutbox:
+    """
+    Очередь исходящих сообщений Telegram. Отправка идёт в фоновом потоке через
+    постоянную requests.Session с таймаутами; token bucket'ы соблюдают лимиты
+    Telegram на чат и на бота, а ошибки повторяются с экспоненциальной паузой.
+    Вызывающий код никогда не ждёт доставки.
+    """
+
+    def __init__(
+        self,
+        url: str = TELEGRAM_SEND_MESSAGE_URL,
+        session: Optional[requests.Session] = None,
+        timeout=(TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT),
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        max_attempts: int = TELEGRAM_MAX_ATTEMPTS,
+        backoff_base: float = 1.0,
+    ):
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.sent = 0
+        self.failed = 0
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_rate = chat_rate
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._heap: List[_Scheduled] = []
+        self._seq = itertools.count()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, chat_id: str, text: str, context: str = ""):
+        """Ставит сообщение в очередь и сразу возвращает управление."""
+        self._schedule(OutboxMessage(chat_id, text, context), delay=0.0, new=True)
+
+    def _schedule(self, message: OutboxMessage, delay: float, new: bool = False):
+        with self._cond:
+            heapq.heappush(self._heap, _Scheduled(
+                time.monotonic() + delay, next(self._seq), message))
+            if new:
+                self._pending += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="telegram-outbox", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _next_message(self) -> OutboxMessage:
+        with self._cond:
+            while True:
+                if self._heap:
+                    delay = self._heap[0].ready_at - time.monotonic()
+                    if delay <= 0:
+                        return heapq.heappop(self._heap).message
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+
+    def _done(self):
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            message = self._next_message()
+            try:
+                bucket = self._chat_buckets.setdefault(
+                    message.chat_id, TokenBucket(self._chat_rate, 1.0))
+                time.sleep(max(bucket.reserve(), self._global_bucket.reserve()))
+                retry_after = self._deliver(message)
+            except Exception as e:
+                # Поток очереди один на процесс: неожиданная ошибка не должна его остановить
+                logging.error(
+                    f"Unexpected error sending telegram message for {message.context}: {e}",
+                    exc_info=True)
+                retry_after = self.backoff_base * 2 ** message.attempt
+            if retry_after is None:
+                self._done()
+                continue
+            message.attempt += 1
+            if message.attempt >= self.max_attempts:
+                self.failed += 1
+                logging.error(
+                    f"Giving up on telegram message for {message.context or message.chat_id} "
+                    f"after {message.attempt} attempts")
+                self._done()
+                continue
+            self._schedule(message, delay=retry_after)
+
+    def _deliver(self, message: OutboxMessage) -> Optional[float]:
+        """Отправляет сообщение; возвращает паузу до повтора или None, если повтор не нужен."""
+        backoff = self.backoff_base * 2 ** message.attempt
+        try:
+            response = self.session.post(
+                self.url,
+                data={"chat_id": message.chat_id, "text": message.text},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            logging.warning(
+                f"Failed to send message to telegram for {message.context}: {e}")
+            return backoff
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json()["parameters"]["retry_after"])
+            except (AttributeError, KeyError, TypeError, ValueError):
+                retry_after = backoff
+            logging.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+            return retry_after
+        if response.status_code >= 500:
+            logging.warning(
+                f"Telegram returned {response.status_code} for {message.context}")
+            return backoff
+        if response.status_code >= 400:
+            # Ошибки запроса повтором не исправить
+            self.failed += 1
+            logging.error(
+                f"Telegram rejected message for {message.context}: "
+                f"{response.status_code} {response.text}")
+            return None
+        self.sent += 1
+        return None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт доставки всех сообщений из очереди; False, если не успели."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+
+_outbox: Optional[TelegramOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def _flush_at_exit():
+    if _outbox is not None and not _outbox.flush(TELEGRAM_FLUSH_TIMEOUT):
+        logging.warning("Telegram outbox not fully flushed before exit")
+
+
+def get_outbox() -> Optional[TelegramOutbox]:
+    """
+    Общая очередь процесса; None, если Telegram не настроен. Поток очереди
+    фоновый, поэтому при выходе из процесса (в том числе из разовых скриптов)
+    очередь дожидается доставки не дольше TELEGRAM_FLUSH_TIMEOUT.
+    """
+    global _outbox
+    if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
+        return None
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = TelegramOutbox()
+            atexit.register(_flush_at_exit)
+        return _outbox
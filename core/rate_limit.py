@@ -0,0 +1,161 @@
+import logging
+import re
+import threading
+import time
+
+from typing import Mapping, Optional
+
+from config import GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Забирает токены (допуская уход в минус) и возвращает, сколько секунд
+        нужно подождать, прежде чем ими пользоваться.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def set_rate(self, rate: float, capacity: float = None):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+                self._tokens = min(self._tokens, capacity)
+
+    def sync(self, remaining: float, reset_after: Optional[float] = None):
+        """
+        Подстраивается под остаток, сообщённый сервером: токенов не может быть
+        больше remaining, а при исчерпанном лимите следующий токен появится
+        не раньше, чем через reset_after секунд.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, remaining)
+            if remaining < 1 and reset_after:
+                self._tokens = min(self._tokens, 1 - reset_after * self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Блокирует до получения токенов; возвращает время ожидания."""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Разбирает длительность из заголовков Groq: "7.66s", "2m59.56s", "120ms", "30"."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class GroqRateLimiter:
+    """
+    Общий лимитер запросов к Groq: запросы и токены в минуту. Начальные
+    лимиты берутся из конфига, дальше подстраиваются по заголовкам
+    x-ratelimit-* и retry-after из ответов Groq.
+
+    У Groq заголовки *-requests описывают суточный лимит запросов, а *-tokens —
+    минутный лимит токенов, поэтому в минутный bucket запросов они не попадают:
+    суточный остаток учитывается отдельно и только при исчерпании задерживает
+    запросы до сброса.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = GROQ_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = GROQ_TOKENS_PER_MINUTE,
+    ):
+        # Запас на 10 секунд: без залпа на старте, который Groq тут же отклонит
+        self.requests = TokenBucket(
+            requests_per_minute / 60, max(1.0, requests_per_minute / 6))
+        self.tokens = TokenBucket(
+            tokens_per_minute / 60, max(1.0, tokens_per_minute / 6))
+        # Момент (time.monotonic), до которого исчерпан суточный лимит запросов
+        self.daily_blocked_until = 0.0
+        self._daily_lock = threading.Lock()
+
+    def _daily_delay(self) -> float:
+        with self._daily_lock:
+            return max(0.0, self.daily_blocked_until - time.monotonic())
+
+    def acquire(self, tokens: float) -> float:
+        """Блокирует до разрешения на запрос примерно в tokens токенов."""
+        delay = max(
+            self.requests.reserve(), self.tokens.reserve(tokens), self._daily_delay())
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        limit_tokens = _header_float(headers, "x-ratelimit-limit-tokens")
+        if limit_tokens:
+            self.tokens.set_rate(limit_tokens / 60, max(1.0, limit_tokens / 6))
+        remaining_tokens = _header_float(headers, "x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            self.tokens.sync(
+                remaining_tokens, parse_duration(headers.get("x-ratelimit-reset-tokens")))
+        remaining_requests = _header_float(headers, "x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests < 1:
+            reset_requests = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset_requests:
+                logging.warning(
+                    f"Groq daily request limit exhausted, resets in {reset_requests:.0f}s")
+                with self._daily_lock:
+                    self.daily_blocked_until = max(
+                        self.daily_blocked_until, time.monotonic() + reset_requests)
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after:
+            logging.warning(f"Groq asked to retry after {retry_after:.1f}s")
+            self.requests.sync(0, retry_after)
+            self.tokens.sync(0, retry_after)
+
+
+_groq_limiter: Optional[GroqRateLimiter] = None
+_groq_limiter_lock = threading.Lock()
+
+
+def get_groq_limiter() -> GroqRateLimiter:
+    """Общий лимитер процесса."""
+    global _groq_limiter
+    with _groq_limiter_lock:
+        if _groq_limiter is None:
+            _groq_limiter = GroqRateLimiter()
+        return _groq_limiter
@@ -0,0 +1,302 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+import httpx
+
+from groq import APIConnectionError
+from tenacity import retry, retry_if_exception, stop_after_attempt, stop_any, wait_exponential
+
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    RETRY_AFTER_MAX_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_WAIT_SECONDS,
+)
+from deadline import DeadlineExceeded, check_deadline, remaining
+from rate_limit import parse_duration
+
+# Лимиты Groq: (заголовок остатка, заголовок времени восстановления)
+RATE_LIMIT_HEADERS = (
+    ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+    ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+)
+
+
+class CircuitOpenError(Exception):
+    """Сервис признан недоступным: запрос не отправляется до истечения паузы."""
+
+
+# Ошибки, после которых эпик не провален, а отложен до повторного прохода
+DEFERRABLE_ERRORS = (CircuitOpenError, DeadlineExceeded)
+
+# Ошибки транспорта без HTTP-статуса: обрыв, таймаут, отказ в соединении.
+# Ошибки requests — подклассы OSError; APITimeoutError Groq — подкласс APIConnectionError
+TRANSIENT_ERRORS = (OSError, httpx.TransportError, APIConnectionError)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель сервиса. После threshold неудачных вызовов подряд (каждый —
+    уже со всеми своими повторами) запросы reset_timeout секунд сразу падают
+    с CircuitOpenError, затем пропускается один пробный вызов: успех закрывает
+    предохранитель, ошибка — снова открывает.
+    """
+
+    def __init__(
+        self, name: str, threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_SECONDS
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise CircuitOpenError(
+                    f"{self.name} circuit is open, retry in {max(remaining, 0):.0f}s")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logging.info(f"{self.name} circuit closed")
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self._opened_at is None and self.failures >= self.threshold):
+                logging.error(
+                    f"{self.name} circuit opened after {self.failures} failures, "
+                    f"pausing requests for {self.reset_timeout:.0f}s")
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self):
+        """Вызов закончился без ответа о состоянии сервиса: пробный вызов снова свободен."""
+        with self._lock:
+            self._trial = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(service: str) -> CircuitBreaker:
+    """Общий предохранитель процесса для сервиса ("jira", "groq")."""
+    with _breakers_lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker(service)
+        return _breakers[service]
+
+
+def reset_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def error_status(e: BaseException) -> Optional[int]:
+    """HTTP-статус ошибки jira, groq, httpx или requests; None — ответа не было."""
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def error_headers(e: BaseException) -> Mapping[str, str]:
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    return headers if isinstance(headers, Mapping) else {}
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    value = headers.get(name)
+    if value is None:
+        # Обычный dict, в отличие от заголовков requests/httpx, чувствителен к регистру
+        value = next((v for k, v in headers.items() if k.lower() == name), None)
+    return value
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After в секундах или HTTP-датой; длительности Groq вида "2m59.56s"."""
+    if not value:
+        return None
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after(e: BaseException) -> Optional[float]:
+    """
+    Пауза, которую сервер попросил выдержать перед повтором: Retry-After.
+    Заголовки x-ratelimit-reset-* есть и в успешных ответах и говорят лишь о
+    восстановлении квоты, поэтому учитываются только у 429 без Retry-After —
+    по исчерпанному лимиту, а если он не указан, по ближайшему восстановлению.
+    """
+    headers = error_headers(e)
+    seconds = parse_retry_after(_header(headers, "retry-after"))
+    if seconds is not None or error_status(e) != 429:
+        return seconds
+    resets, exhausted = [], []
+    for remaining_name, reset_name in RATE_LIMIT_HEADERS:
+        reset = parse_retry_after(_header(headers, reset_name))
+        if reset is None:
+            continue
+        resets.append(reset)
+        if _header(headers, remaining_name) == "0":
+            exhausted.append(reset)
+    if exhausted:
+        return max(exhausted)
+    return min(resets) if resets else None
+
+
+def is_retryable(e: BaseException) -> bool:
+    """
+    Повторяются сетевые ошибки, 429 и 5xx. Остальные 4xx (нет задачи, нет прав,
+    неверный запрос) повтором не исправить, как и ошибки в нашем коде
+    (KeyError, TypeError и т.п. без HTTP-статуса).
+    """
+    if isinstance(e, DEFERRABLE_ERRORS):
+        return False
+    status = error_status(e)
+    if status is None:
+        return isinstance(e, TRANSIENT_ERRORS)
+    return status == 429 or status >= 500
+
+
+class wait_adaptive:
+    """Ждёт столько, сколько попросил сервер (не дольше max_retry_after), иначе — экспоненциально."""
+
+    def __init__(self, max_wait: float = RETRY_MAX_WAIT_SECONDS, max_retry_after: float = RETRY_AFTER_MAX_SECONDS):
+        self.max_retry_after = max_retry_after
+        self._backoff = wait_exponential(multiplier=2, min=2, max=max_wait)
+
+    def __call__(self, retry_state) -> float:
+        e = retry_state.outcome.exception() if retry_state.outcome else None
+        seconds = retry_after(e) if e is not None else None
+        if seconds is not None:
+            return min(seconds, self.max_retry_after)
+        return self._backoff(retry_state)
+
+
+def stop_before_deadline(retry_state) -> bool:
+    """
+    Пауза перед повтором не укладывается в оставшийся срок: повтор не нужен,
+    а ошибка (в том числе таймаут, обрезанный по сроку) становится DeadlineExceeded.
+    """
+    left = remaining()
+    if left is not None and retry_state.upcoming_sleep >= left:
+        raise DeadlineExceeded(
+            f"No time budget left to retry: {retry_state.outcome.exception()}"
+        ) from retry_state.outcome.exception()
+    return False
+
+
+def _record_error(breaker: CircuitBreaker, e: BaseException):
+    """Итог вызова, упавшего после всех повторов."""
+    if isinstance(e, DeadlineExceeded) and e.__cause__ is not None:
+        # Повторы прерваны сроком: решает ошибка последней попытки
+        e = e.__cause__
+    if is_retryable(e):
+        breaker.record_failure()
+    elif error_status(e) is not None:
+        # Ошибки 4xx, кроме 429, говорят о запросе, а не о состоянии сервиса
+        breaker.record_success()
+    else:
+        # Отложенный вызов или ошибка в коде ничего не говорят о сервисе
+        breaker.release()
+
+
+def _attempt(fn, service: str):
+    """Одна попытка: без остатка срока запрос не отправляется."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_attempt(*args, **kwargs) -> Any:
+            check_deadline(service)
+            return await fn(*args, **kwargs)
+        return async_attempt
+
+    @functools.wraps(fn)
+    def attempt(*args, **kwargs) -> Any:
+        check_deadline(service)
+        return fn(*args, **kwargs)
+    return attempt
+
+
+def _guarded(fn, retried, service: str):
+    """Весь вызов с повторами: предохранитель учитывает его один раз."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_call(*args, **kwargs) -> Any:
+            check_deadline(service)
+            breaker = get_breaker(service)
+            breaker.before_call()
+            try:
+                result = await retried(*args, **kwargs)
+            except Exception as e:
+                _record_error(breaker, e)
+                raise
+            breaker.record_success()
+            return result
+        return async_call
+
+    @functools.wraps(fn)
+    def call(*args, **kwargs) -> Any:
+        check_deadline(service)
+        breaker = get_breaker(service)
+        breaker.before_call()
+        try:
+            result = retried(*args, **kwargs)
+        except Exception as e:
+            _record_error(breaker, e)
+            raise
+        breaker.record_success()
+        return result
+    return call
+
+
+def service_retry(service: str, attempts: int = RETRY_MAX_ATTEMPTS):
+    """
+    Общая политика повторов для обёрток Jira и Groq: повторы только для
+    is_retryable ошибок, пауза по Retry-After или экспоненциальная,
+    и предохранитель сервиса, из-за которого при недоступном сервисе
+    остальные вызовы падают сразу, а не ждут собственных повторов.
+    Попытки и паузы не выходят за срок deadline_scope: запрос без остатка
+    бюджета падает с DeadlineExceeded.
+    """
+    def decorator(fn):
+        retried = retry(
+            stop=stop_any(stop_before_deadline, stop_after_attempt(attempts)),
+            wait=wait_adaptive(),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        )(_attempt(fn, service))
+        return _guarded(fn, retried, service)
+    return decorator
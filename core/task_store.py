@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+
+from typing import Optional, Tuple
+
+
+class PregeneratedTaskStore:
+    """
+    Задачи, сгенерированные заранее (вечерним заданием) и ещё не созданные
+    в Jira. Утренний запуск забирает задачу эпика вместо вызова LLM.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, epic_key TEXT NOT NULL, "
+                "topic TEXT NOT NULL, summary TEXT NOT NULL, description TEXT NOT NULL, "
+                "created_at TEXT NOT NULL DEFAULT (datetime('now')))"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def put(self, epic_key: str, topic: str, task: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO tasks (epic_key, topic, summary, description) VALUES (?, ?, ?, ?)",
+                (epic_key, topic, task["summary"], task["description"]),
+            )
+
+    def count(self, epic_key: str, topic: str) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE epic_key = ? AND topic = ?",
+                (epic_key, topic),
+            ).fetchone()
+        return count
+
+    def peek(self, epic_key: str, topic: str) -> Optional[Tuple[int, dict]]:
+        """
+        Самая старая задача эпика и её id; задача остаётся в хранилище,
+        пока её не удалят через delete (после создания в Jira).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, summary, description FROM tasks "
+                "WHERE epic_key = ? AND topic = ? ORDER BY id LIMIT 1",
+                (epic_key, topic),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], {"summary": row[1], "description": row[2]}
+
+    def delete(self, task_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
@@ -0,0 +1,126 @@
+import re
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class DuplicateThemeError(Exception):
+    """LLM раз за разом предлагает уже пройденную тему."""
+
+
+def normalize_theme(theme: str) -> str:
+    """Приводит тему к каноническому виду: без '#', пунктуации, регистра и лишних пробелов."""
+    return " ".join(_WORD_RE.findall(theme.lstrip("# ").lower()))
+
+
+def theme_tokens(theme: str) -> FrozenSet[str]:
+    return frozenset(normalize_theme(theme).split())
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Грубая оценка числа токенов без токенизатора модели: около трёх символов
+    на токен для смеси кириллицы и латиницы.
+    """
+    return (len(text) + 2) // 3
+
+
+def split_history(topic_history: str) -> List[str]:
+    return [line.strip() for line in topic_history.splitlines() if line.strip()]
+
+
+def compact_themes(
+    themes: Iterable[str], budget_tokens: int, distinct_threshold: float = 0.8
+) -> List[str]:
+    """
+    Ужимает историю тем под бюджет токенов. Повторы (после нормализации)
+    и почти одинаковые темы схлопываются, дальше берутся самые свежие темы,
+    пока они помещаются в бюджет. Порядок в результате — хронологический.
+    """
+    kept: List[str] = []
+    kept_tokens: List[FrozenSet[str]] = []
+    seen = set()
+    used = 0
+    for theme in reversed(list(themes)):
+        normalized = normalize_theme(theme)
+        if not normalized or normalized in seen:
+            continue
+        seen.add(normalized)
+        tokens = frozenset(normalized.split())
+        if any(jaccard(tokens, other) >= distinct_threshold for other in kept_tokens):
+            continue
+        cost = estimate_tokens(theme) + 1
+        if used + cost > budget_tokens:
+            break
+        used += cost
+        kept.append(theme)
+        kept_tokens.append(tokens)
+    kept.reverse()
+    return kept
+
+
+def compact_topic_history(topic_history: str, budget_tokens: int) -> str:
+    themes = split_history(topic_history)
+    kept = compact_themes(themes, budget_tokens)
+    return "\n".join(kept)
+
+
+def theme_shingles(theme: str, size: int = 3) -> FrozenSet[str]:
+    """Символьные n-граммы нормализованной темы: устойчивы к окончаниям и опечаткам."""
+    text = f" {normalize_theme(theme)} "
+    if len(text) <= size:
+        return frozenset([text])
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+class ThemeIndex:
+    """
+    Индекс пройденных тем эпика для поиска почти дубликатов без обращения к LLM.
+    Похожесть — коэффициент Жаккара по символьным триграммам; кандидаты
+    отбираются через инвертированный индекс, поэтому проверка не перебирает
+    всю историю.
+    """
+
+    def __init__(self, themes: Iterable[str] = (), threshold: float = 0.6):
+        self.threshold = threshold
+        self._themes: List[str] = []
+        self._shingles: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+        for theme in themes:
+            self.add(theme)
+
+    def __len__(self) -> int:
+        return len(self._themes)
+
+    def add(self, theme: str):
+        shingles = theme_shingles(theme)
+        position = len(self._themes)
+        self._themes.append(theme)
+        self._shingles.append(shingles)
+        for shingle in shingles:
+            self._postings.setdefault(shingle, []).append(position)
+
+    def most_similar(self, theme: str) -> Tuple[Optional[str], float]:
+        shingles = theme_shingles(theme)
+        overlap: Dict[int, int] = {}
+        for shingle in shingles:
+            for position in self._postings.get(shingle, ()):
+                overlap[position] = overlap.get(position, 0) + 1
+        best, best_score = None, 0.0
+        for position, common in overlap.items():
+            score = common / (len(shingles) + len(self._shingles[position]) - common)
+            if score > best_score:
+                best, best_score = self._themes[position], score
+        return best, best_score
+
+    def find_duplicate(self, theme: str) -> Optional[str]:
+        """Возвращает пройденную тему, с которой совпадает theme, или None."""
+        match, score = self.most_similar(theme)
+        return match if score >= self.threshold else None
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import TRANSITION_CACHE_TTL_SECONDS
+
+TransitionKey = Tuple[Any, str, str, Optional[str], str]
+
+
+def find_transition(transitions: Iterable[dict], status_name: str) -> Optional[dict]:
+    """Переход по имени перехода или по имени целевого статуса."""
+    for transition in transitions:
+        if transition.get("name") == status_name:
+            return transition
+    for transition in transitions:
+        if (transition.get("to") or {}).get("name") == status_name:
+            return transition
+    return None
+
+
+class TransitionResolver:
+    """
+    Кеш переходов workflow: (сервер, проект, тип задачи, текущий статус,
+    целевой статус) -> переход. Набор переходов определяется только workflow,
+    поэтому jira.transitions запрашивается при промахе, после ttl или после
+    неудачного перехода (invalidate).
+    """
+
+    def __init__(self, ttl: float = TRANSITION_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[TransitionKey, Tuple[dict, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(server: Any, issue, status_name: str) -> Optional[TransitionKey]:
+        """
+        Ключ кеша или None, если тип задачи неизвестен. Текущий статус None
+        означает только что созданную задачу: она в начальном статусе workflow.
+        """
+        fields = getattr(issue, "fields", None)
+        issuetype = getattr(getattr(fields, "issuetype", None), "name", None)
+        if not isinstance(issuetype, str):
+            return None
+        status = getattr(getattr(fields, "status", None), "name", None)
+        return (server, issue.key.split("-")[0], issuetype, status, status_name)
+
+    def get(self, key: Optional[TransitionKey]) -> Optional[dict]:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            transition, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return transition
+
+    def store(self, key: Optional[TransitionKey], transitions: Iterable[dict], status_name: str) -> Optional[dict]:
+        """Выбирает нужный переход из ответа Jira и кеширует его."""
+        transition = find_transition(list(transitions), status_name)
+        if transition is not None and key is not None:
+            with self._lock:
+                self._entries[key] = (transition, time.monotonic() + self.ttl)
+        return transition
+
+    def invalidate(self, key: Optional[TransitionKey]):
+        if key is None:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+transition_resolver = TransitionResolver()
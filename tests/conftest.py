@@ -0,0 +1,11 @@
+import pytest
+
+from retry_policy import reset_breakers
+
+
+@pytest.fixture(autouse=True)
+def circuit_breakers():
+    # Предохранители общие на процесс: каждый тест начинает с закрытыми
+    reset_breakers()
+    yield
+    reset_breakers()
@@ -0,0 +1,277 @@
+import asyncio
+import dataclasses
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import httpx
+import core.async_main as async_main
+import core.main as main
+from core.history_store import HistoryStore
+from core.task_store import PregeneratedTaskStore
+
+
+class FakeJiraServer:
+    """Обработчик httpx.MockTransport, эмулирующий нужные эндпоинты Jira."""
+
+    def __init__(self, issues, comments, missing_epics=()):
+        self.issues = issues
+        self.comments = comments
+        self.missing_epics = set(missing_epics)
+        self.requests = []
+        self.searches = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.replace("/rest/api/2/", "")
+        self.requests.append((request.method, path))
+        jql = request.url.params.get("jql", "")
+        if path == "search":
+            self.searches.append(dict(request.url.params))
+        if path == "search" and jql.startswith("key in ("):
+            keys = [key for key in jql[len("key in ("):-1].split(", ") if key not in self.missing_epics]
+            return httpx.Response(200, json={"issues": [{"key": key, "fields": {}} for key in keys], "total": len(keys)})
+        if path == "search":
+            return httpx.Response(200, json={"issues": self.issues, "total": len(self.issues)})
+        if path == "issue/HIST-1/comment" and request.method == "GET":
+            return httpx.Response(200, json={"comments": self.comments, "total": len(self.comments)})
+        if path.startswith("issue/HIST-1/comment/") and request.method == "PUT":
+            body = json.loads(request.content)["body"]
+            return httpx.Response(200, json={"id": path.rsplit("/", 1)[1], "body": body})
+        if path == "issue/HIST-1" and request.method == "GET":
+            updated = max((c.get("updated", "") for c in self.comments), default="")
+            return httpx.Response(200, json={"key": "HIST-1", "fields": {"updated": updated}})
+        if path == "issue" and request.method == "POST":
+            return httpx.Response(201, json={"id": "100", "key": "PRO-100"})
+        if path == "issue/bulk" and request.method == "POST":
+            updates = json.loads(request.content)["issueUpdates"]
+            return httpx.Response(201, json={"errors": [], "issues": [
+                {"id": str(200 + i), "key": f"PRO-{200 + i}"} for i in range(len(updates))]})
+        if path.endswith("/transitions") and request.method == "GET":
+            return httpx.Response(200, json={"transitions": [{"id": "31", "name": "In Progress"}]})
+        if path.endswith("/transitions") and request.method == "POST":
+            return httpx.Response(204)
+        if path == "issue/PRO-100":
+            return httpx.Response(200, json={"key": "PRO-100", "fields": {"status": {"name": "In Progress"}}})
+        if path.startswith("issue/"):
+            return httpx.Response(200, json={"key": path.split("/")[1], "fields": {}})
+        return httpx.Response(404)
+
+
+def make_groq(content):
+    groq_client = MagicMock()
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    groq_client.chat.completions.create = AsyncMock(return_value=response)
+    return groq_client
+
+
+@pytest.fixture(autouse=True)
+def async_config(monkeypatch):
+    monkeypatch.setattr(async_main, "DRY_RUN", False)
+    monkeypatch.setattr(async_main, "JIRA_HISTORY_KEY", "HIST-1")
+    monkeypatch.setattr(async_main, "get_today_weekday", lambda: 0)
+    monkeypatch.setattr(async_main, "get_llm_cache", lambda: None)
+
+
+def run_async(server, groq_client, schedule, monkeypatch):
+    monkeypatch.setattr(async_main, "PROJECT_SCHEDULE", {0: schedule})
+    outbox = MagicMock()
+    outbox.flush.return_value = True
+
+    async def scenario():
+        jira = async_main.AsyncJiraClient(
+            server="https://jira.test", user="u", token="t",
+            transport=httpx.MockTransport(server))
+        try:
+            await async_main.run_daily_async(jira=jira, groq_client=groq_client, outbox=outbox)
+        finally:
+            await jira.aclose()
+
+    asyncio.run(scenario())
+    outbox.flush.assert_called_once()
+    return [call.args[1] for call in outbox.send.call_args_list]
+
+
+def test_run_daily_async_creates_task_and_updates_history(monkeypatch):
+    server = FakeJiraServer(
+        issues=[],
+        comments=[{"id": "1", "body": "Топик: Python\nКлюч топика: PRO-6\n\nИстория топика:\nGIL"}],
+    )
+    groq_client = make_groq("# asyncio\nОписание")
+    telegram = run_async(server, groq_client, [("PRO-6", "Python")], monkeypatch)
+
+    assert ("POST", "issue") in server.requests
+    assert ("PUT", "issue/HIST-1/comment/1") in server.requests
+    assert ("POST", "issue/PRO-100/transitions") in server.requests
+    prompt = groq_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+    assert "GIL" in prompt
+    assert len(telegram) == 1
+
+
+def test_run_daily_async_uses_prefetched_in_progress_issue(monkeypatch):
+    in_progress = {
+        "key": "PRO-50",
+        "fields": {"summary": "Joins", "status": {"name": "In Progress"}, "parent": {"key": "PRO-3"}},
+    }
+    server = FakeJiraServer(
+        issues=[in_progress],
+        comments=[
+            {"id": "1", "body": "Топик: A\nКлюч топика: PRO-3\n\nИстория топика:"},
+            {"id": "2", "body": "Топик: B\nКлюч топика: PRO-4\n\nИстория топика:\nX"},
+        ],
+    )
+    groq_client = make_groq("# Design\nОписание")
+    telegram = run_async(
+        server, groq_client, [("PRO-3", "A"), ("PRO-4", "B")], monkeypatch)
+
+    # Одна проверка эпиков и один общий поиск на запуск, а не по запросу на эпик
+    assert server.requests.count(("GET", "search")) == 2
+    assert ("GET", "issue/PRO-3") not in server.requests
+    # PRO-3 уже в работе, новая задача создаётся только для PRO-4
+    assert server.requests.count(("POST", "issue")) == 1
+    assert groq_client.chat.completions.create.await_count == 1
+    assert len(telegram) == 2
+
+
+def test_run_daily_async_skips_missing_epic_after_single_validation(monkeypatch):
+    server = FakeJiraServer(
+        issues=[],
+        comments=[{"id": "1", "body": "Топик: A\nКлюч топика: PRO-3\n\nИстория топика:"}],
+        missing_epics={"PRO-404"},
+    )
+    groq_client = make_groq("# Design\nОписание")
+    telegram = run_async(
+        server, groq_client, [("PRO-3", "A"), ("PRO-404", "B")], monkeypatch)
+
+    assert ("GET", "issue/PRO-404") not in server.requests
+    assert server.requests.count(("POST", "issue")) == 1
+    assert any("PRO-404" in text for text in telegram)
+
+
+HISTORY_COMMENT = {
+    "id": "1",
+    "body": "Топик: Python\nКлюч топика: PRO-6\n\nИстория топика:\nGIL",
+    "updated": "2024-01-01T10:00:00.000+0000",
+}
+
+
+def test_run_daily_async_uses_pregenerated_task(monkeypatch, tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = PregeneratedTaskStore(path)
+    store.put("PRO-6", "Python", {"summary": "asyncio", "description": "# asyncio\nОписание"})
+    store.close()
+    monkeypatch.setattr(async_main, "PREGENERATED_TASKS_PATH", path)
+    server = FakeJiraServer(issues=[], comments=[HISTORY_COMMENT])
+    groq_client = make_groq("# Другое\nОписание")
+    run_async(server, groq_client, [("PRO-6", "Python")], monkeypatch)
+
+    assert ("POST", "issue") in server.requests
+    groq_client.chat.completions.create.assert_not_awaited()
+    store = PregeneratedTaskStore(path)
+    assert store.count("PRO-6", "Python") == 0
+    store.close()
+
+
+def test_run_daily_async_replenishes_backlog(monkeypatch):
+    monkeypatch.setattr(async_main, "BACKLOG_REPLENISH_SIZE", 2)
+    # Порог пополнения проверяет общий с main.py код
+    monkeypatch.setattr(f"{async_main.needs_replenishment.__module__}.BACKLOG_REPLENISH_SIZE", 2)
+    server = FakeJiraServer(issues=[], comments=[HISTORY_COMMENT])
+    groq_client = make_groq("# Генераторы\n# Метаклассы")
+    telegram = run_async(server, groq_client, [("PRO-6", "Python")], monkeypatch)
+
+    assert ("POST", "issue/bulk") in server.requests
+    assert ("POST", "issue") not in server.requests
+    # В работу уходит первая задача пополненного бэклога
+    assert ("POST", "issue/PRO-200/transitions") in server.requests
+    assert ("PUT", "issue/PRO-200") in server.requests
+    assert "Генераторы" in telegram[0]
+
+
+def test_run_daily_async_pages_prefetch_and_limits_epic_search(monkeypatch):
+    async def scenario():
+        jira = async_main.AsyncJiraClient(
+            server="https://jira.test", user="u", token="t",
+            transport=httpx.MockTransport(server))
+        try:
+            return await async_main.find_epic_issues_async(
+                jira, "PRO-6", async_main.STATUS_IN_PROGRESS, main.RunContext(), limit=1)
+        finally:
+            await jira.aclose()
+
+    server = FakeJiraServer(issues=[{"key": "PRO-1", "fields": {}}], comments=[])
+    assert [issue.key for issue in asyncio.run(scenario())] == ["PRO-1"]
+    assert server.searches[0]["maxResults"] == "1"
+
+    server = FakeJiraServer(issues=[], comments=[HISTORY_COMMENT])
+    run_async(server, make_groq("# asyncio\nОписание"), [("PRO-6", "Python")], monkeypatch)
+    prefetch = [params for params in server.searches if "parent in" in params["jql"]]
+    assert prefetch[0]["maxResults"] == str(async_main.JIRA_SEARCH_PAGE_SIZE)
+
+
+def test_async_search_issues_follows_total_past_short_page():
+    pages = [
+        {"issues": [{"key": "PRO-1"}], "total": 3},
+        {"issues": [{"key": "PRO-2"}, {"key": "PRO-3"}], "total": 3},
+    ]
+
+    async def scenario():
+        jira = async_main.AsyncJiraClient(
+            server="https://jira.test", user="u", token="t",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json=pages.pop(0))))
+        try:
+            return await jira.search_issues("project = PRO", page_size=2)
+        finally:
+            await jira.aclose()
+
+    assert [issue.key for issue in asyncio.run(scenario())] == ["PRO-1", "PRO-2", "PRO-3"]
+
+
+def test_run_daily_async_syncs_history_store_and_cache(monkeypatch, tmp_path):
+    db_path, cache_path = str(tmp_path / "history.db"), str(tmp_path / "history.json")
+    monkeypatch.setattr(async_main, "HISTORY_DB_PATH", db_path)
+    monkeypatch.setattr(async_main, "HISTORY_CACHE_PATH", cache_path)
+    server = FakeJiraServer(issues=[], comments=[dict(HISTORY_COMMENT)])
+    run_async(server, make_groq("# asyncio\nОписание"), [("PRO-6", "Python")], monkeypatch)
+
+    # Тема записана в зеркало и отправлена в Jira потоком синхронизации
+    assert ("PUT", "issue/HIST-1/comment/1") in server.requests
+    store = HistoryStore(db_path)
+    assert store.get_themes("PRO-6") == ["GIL", "asyncio"]
+    assert store.unsynced() == {}
+    store.close()
+
+    # Второй запуск берёт комментарии из кеша: задача истории не менялась
+    server = FakeJiraServer(issues=[], comments=[dict(HISTORY_COMMENT)])
+    monkeypatch.setattr(async_main, "HISTORY_DB_PATH", "")
+    run_async(server, make_groq("# Корутины\nОписание"), [("PRO-6", "Python")], monkeypatch)
+    assert ("GET", "issue/HIST-1/comment") not in server.requests
+    assert ("GET", "issue/HIST-1") in server.requests
+
+
+def test_run_daily_async_logs_llm_cache_stats(monkeypatch):
+    cache = MagicMock()
+    monkeypatch.setattr(async_main, "get_llm_cache", lambda: cache)
+    server = FakeJiraServer(issues=[], comments=[HISTORY_COMMENT])
+    run_async(server, make_groq("# asyncio\nОписание"), [("PRO-6", "Python")], monkeypatch)
+    cache.log_stats.assert_called_once()
+
+
+def test_run_daily_async_fills_run_context_like_run_daily(monkeypatch, tmp_path):
+    # Паритет с main.run_daily: при включённых опциях заполнено всё состояние запуска
+    runs = []
+
+    def recording_run_context():
+        runs.append(main.RunContext())
+        return runs[-1]
+
+    monkeypatch.setattr(async_main, "RunContext", recording_run_context)
+    monkeypatch.setattr(async_main, "RUN_DEADLINE_SECONDS", 600)
+    monkeypatch.setattr(async_main, "PREGENERATED_TASKS_PATH", str(tmp_path / "tasks.db"))
+    monkeypatch.setattr(async_main, "HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    server = FakeJiraServer(issues=[], comments=[HISTORY_COMMENT])
+    run_async(server, make_groq("# asyncio\nОписание"), [("PRO-6", "Python")], monkeypatch)
+
+    (run,) = runs
+    missing = [f.name for f in dataclasses.fields(run) if getattr(run, f.name) is None]
+    assert missing == []
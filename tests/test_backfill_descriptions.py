@@ -0,0 +1,98 @@
+import json
+from unittest.mock import ANY, MagicMock, patch
+
+from core import backfill_descriptions as backfill
+from core.main import GROQ_NOT_FOUND_TASK
+
+
+def backlog_issue(key, epic_key, summary):
+    issue = MagicMock()
+    issue.key = key
+    issue.fields.summary = summary
+    issue.fields.parent.key = epic_key
+    return issue
+
+
+def test_missing_descriptions_jql_covers_all_epics_in_one_query():
+    jql = backfill.missing_descriptions_jql(["PRO-1", "PRO-3"])
+    assert "parent in (PRO-1, PRO-3)" in jql
+    assert "description is EMPTY" in jql
+    assert 'status = "Backlog"' in jql
+
+
+@patch("core.backfill_descriptions.jira_update_issue")
+@patch("core.backfill_descriptions.generate_description_for_existing_task")
+@patch("core.backfill_descriptions.jira_search_issues")
+def test_backfill_descriptions_writes_and_resumes(
+    mock_search, mock_generate, mock_update, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(backfill, "DRY_RUN", False)
+    monkeypatch.setattr(backfill, "PROJECT_SCHEDULE", {
+        0: [("PRO-1", "Английский"), ("PRO-3", "Алгоритмы")],
+        1: [("PRO-1", "Английский")],
+    })
+    progress_path = str(tmp_path / "progress.json")
+    issues = [
+        backlog_issue("PRO-10", "PRO-1", "Past Simple"),
+        backlog_issue("PRO-11", "PRO-3", "Быстрая сортировка"),
+    ]
+    mock_search.return_value = issues
+    mock_generate.side_effect = lambda groq, topic, theme: {
+        "summary": theme, "description": f"# {theme}\n{topic}"}
+
+    assert backfill.backfill_descriptions(MagicMock(), MagicMock(), workers=2, progress_path=progress_path) == 2
+
+    mock_search.assert_called_once()
+    assert mock_search.call_args.kwargs["maxResults"] is False
+    mock_generate.assert_any_call(ANY, "Алгоритмы", "Быстрая сортировка")
+    mock_update.assert_any_call(issues[0], {"description": "# Past Simple\nАнглийский"})
+    with open(progress_path, encoding="utf-8") as f:
+        assert json.load(f) == {"done": ["PRO-10", "PRO-11"]}
+
+    # Поиск может ещё вернуть обновлённые задачи: повторный запуск их пропускает
+    mock_generate.reset_mock()
+    assert backfill.backfill_descriptions(MagicMock(), MagicMock(), progress_path=progress_path) == 0
+    mock_generate.assert_not_called()
+
+
+@patch("core.backfill_descriptions.jira_update_issue")
+@patch("core.backfill_descriptions.generate_description_for_existing_task")
+@patch("core.backfill_descriptions.jira_search_issues")
+def test_backfill_descriptions_continues_after_failure(
+    mock_search, mock_generate, mock_update, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(backfill, "DRY_RUN", False)
+    monkeypatch.setattr(backfill, "PROJECT_SCHEDULE", {0: [("PRO-1", "Английский")]})
+    mock_search.return_value = [
+        backlog_issue("PRO-10", "PRO-1", "Past Simple"),
+        backlog_issue("PRO-11", "PRO-1", "Future Simple"),
+    ]
+    mock_generate.side_effect = [Exception("Groq error"), {"summary": "x", "description": "y"}]
+    progress_path = str(tmp_path / "progress.json")
+    assert backfill.backfill_descriptions(MagicMock(), MagicMock(), workers=1, progress_path=progress_path) == 1
+    assert mock_update.call_count == 1
+
+
+@patch("core.backfill_descriptions.jira_update_issue")
+@patch("core.backfill_descriptions.generate_description_for_existing_task")
+@patch("core.backfill_descriptions.jira_search_issues")
+def test_backfill_descriptions_skips_groq_not_found_stub(
+    mock_search, mock_generate, mock_update, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(backfill, "DRY_RUN", False)
+    monkeypatch.setattr(backfill, "PROJECT_SCHEDULE", {0: [("PRO-1", "Английский")]})
+    mock_search.return_value = [backlog_issue("PRO-10", "PRO-1", "Past Simple")]
+    mock_generate.return_value = dict(GROQ_NOT_FOUND_TASK)
+    progress_path = str(tmp_path / "progress.json")
+    assert backfill.backfill_descriptions(MagicMock(), MagicMock(), progress_path=progress_path) == 0
+    mock_update.assert_not_called()
+    assert backfill.BackfillProgress(progress_path).done == set()
+
+
+def test_backfill_progress_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "progress.json"
+    path.write_text('{"done": ["PRO-1"', encoding="utf-8")
+    progress = backfill.BackfillProgress(str(path))
+    assert progress.done == set()
+    progress.mark_done("PRO-2")
+    assert json.loads(path.read_text(encoding="utf-8")) == {"done": ["PRO-2"]}
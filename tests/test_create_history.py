@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock, patch
+
+import core.create_history as create_history
+
+
+def done_issue(key, summary):
+    issue = MagicMock()
+    issue.key = key
+    issue.fields.summary = summary
+    issue.fields.description = f"Описание {summary}"
+    issue.fields.comment.comments = []
+    return issue
+
+
+@patch("core.create_history.get_llm_cache", return_value=None)
+@patch("core.create_history.validate_epics", return_value={"PRO-1", "PRO-6"})
+@patch("core.create_history.update_topic_history")
+@patch("core.create_history.call_groq_generate_content")
+@patch("core.create_history.IssueSearch")
+@patch("core.create_history.HistorySnapshot.load")
+@patch("core.create_history.init_clients")
+def test_create_history_extracts_themes_for_all_issues(
+    mock_init, mock_load, mock_search, mock_call, mock_update, mock_validate, mock_cache, monkeypatch
+):
+    monkeypatch.setattr(create_history, "EPICS", [("PRO-1", "Английский"), ("PRO-6", "Python")])
+    monkeypatch.setattr(create_history, "CREATE_HISTORY_PACK_TOKENS", 0)
+    jira, groq_client = MagicMock(), MagicMock()
+    mock_init.return_value = (jira, groq_client)
+    history = mock_load.return_value
+    history.find.return_value = MagicMock()
+    history.iter_themes.return_value = iter(())
+    mock_search.side_effect = [
+        [done_issue("PRO-10", "Артикли"), done_issue("PRO-11", "Past Simple")],
+        [done_issue("PRO-20", "GIL")],
+    ]
+
+    def fake_call(client, prompt, limiter=None):
+        if prompt.startswith("Твоя задача из списка"):
+            return "final:" + prompt.rsplit("Список тем:\n", 1)[1]
+        return prompt.split("Название задачи: ", 1)[1].split("\n", 1)[0]
+
+    mock_call.side_effect = fake_call
+
+    create_history.main()
+
+    # По одному запросу на задачу и по одному итоговому на эпик, все через лимитер
+    assert mock_call.call_count == 5
+    assert all(call.kwargs["limiter"] is not None for call in mock_call.call_args_list)
+    mock_update.assert_any_call(jira, "PRO-1", "final:Артикли\nPast Simple", snapshot=history)
+    mock_update.assert_any_call(jira, "PRO-6", "final:GIL", snapshot=history)
+    history.save.assert_called_once()
+
+
+def test_pack_issues_respects_token_budget():
+    issues = [done_issue(f"PRO-{i}", "Тема " * 20) for i in range(10)]
+    block_tokens = create_history.estimate_tokens(create_history.issue_block(issues[0]))
+    packs = create_history.pack_issues(issues, block_tokens * 3)
+    assert [len(pack) for pack in packs] == [3, 3, 3, 1]
+    assert create_history.pack_issues(issues, 0) == [[issue] for issue in issues]
+
+
+def test_parse_packed_themes_maps_themes_to_issue_keys():
+    content = 'Вот ответ:\n{"PRO-10": ["Артикли", "Present Simple"], "PRO-11": "GIL", "PRO-99": ["x"]}'
+    assert create_history.parse_packed_themes(content, ["PRO-10", "PRO-11", "PRO-12"]) == {
+        "PRO-10": "Артикли\nPresent Simple",
+        "PRO-11": "GIL",
+    }
+    assert create_history.parse_packed_themes("не JSON", ["PRO-10"]) == {}
+
+
+@patch("core.create_history.call_groq_generate_content")
+def test_extract_themes_packs_issues_and_falls_back_for_missing_keys(mock_call):
+    issues = [done_issue("PRO-10", "Артикли"), done_issue("PRO-11", "Past Simple")]
+    mock_call.side_effect = ['{"PRO-10": ["Артикли"]}', "Past Simple"]
+    progress = create_history.Progress(2, "test")
+    result = create_history.extract_themes(MagicMock(), MagicMock(), "Английский", issues, progress)
+    assert result == {"PRO-10": "Артикли", "PRO-11": "Past Simple"}
+    packed_prompt = mock_call.call_args_list[0].args[1]
+    assert "PRO-10" in packed_prompt and "PRO-11" in packed_prompt
+    # Пропущенная в ответе задача переспрошена отдельным запросом
+    assert "Название задачи: Past Simple" in mock_call.call_args_list[1].args[1]
+    assert progress.done == 2
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import core.main as main
+from core.epic_cache import EpicCache
+
+
+def test_validate_epics_checks_all_keys_in_one_query(tmp_path):
+    jira = MagicMock()
+    jira.search_issues.return_value = [SimpleNamespace(key="PRO-1"), SimpleNamespace(key="PRO-3")]
+    cache = EpicCache(str(tmp_path / "epics.json"), ttl=3600)
+    assert main.validate_epics(jira, ["PRO-1", "PRO-3", "PRO-404", "PRO-1"], cache) == {"PRO-1", "PRO-3"}
+    jira.search_issues.assert_called_once_with(
+        "key in (PRO-1, PRO-3, PRO-404)", maxResults=3, fields="key", validate_query=False)
+
+
+def test_validate_epics_serves_fresh_epics_from_disk(tmp_path):
+    path = str(tmp_path / "epics.json")
+    jira = MagicMock()
+    jira.search_issues.return_value = [SimpleNamespace(key="PRO-1")]
+    main.validate_epics(jira, ["PRO-1", "PRO-404"], EpicCache(path, ttl=3600))
+    jira.search_issues.reset_mock()
+    jira.search_issues.return_value = []
+    # Существующий эпик берётся из файла, отсутствующий проверяется заново
+    assert main.validate_epics(jira, ["PRO-1", "PRO-404"], EpicCache(path, ttl=3600)) == {"PRO-1"}
+    jira.search_issues.assert_called_once_with(
+        "key in (PRO-404)", maxResults=1, fields="key", validate_query=False)
+
+
+def test_epic_cache_expires_entries(tmp_path):
+    cache = EpicCache(str(tmp_path / "epics.json"), ttl=60)
+    with patch("core.epic_cache.time.time", return_value=1000.0):
+        cache.update(["PRO-1"])
+    with patch("core.epic_cache.time.time", return_value=1061.0):
+        assert cache.stale(["PRO-1"]) == ["PRO-1"]
+
+
+def test_epic_exists_uses_run_validation():
+    jira = MagicMock()
+    run = main.RunContext(epics={"PRO-1"})
+    assert main.epic_exists(jira, "PRO-1", run) is True
+    assert main.epic_exists(jira, "PRO-404", run) is False
+    jira.issue.assert_not_called()
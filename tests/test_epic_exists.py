@@ -7,7 +7,7 @@ def test_epic_exists_success():
     jira = MagicMock()
     jira.issue.return_value = MagicMock()
     assert epic_exists(jira, "EPIC-1") is True
-    jira.issue.assert_called_once_with("EPIC-1")
+    jira.issue.assert_called_once_with("EPIC-1", fields="key")
 
 
 def test_epic_exists_failure_logs_error(caplog):
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from core.main import generate_new_task
+from core.main import DuplicateThemeError, generate_new_task
 
 
 def test_generate_new_task_success():
@@ -18,3 +18,62 @@ def test_generate_new_task_groq_exception():
         with pytest.raises(Exception) as excinfo:
             generate_new_task(groq_client, "history", "Test topic")
         assert "Groq error" in str(excinfo.value)
+
+
+def test_generate_new_task_regenerates_duplicate_theme():
+    groq_client = MagicMock()
+    contents = ["# Present perfect continuous\nDescription", "# Past Simple\nDescription"]
+    with patch("core.main.call_groq_generate_content", side_effect=contents) as mock_call:
+        result = generate_new_task(groq_client, "Present Perfect Continuous", "Английский")
+    assert result["summary"] == "Past Simple"
+    assert mock_call.call_count == 2
+    # Отклонённая тема попадает во второй промпт
+    assert "Present perfect continuous" in mock_call.call_args_list[1].args[1]
+
+
+def test_generate_new_task_gives_up_on_repeated_duplicates(monkeypatch):
+    monkeypatch.setattr("core.main.THEME_MAX_REGENERATIONS", 1)
+    groq_client = MagicMock()
+    with patch("core.main.call_groq_generate_content", return_value="# GIL\nDescription") as mock_call:
+        with pytest.raises(DuplicateThemeError):
+            generate_new_task(groq_client, "GIL", "Python")
+    assert mock_call.call_count == 2
+
+
+def stream_chunks(text, size=4):
+    for i in range(0, len(text), size):
+        delta = MagicMock()
+        delta.content = text[i:i + size]
+        chunk = MagicMock()
+        chunk.choices = [MagicMock(delta=delta)]
+        yield chunk
+
+
+class FakeStream:
+    def __init__(self, text):
+        self.chunks = list(stream_chunks(text))
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_generate_new_task_streaming_aborts_on_duplicate_heading(monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.GROQ_STREAM", True)
+    duplicate = FakeStream("# GIL\n" + "Очень длинное описание. " * 50)
+    fresh = FakeStream("# Декораторы\nОписание")
+    groq_client = MagicMock()
+    groq_client.chat.completions.create.side_effect = [duplicate, fresh]
+    result = generate_new_task(groq_client, "GIL", "Python")
+    assert result == {"summary": "Декораторы", "description": "# Декораторы\nОписание"}
+    assert duplicate.closed and fresh.closed
+    # Первый поток оборван сразу после заголовка
+    assert duplicate.consumed < len(duplicate.chunks)
+    assert groq_client.chat.completions.create.call_args.kwargs["stream"] is True
@@ -0,0 +1,67 @@
+import pytest
+from types import SimpleNamespace
+from core.history import (
+    HistoryIndex,
+    format_topic_history_comment,
+    parse_topic_key,
+    parse_topic_name,
+    parse_topic_part,
+)
+
+
+def make_comment(body):
+    return SimpleNamespace(body=body)
+
+
+@pytest.mark.parametrize(
+    "body,expected",
+    [
+        ("Топик: test\nКлюч топика: PRO-1\n\nИстория топика:", "PRO-1"),
+        ("Ключ топика:   PRO-10  \nИстория топика:\nPRO-1", "PRO-10"),
+        ("Ключ топика:\nИстория топика:", None),
+        ("Просто текст", None),
+    ]
+)
+def test_parse_topic_key(body, expected):
+    assert parse_topic_key(body) == expected
+
+
+def test_history_index_exact_lookup():
+    one = make_comment("Ключ топика: PRO-1\nИстория топика:")
+    ten = make_comment("Ключ топика: PRO-10\nИстория топика:")
+    index = HistoryIndex([ten, one])
+    assert index.get("PRO-1") is one
+    assert index.get("PRO-10") is ten
+    assert index.get("PRO-100") is None
+    assert len(index) == 2
+
+
+def test_history_index_incremental_add_keeps_first():
+    first = make_comment("Ключ топика: PRO-1\nИстория топика:")
+    duplicate = make_comment("Ключ топика: PRO-1\nИстория топика:\nДубль")
+    index = HistoryIndex()
+    assert "PRO-1" not in index
+    assert index.add(first) == "PRO-1"
+    assert index.add(duplicate) == "PRO-1"
+    assert index.add(make_comment("Без ключа")) is None
+    assert index.get("PRO-1") is first
+
+
+def test_history_index_orders_segments_by_part():
+    head = make_comment("Топик: t\nКлюч топика: PRO-1\n\nИстория топика:\nA")
+    third = make_comment(
+        "Топик: t\nКлюч топика: PRO-1\nЧасть: 3\n\nИстория топика:\nC")
+    second = make_comment(
+        "Топик: t\nКлюч топика: PRO-1\nЧасть: 2\n\nИстория топика:\nB")
+    index = HistoryIndex([third, head, second])
+    assert index.segments("PRO-1") == [head, second, third]
+    assert index.get("PRO-1") is head
+    assert index.latest("PRO-1") is third
+
+
+def test_format_topic_history_comment_roundtrip():
+    body = format_topic_history_comment("Python", "PRO-6", 2, ["GIL", "asyncio"])
+    assert parse_topic_key(body) == "PRO-6"
+    assert parse_topic_part(body) == 2
+    assert parse_topic_name(body) == "Python"
+    assert parse_topic_part(format_topic_history_comment("Python", "PRO-6")) == 1
@@ -0,0 +1,141 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import core.main as main
+from core.history import HistorySnapshot
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr("core.history.HISTORY_COMMENTS_PAGE_SIZE", 2)
+
+
+def make_comment(epic_key, themes=""):
+    comment = MagicMock()
+    comment.body = f"Топик: test\nКлюч топика: {epic_key}\n\nИстория топика:{themes}"
+    return comment
+
+
+class FakeJira:
+    """Эмулирует постраничный эндпоинт комментариев Jira."""
+
+    def __init__(self, raw_comments, issue_updated=None):
+        self.raw_comments = raw_comments
+        self.issue_updated = issue_updated
+        self.requests = []
+        self._options = {}
+        self._session = None
+
+    def _get_json(self, path, params=None):
+        self.requests.append(params)
+        start, size = params["startAt"], params["maxResults"]
+        return {
+            "comments": self.raw_comments[start:start + size],
+            "total": len(self.raw_comments),
+        }
+
+    def issue(self, key, fields=None):
+        return SimpleNamespace(fields=SimpleNamespace(updated=self.issue_updated))
+
+
+def make_raw(comment_id, epic_key, updated="2024-01-01T10:00:00.000+0000"):
+    return {
+        "id": str(comment_id),
+        "body": f"Топик: test\nКлюч топика: {epic_key}\n\nИстория топика:",
+        "updated": updated,
+    }
+
+
+def test_history_snapshot_load_pages_through_comments():
+    jira = FakeJira([make_raw(i, f"EPIC-{i}") for i in range(1, 6)])
+    snapshot = HistorySnapshot.load(jira, "HIST-1", cache_path="")
+    assert [r["startAt"] for r in jira.requests] == [0, 2, 4]
+    assert all(r["maxResults"] == 2 for r in jira.requests)
+    assert snapshot.find("EPIC-5").id == "5"
+    assert len(snapshot.comments) == 5
+
+
+def test_history_snapshot_incremental_fetch_from_cache(tmp_path):
+    cache_path = str(tmp_path / "history.json")
+    raws = [make_raw(1, "EPIC-1"), make_raw(2, "EPIC-2")]
+    HistorySnapshot.load(FakeJira(raws), "HIST-1", cache_path=cache_path).save()
+
+    # Задача истории не менялась — комментарии не запрашиваются вовсе
+    jira = FakeJira(raws, issue_updated="2024-01-01T10:00:00.000+0000")
+    snapshot = HistorySnapshot.load(jira, "HIST-1", cache_path=cache_path)
+    assert jira.requests == []
+    assert snapshot.find("EPIC-2").id == "2"
+
+    # Задачу меняли после сохранения кеша — комментарии загружаются заново
+    raws.append(make_raw(3, "EPIC-3", updated="2024-01-02T10:00:00.000+0000"))
+    jira = FakeJira(raws, issue_updated="2024-01-02T10:00:00.000+0000")
+    snapshot = HistorySnapshot.load(jira, "HIST-1", cache_path=cache_path)
+    assert [r["startAt"] for r in jira.requests] == [0, 2]
+    assert snapshot.find("EPIC-3").id == "3"
+    assert len(snapshot.comments) == 3
+
+
+def test_history_snapshot_sees_old_comment_edited_before_new_one(tmp_path):
+    cache_path = str(tmp_path / "history.json")
+    raws = [make_raw(1, "EPIC-1"), make_raw(2, "EPIC-2")]
+    HistorySnapshot.load(FakeJira(raws), "HIST-1", cache_path=cache_path).save()
+
+    # Старый комментарий отредактирован, а затем добавлен новый
+    changed = [
+        make_raw(1, "EPIC-10", updated="2024-01-02T09:00:00.000+0000"),
+        raws[1],
+        make_raw(3, "EPIC-3", updated="2024-01-02T10:00:00.000+0000"),
+    ]
+    jira = FakeJira(changed, issue_updated="2024-01-02T10:00:00.000+0000")
+    snapshot = HistorySnapshot.load(jira, "HIST-1", cache_path=cache_path)
+    assert snapshot.find("EPIC-10").id == "1"
+    assert snapshot.find("EPIC-1") is None
+    assert snapshot.find("EPIC-3").id == "3"
+
+
+def test_history_snapshot_reloads_when_comments_changed(tmp_path):
+    cache_path = str(tmp_path / "history.json")
+    raws = [make_raw(1, "EPIC-1"), make_raw(2, "EPIC-2")]
+    HistorySnapshot.load(FakeJira(raws), "HIST-1", cache_path=cache_path).save()
+
+    # Комментарий отредактирован вне нашего процесса — полная перезагрузка
+    edited = [make_raw(1, "EPIC-10", updated="2024-01-03T10:00:00.000+0000"), raws[1]]
+    jira = FakeJira(edited, issue_updated="2024-01-03T10:00:00.000+0000")
+    snapshot = HistorySnapshot.load(jira, "HIST-1", cache_path=cache_path)
+    assert jira.requests[-1]["startAt"] == 0
+    assert snapshot.find("EPIC-10").id == "1"
+    assert snapshot.find("EPIC-1") is None
+
+
+def test_history_snapshot_add_and_apply_update():
+    snapshot = HistorySnapshot([])
+    comment = make_comment("EPIC-1")
+    snapshot.add(comment)
+    assert snapshot.find("EPIC-1") is comment
+    snapshot.apply_update(comment, comment.body + "\nTheme")
+    assert comment.body.endswith("\nTheme")
+
+
+def test_get_and_update_topic_history_share_snapshot():
+    jira = MagicMock()
+    comment = make_comment("EPIC-1", "\nTheme1")
+    snapshot = HistorySnapshot([comment])
+    with patch("core.main.DRY_RUN", False):
+        assert main.get_topic_history(
+            jira, "EPIC-1", "test", snapshot=snapshot) == "Theme1"
+        main.update_topic_history(jira, "EPIC-1", "Theme2", snapshot=snapshot)
+        # Следующий эпик видит обновление без повторной загрузки задачи истории
+        assert main.get_topic_history(
+            jira, "EPIC-1", "test", snapshot=snapshot) == "Theme1\nTheme2"
+    jira.issue.assert_not_called()
+    comment.update.assert_called_once()
+
+
+def test_get_topic_history_registers_created_comment():
+    jira = MagicMock()
+    snapshot = HistorySnapshot([])
+    created = make_comment("EPIC-1")
+    with patch("core.main.create_topic_history_comment", return_value=created):
+        assert main.get_topic_history(
+            jira, "EPIC-1", "test", snapshot=snapshot) == ""
+    assert snapshot.find("EPIC-1") is created
@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import ANY, MagicMock, patch
+import core.main as main
+from core.history import HistorySnapshot
+from core.history_store import HistoryStore, HistorySync
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def write_all(snapshot, epic_key, themes, on_written):
+    on_written(len(themes))
+    return True
+
+
+def make_comment(epic_key, themes):
+    comment = MagicMock()
+    comment.body = (
+        f"Топик: test\nКлюч топика: {epic_key}\n\nИстория топика:\n" + "\n".join(themes))
+    return comment
+
+
+def test_history_store_seed_and_incremental_pull(store):
+    assert not store.has_epic("PRO-1")
+    assert store.pull("PRO-1", ["A", "B"]) == 2
+    assert store.has_epic("PRO-1")
+    assert store.get_history("PRO-1") == "A\nB"
+    # Повторная синхронизация добавляет только новые темы
+    assert store.pull("PRO-1", ["A", "B", "C"]) == 1
+    assert store.get_themes("PRO-1") == ["A", "B", "C"]
+
+
+def test_history_store_seeds_empty_history(store):
+    assert store.pull("PRO-1", []) == 0
+    assert store.has_epic("PRO-1")
+    assert store.get_history("PRO-1") == ""
+
+
+def test_history_store_unsynced_and_mark_synced(store):
+    store.pull("PRO-1", ["A"])
+    store.add_theme("PRO-1", "B")
+    store.add_theme("PRO-3", "X")
+    assert store.unsynced() == {"PRO-1": ["B"], "PRO-3": ["X"]}
+    assert store.unsynced_rows()["PRO-1"] == [(2, "B")]
+    store.mark_synced("PRO-1", [2])
+    assert store.unsynced() == {"PRO-3": ["X"]}
+    # Тема, уже попавшая в Jira, не дублируется при следующем pull
+    assert store.pull("PRO-3", ["X"]) == 0
+    assert store.unsynced() == {}
+    assert store.get_themes("PRO-3") == ["X"]
+
+
+def test_history_sync_pulls_then_pushes(store):
+    snapshot = HistorySnapshot([make_comment("PRO-1", ["A"])])
+    push = MagicMock(side_effect=write_all)
+    sync = HistorySync(store, lambda: snapshot, push)
+    sync.start(["PRO-1", "PRO-3"])
+    assert sync.wait_ready(timeout=5) is snapshot
+    assert store.get_themes("PRO-1") == ["A"]
+    assert not store.has_epic("PRO-3")
+
+    store.add_theme("PRO-1", "B")
+    sync.schedule()
+    sync.close(timeout=5)
+    push.assert_called_once_with(snapshot, "PRO-1", ["B"], ANY)
+    assert store.unsynced() == {}
+
+
+def test_history_sync_keeps_themes_when_push_fails(store):
+    push = MagicMock(side_effect=Exception("Jira down"))
+    sync = HistorySync(store, lambda: HistorySnapshot([]), push)
+    sync.start()
+    sync.wait_ready(timeout=5)
+    store.add_theme("PRO-1", "B")
+    sync.close(timeout=5)
+    assert store.unsynced() == {"PRO-1": ["B"]}
+
+
+def test_history_sync_does_not_repush_themes_written_before_failure(store):
+    snapshot = HistorySnapshot([make_comment("PRO-1", ["A", "B"])])
+    pushed = []
+
+    def push(snapshot, epic_key, themes, on_written):
+        pushed.append(themes)
+        if len(pushed) == 1:
+            # Первый комментарий записан, на втором Jira упала
+            on_written(1)
+            raise Exception("Jira down")
+        return write_all(snapshot, epic_key, themes, on_written)
+
+    store.pull("PRO-1", ["A", "B"])
+    # Повтор последней темы истории — обычная тема, а не уже записанная
+    store.add_theme("PRO-1", "B")
+    store.add_theme("PRO-1", "C")
+    sync = HistorySync(store, lambda: snapshot, push)
+    sync.snapshot = snapshot
+    assert sync.push_pending() == 0
+    assert store.unsynced() == {"PRO-1": ["C"]}
+    assert sync.push_pending() == 1
+    assert pushed == [["B", "C"], ["C"]]
+    assert store.unsynced() == {}
+
+
+def test_history_sync_close_pushes_themes_recorded_during_last_push(store):
+    def push(snapshot, epic_key, themes, on_written):
+        if push.call_count == 1:
+            # Тема записана, пока фоновый поток отправлял предыдущие
+            store.add_theme("PRO-1", "C")
+        return write_all(snapshot, epic_key, themes, on_written)
+    push = MagicMock(side_effect=push)
+
+    sync = HistorySync(store, lambda: HistorySnapshot([make_comment("PRO-1", [])]), push)
+    sync.start()
+    sync.wait_ready(timeout=5)
+    store.add_theme("PRO-1", "B")
+    sync.close(timeout=5)
+    assert [c.args[2] for c in push.call_args_list] == [["B"], ["C"]]
+    assert store.unsynced() == {}
+
+
+def test_history_sync_retries_loading_snapshot(store):
+    snapshot = HistorySnapshot([make_comment("PRO-1", ["A"])])
+    load = MagicMock(side_effect=[Exception("Jira down"), snapshot])
+    push = MagicMock(side_effect=write_all)
+    sync = HistorySync(store, load, push)
+    sync.start(["PRO-1"])
+    assert sync.wait_ready(timeout=5) is None
+    store.add_theme("PRO-1", "B")
+    sync.close(timeout=5)
+    assert sync.snapshot is snapshot
+    push.assert_called_once_with(snapshot, "PRO-1", ["B"], ANY)
+    assert store.unsynced() == {}
+
+
+def test_read_topic_history_prefers_local_store(store):
+    store.pull("PRO-1", ["A", "B"])
+    sync = MagicMock()
+    run = main.RunContext(history_store=store, history_sync=sync)
+    with patch("core.main.get_topic_history") as mock_get:
+        assert main.read_topic_history(MagicMock(), "PRO-1", "test", run) == "A\nB"
+    mock_get.assert_not_called()
+    sync.wait_ready.assert_not_called()
+
+
+def test_record_topic_theme_writes_locally_and_schedules_push(store, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    sync = MagicMock()
+    run = main.RunContext(history_store=store, history_sync=sync)
+    with patch("core.main.update_topic_history") as mock_update:
+        main.record_topic_theme(MagicMock(), "PRO-1", "Theme", run)
+    mock_update.assert_not_called()
+    assert store.unsynced() == {"PRO-1": ["Theme"]}
+    sync.schedule.assert_called_once()
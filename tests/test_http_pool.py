@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from deadline import deadline_scope
+from http_pool import ConnectionStats, configure_requests_session, groq_http_client, requests_pool_stats
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_configure_requests_session_sizes_pool_and_reuses_connections(server_url):
+    session = requests.Session()
+    configure_requests_session(session, size=16)
+    adapter = session.get_adapter(server_url)
+    assert adapter._pool_maxsize == 16
+    assert session.headers["Accept-Encoding"] == "gzip, deflate"
+    for _ in range(3):
+        session.get(server_url, timeout=5).raise_for_status()
+    assert requests_pool_stats(session) == (3, 1)
+
+
+def test_requests_session_caps_timeout_by_deadline(server_url, monkeypatch):
+    session = requests.Session()
+    configure_requests_session(session, size=2)
+    sent = []
+    send = requests.adapters.HTTPAdapter.send
+    monkeypatch.setattr(requests.adapters.HTTPAdapter, "send",
+                        lambda self, request, **kw: sent.append(kw["timeout"]) or send(self, request, **kw))
+    session.get(server_url, timeout=(5, 60)).raise_for_status()
+    with deadline_scope(2):
+        session.get(server_url, timeout=(5, 60)).raise_for_status()
+    assert sent[0] == (5, 60)
+    assert sent[1][0] == 5 and 0 < sent[1][1] <= 2
+
+
+def test_connection_stats_counts_httpx_connections(server_url):
+    stats = ConnectionStats("Groq")
+    with groq_http_client(stats, size=4) as client:
+        for _ in range(3):
+            client.get(server_url).raise_for_status()
+    assert (stats.requests, stats.connections) == (3, 1)
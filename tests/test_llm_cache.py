@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from core.llm_cache import LLMCache, cache_key
+from core.main import call_groq_generate_content
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.db"), ttl=3600, max_bytes=1024)
+    yield cache
+    cache.close()
+
+
+def test_llm_cache_hit_and_miss_counters(cache):
+    assert cache.get("model", "prompt") is None
+    cache.set("model", "prompt", "answer")
+    assert cache.get("model", "prompt") == "answer"
+    # Ключ учитывает модель
+    assert cache.get("other-model", "prompt") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache_key("model", "prompt") != cache_key("other-model", "prompt")
+
+
+def test_llm_cache_log_stats_reports_per_run(cache, caplog):
+    cache.get("model", "prompt")
+    with caplog.at_level("INFO"):
+        cache.log_stats()
+        cache.log_stats()
+    assert [r.getMessage() for r in caplog.records] == [
+        "LLM cache: 0 hits, 1 misses", "LLM cache: 0 hits, 0 misses"]
+
+
+def test_llm_cache_ttl_expiry(cache):
+    with patch("core.llm_cache.time.time", return_value=1000.0):
+        cache.set("model", "prompt", "answer")
+    with patch("core.llm_cache.time.time", return_value=1000.0 + 3601):
+        assert cache.get("model", "prompt") is None
+
+
+def test_llm_cache_evicts_least_recently_used(cache):
+    with patch("core.llm_cache.time.time", return_value=1000.0):
+        cache.set("model", "old", "x" * 400)
+    with patch("core.llm_cache.time.time", return_value=1001.0):
+        cache.set("model", "recent", "y" * 400)
+    with patch("core.llm_cache.time.time", return_value=1002.0):
+        # "old" использовался последним и должен пережить вытеснение
+        assert cache.get("model", "old") == "x" * 400
+    with patch("core.llm_cache.time.time", return_value=1003.0):
+        cache.set("model", "new", "z" * 400)
+        assert cache.get("model", "recent") is None
+        assert cache.get("model", "old") == "x" * 400
+        assert cache.get("model", "new") == "z" * 400
+
+
+def make_groq(content):
+    groq_client = MagicMock()
+    groq_client.chat.completions.create.return_value.choices = [MagicMock()]
+    groq_client.chat.completions.create.return_value.choices[0].message.content = content
+    return groq_client
+
+
+def test_call_groq_generate_content_uses_cache(cache):
+    groq_client = make_groq("Generated")
+    with patch("core.main.DRY_RUN", False), \
+            patch("core.main.get_llm_cache", return_value=cache):
+        assert call_groq_generate_content(groq_client, "prompt") == "Generated"
+        assert call_groq_generate_content(groq_client, "prompt") == "Generated"
+    groq_client.chat.completions.create.assert_called_once()
+
+
+def test_call_groq_generate_content_cache_opt_out(cache):
+    groq_client = make_groq("Generated")
+    with patch("core.main.DRY_RUN", False), \
+            patch("core.main.get_llm_cache", return_value=cache):
+        call_groq_generate_content(groq_client, "prompt", use_cache=False)
+        call_groq_generate_content(groq_client, "prompt", use_cache=False)
+    assert groq_client.chat.completions.create.call_count == 2
+    assert (cache.hits, cache.misses) == (0, 0)
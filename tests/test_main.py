@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 from core.main import (
     epic_exists,
     generate_new_task,
@@ -67,18 +67,21 @@ def test_transition_issue_to_status_no_transition(monkeypatch, caplog):
 
 def test_notify_success(monkeypatch):
     monkeypatch.setattr("core.main.DRY_RUN", False)
-    with patch("core.main.requests.post"):
-        notify("ISSUE-1", "msg")
+    outbox = MagicMock()
+    monkeypatch.setattr("core.main.get_outbox", lambda: outbox)
+    notify("ISSUE-1", "msg")
+    outbox.send.assert_called_once_with(ANY, "msg", context="ISSUE-1")
 
 
 def test_get_topic_history_success():
     jira = MagicMock()
-    jira.issue.return_value.fields.comment.comments = []
-    comment = MagicMock()
-    comment.body = (
-        "Топик: Test\nКлюч топика: PRO-1\n\nИстория топика:\nTheme1\nTheme2"
-    )
-    with patch("core.main.seek_topic_history_comment", return_value=comment):
-        result = get_topic_history(jira, "PRO-1", "Test")
-        assert isinstance(result, str)
-        assert "Theme1" in result and "Theme2" in result
+    jira._get_json.return_value = {
+        "comments": [{
+            "id": "1",
+            "body": "Топик: Test\nКлюч топика: PRO-1\n\nИстория топика:\nTheme1\nTheme2",
+        }],
+        "total": 1,
+    }
+    result = get_topic_history(jira, "PRO-1", "Test")
+    assert isinstance(result, str)
+    assert "Theme1" in result and "Theme2" in result
@@ -19,7 +19,7 @@ def fields():
     return {"summary": "Test", "description": "Desc"}
 
 
-@patch("core.main.retry", lambda *a, **kw: (lambda f: f))
+@patch("core.main.service_retry", lambda *a, **kw: (lambda f: f))
 def test_jira_create_issue(jira_mock, fields):
     expected_issue = MagicMock()
     jira_mock.create_issue.return_value = expected_issue
@@ -28,7 +28,7 @@ def test_jira_create_issue(jira_mock, fields):
     assert result == expected_issue
 
 
-@patch("core.main.retry", lambda *a, **kw: (lambda f: f))
+@patch("core.main.service_retry", lambda *a, **kw: (lambda f: f))
 def test_jira_transition_issue(jira_mock, issue_mock):
     jira_mock.transition_issue.return_value = None
     result = main.jira_transition_issue(jira_mock, issue_mock, "123")
@@ -36,7 +36,7 @@ def test_jira_transition_issue(jira_mock, issue_mock):
     assert result is None
 
 
-@patch("core.main.retry", lambda *a, **kw: (lambda f: f))
+@patch("core.main.service_retry", lambda *a, **kw: (lambda f: f))
 def test_jira_add_comment(jira_mock):
     jira_mock.add_comment.return_value = "comment"
     result = main.jira_add_comment(jira_mock, "ISSUE-1", "msg")
@@ -44,7 +44,7 @@ def test_jira_add_comment(jira_mock):
     assert result == "comment"
 
 
-@patch("core.main.retry", lambda *a, **kw: (lambda f: f))
+@patch("core.main.service_retry", lambda *a, **kw: (lambda f: f))
 def test_jira_issue(jira_mock, issue_mock):
     jira_mock.issue.return_value = issue_mock
     result = main.jira_issue(jira_mock, "ISSUE-1")
@@ -75,3 +75,67 @@ def test_jira_search_issues_raises(monkeypatch):
     mock_jira.search_issues.side_effect = Exception("Jira error")
     with pytest.raises(Exception):
         main.jira_search_issues(mock_jira, "project = TEST")
+
+
+def test_jira_search_issues_with_projection():
+    mock_jira = MagicMock()
+    main.jira_search_issues(mock_jira, "project = TEST", fields="summary,status", expand="names")
+    mock_jira.search_issues.assert_called_once_with(
+        "project = TEST", maxResults=1000, fields="summary,status", expand="names")
+
+
+@patch("core.main.jira_search_issues", return_value=[])
+def test_find_epic_issues_requests_only_used_fields(mock_search):
+    main.find_epic_issues(MagicMock(), "PRO-1", main.STATUS_BACKLOG)
+    assert mock_search.call_args.kwargs["fields"] == main.EPIC_ISSUE_FIELDS
+
+
+def search_page(issues, total):
+    page = list(issues)
+    page = type("ResultList", (list,), {})(page)
+    page.total = total
+    return page
+
+
+def test_issue_search_fetches_pages_lazily():
+    mock_jira = MagicMock()
+    mock_jira.search_issues.side_effect = [
+        search_page(["I-1", "I-2"], 5), search_page(["I-3", "I-4"], 5), search_page(["I-5"], 5)]
+    search = main.IssueSearch(mock_jira, "project = TEST", page_size=2, fields="summary")
+    iterator = iter(search)
+    assert [next(iterator), next(iterator)] == ["I-1", "I-2"]
+    assert mock_jira.search_issues.call_count == 1
+    assert list(iterator) == ["I-3", "I-4", "I-5"]
+    assert mock_jira.search_issues.call_count == 3
+    mock_jira.search_issues.assert_called_with(
+        "project = TEST", maxResults=2, fields="summary", startAt=4)
+
+
+def test_issue_search_follows_total_past_short_pages():
+    mock_jira = MagicMock()
+    mock_jira.search_issues.side_effect = [
+        search_page(["I-1"], 3), search_page(["I-2", "I-3"], 3)]
+    search = main.IssueSearch(mock_jira, "project = TEST", page_size=2)
+    assert list(search) == ["I-1", "I-2", "I-3"]
+    assert mock_jira.search_issues.call_count == 2
+
+
+def test_issue_search_first_and_exists_request_single_result():
+    mock_jira = MagicMock()
+    mock_jira.search_issues.return_value = search_page(["I-1"], 40)
+    search = main.IssueSearch(mock_jira, "project = TEST")
+    assert search.first() == "I-1"
+    mock_jira.search_issues.assert_called_once_with("project = TEST", maxResults=1)
+    assert search.exists() is True
+    mock_jira.search_issues.assert_called_with("project = TEST", maxResults=1, fields="key")
+    mock_jira.search_issues.return_value = search_page([], 0)
+    assert search.first() is None
+    assert search.exists() is False
+
+
+@patch("core.main.jira_search_issues")
+def test_find_epic_issues_with_limit_stops_after_first_page(mock_search):
+    mock_search.return_value = search_page(["I-1"], 30)
+    assert main.find_epic_issues(MagicMock(), "PRO-1", main.STATUS_IN_PROGRESS, limit=1) == ["I-1"]
+    mock_search.assert_called_once()
+    assert mock_search.call_args.kwargs["maxResults"] == 1
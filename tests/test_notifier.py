@@ -0,0 +1,118 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from core.notifier import TelegramOutbox
+from core.rate_limit import TokenBucket
+
+
+def response(status_code, payload=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.json.return_value = payload or {}
+    return resp
+
+
+def outbox_with(session, **kwargs):
+    kwargs.setdefault("global_rate", 1000)
+    kwargs.setdefault("chat_rate", 1000)
+    kwargs.setdefault("backoff_base", 0.01)
+    return TelegramOutbox(url="http://telegram/send", session=session, **kwargs)
+
+
+def test_token_bucket_delays_after_burst():
+    with patch("core.rate_limit.time.monotonic", return_value=100.0):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        # Третий токен появится через 1/rate секунды
+        assert bucket.reserve() == 0.5
+    with patch("core.rate_limit.time.monotonic", return_value=101.0):
+        # За секунду набралось два токена, один из них ушёл на долг
+        assert bucket.reserve() == 0
+
+
+def test_outbox_sends_over_shared_session():
+    session = MagicMock()
+    session.post.return_value = response(200)
+    outbox = outbox_with(session)
+    outbox.send("chat", "one", context="PRO-1")
+    outbox.send("chat", "two", context="PRO-2")
+    assert outbox.flush(timeout=5)
+    assert outbox.sent == 2
+    texts = [call.kwargs["data"]["text"] for call in session.post.call_args_list]
+    assert texts == ["one", "two"]
+    assert all(call.kwargs["timeout"] for call in session.post.call_args_list)
+
+
+def test_outbox_honors_retry_after_on_429():
+    session = MagicMock()
+    session.post.side_effect = [
+        response(429, {"ok": False, "parameters": {"retry_after": 0.05}}),
+        response(200),
+    ]
+    outbox = outbox_with(session)
+    started = time.monotonic()
+    outbox.send("chat", "msg")
+    assert outbox.flush(timeout=5)
+    assert time.monotonic() - started >= 0.05
+    assert session.post.call_count == 2
+    assert outbox.sent == 1
+
+
+def test_outbox_gives_up_after_max_attempts():
+    session = MagicMock()
+    session.post.side_effect = requests.ConnectionError("down")
+    outbox = outbox_with(session, max_attempts=3)
+    outbox.send("chat", "msg")
+    assert outbox.flush(timeout=5)
+    assert session.post.call_count == 3
+    assert outbox.failed == 1
+
+
+def test_outbox_does_not_retry_bad_request():
+    session = MagicMock()
+    session.post.return_value = response(400)
+    outbox = outbox_with(session)
+    outbox.send("chat", "msg")
+    assert outbox.flush(timeout=5)
+    assert session.post.call_count == 1
+    assert outbox.failed == 1
+
+
+def test_outbox_send_does_not_wait_for_delivery():
+    release = threading.Event()
+    session = MagicMock()
+    session.post.side_effect = lambda *a, **k: release.wait(5) and response(200)
+    outbox = outbox_with(session)
+    started = time.monotonic()
+    outbox.send("chat", "msg")
+    assert time.monotonic() - started < 0.5
+    assert not outbox.flush(timeout=0.05)
+    release.set()
+    assert outbox.flush(timeout=5)
+
+
+def test_outbox_survives_unexpected_errors():
+    session = MagicMock()
+    session.post.side_effect = [RuntimeError("boom"), response(200)]
+    outbox = outbox_with(session)
+    outbox.send("chat", "msg")
+    assert outbox.flush(timeout=5)
+    assert outbox.sent == 1
+
+
+def test_outbox_falls_back_to_backoff_on_malformed_429():
+    session = MagicMock()
+    session.post.side_effect = [
+        response(429, {"ok": False, "parameters": {"retry_after": "soon"}}),
+        response(429, {"ok": False, "parameters": None}),
+        response(200),
+    ]
+    outbox = outbox_with(session)
+    outbox.send("chat", "msg")
+    assert outbox.flush(timeout=5)
+    assert session.post.call_count == 3
+    assert outbox.sent == 1
@@ -0,0 +1,62 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import core.main as main
+
+
+def make_issue(key, parent, status):
+    return SimpleNamespace(
+        key=key,
+        fields=SimpleNamespace(
+            parent=SimpleNamespace(key=parent),
+            status=SimpleNamespace(name=status),
+        ),
+    )
+
+
+def test_prefetch_epic_issues_single_query_split_by_epic_and_status():
+    issues = [
+        make_issue("PRO-10", "PRO-1", main.STATUS_BACKLOG),
+        make_issue("PRO-11", "PRO-3", main.STATUS_IN_PROGRESS),
+        make_issue("PRO-12", "PRO-1", main.STATUS_BACKLOG),
+        make_issue("PRO-13", "PRO-1", main.STATUS_IN_PROGRESS),
+    ]
+    jira = MagicMock()
+    with patch("core.main.jira_search_issues", return_value=issues) as mock_search:
+        result = main.prefetch_epic_issues(jira, ["PRO-1", "PRO-3", "PRO-1"])
+
+    mock_search.assert_called_once()
+    jql = mock_search.call_args[0][1]
+    assert "parent in (PRO-1, PRO-3)" in jql
+    assert mock_search.call_args.kwargs["maxResults"] is False
+    assert [i.key for i in result["PRO-1"][main.STATUS_BACKLOG]] == [
+        "PRO-10", "PRO-12"]
+    assert [i.key for i in result["PRO-1"][main.STATUS_IN_PROGRESS]] == [
+        "PRO-13"]
+    assert [i.key for i in result["PRO-3"][main.STATUS_IN_PROGRESS]] == [
+        "PRO-11"]
+    assert result["PRO-3"][main.STATUS_BACKLOG] == []
+
+
+def test_prefetch_epic_issues_no_epics():
+    with patch("core.main.jira_search_issues") as mock_search:
+        assert main.prefetch_epic_issues(MagicMock(), []) == {}
+    mock_search.assert_not_called()
+
+
+def test_find_epic_issues_uses_run_snapshot():
+    issue = make_issue("PRO-10", "PRO-1", main.STATUS_BACKLOG)
+    run = main.RunContext(epic_issues={
+        "PRO-1": {main.STATUS_IN_PROGRESS: [], main.STATUS_BACKLOG: [issue]}})
+    with patch("core.main.jira_search_issues") as mock_search:
+        assert main.find_epic_issues(
+            MagicMock(), "PRO-1", main.STATUS_BACKLOG, run) == [issue]
+    mock_search.assert_not_called()
+
+
+def test_find_epic_issues_falls_back_to_search():
+    run = main.RunContext(epic_issues={})
+    with patch("core.main.jira_search_issues", return_value=[]) as mock_search:
+        main.find_epic_issues(MagicMock(), "PRO-1", main.STATUS_BACKLOG, run)
+    jql = mock_search.call_args[0][1]
+    assert "parent = PRO-1" in jql and "ORDER BY key ASC" in jql
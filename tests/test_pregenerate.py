@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import core.main as main
+from core.task_store import PregeneratedTaskStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PregeneratedTaskStore(str(tmp_path / "tasks.db"))
+    yield store
+    store.close()
+
+
+def test_task_store_put_peek_and_delete_in_order(store):
+    store.put("PRO-1", "Python", {"summary": "GIL", "description": "# GIL"})
+    store.put("PRO-1", "Python", {"summary": "Декораторы", "description": "# Декораторы"})
+    assert store.count("PRO-1", "Python") == 2
+    assert store.count("PRO-1", "Другой топик") == 0
+    task_id, task = store.peek("PRO-1", "Python")
+    assert task == {"summary": "GIL", "description": "# GIL"}
+    # peek не удаляет задачу: её удаляют только после создания в Jira
+    assert store.peek("PRO-1", "Python") == (task_id, task)
+    store.delete(task_id)
+    assert store.peek("PRO-1", "Python")[1]["summary"] == "Декораторы"
+    store.delete(store.peek("PRO-1", "Python")[0])
+    assert store.peek("PRO-1", "Python") is None
+
+
+def test_take_pregenerated_task_skips_themes_already_in_history(store, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    store.put("PRO-1", "Python", {"summary": "GIL", "description": "# GIL"})
+    store.put("PRO-1", "Python", {"summary": "Генераторы", "description": "# Генераторы"})
+    run = main.RunContext(task_store=store)
+    task_id, task = main.take_pregenerated_task(run, "PRO-1", "Python", "Декораторы\nGIL")
+    assert task["summary"] == "Генераторы"
+    # Повтор темы удалён, а выбранная задача ждёт создания в Jira
+    assert store.count("PRO-1", "Python") == 1
+    store.delete(task_id)
+    assert store.count("PRO-1", "Python") == 0
+
+
+@patch("core.main.notify")
+@patch("core.main.record_topic_theme")
+@patch("core.main.jira_issue")
+@patch("core.main.transition_issue_to_status")
+@patch("core.main.jira_create_issue")
+@patch("core.main.generate_new_task")
+@patch("core.main.epic_exists", return_value=True)
+@patch("core.main.jira_search_issues", return_value=[])
+def test_process_project_uses_pregenerated_task(
+    mock_search, mock_epic_exists, mock_generate, mock_create, mock_transition,
+    mock_jira_issue, mock_record, mock_notify, store, monkeypatch
+):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    store.put("PRO-1", "Python", {"summary": "GIL", "description": "# GIL"})
+    run = main.RunContext(task_store=store)
+    main.process_project(MagicMock(), MagicMock(), "PRO-1", "Python", "", run=run)
+    mock_generate.assert_not_called()
+    fields = mock_create.call_args.args[1]
+    assert fields["summary"] == "GIL"
+    assert store.count("PRO-1", "Python") == 0
+
+
+@patch("core.main.notify_critical_error")
+@patch("core.main.jira_create_issue", side_effect=Exception("Jira down"))
+@patch("core.main.generate_new_task")
+@patch("core.main.epic_exists", return_value=True)
+@patch("core.main.jira_search_issues", return_value=[])
+def test_process_project_keeps_pregenerated_task_when_create_fails(
+    mock_search, mock_epic_exists, mock_generate, mock_create, mock_critical, store, monkeypatch
+):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    store.put("PRO-1", "Python", {"summary": "GIL", "description": "# GIL"})
+    run = main.RunContext(task_store=store)
+    main.process_project(MagicMock(), MagicMock(), "PRO-1", "Python", "", run=run)
+    mock_critical.assert_called_once()
+    assert store.count("PRO-1", "Python") == 1
+
+
+@patch("core.main.generate_new_task")
+@patch("core.main.HistorySnapshot.load")
+@patch("core.main.prefetch_epic_issues")
+@patch("core.main.init_clients")
+def test_pregenerate_tasks_for_next_day(
+    mock_init, mock_prefetch, mock_load, mock_generate, tmp_path, monkeypatch
+):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    path = str(tmp_path / "tasks.db")
+    monkeypatch.setattr("core.main.PREGENERATED_TASKS_PATH", path)
+    monkeypatch.setattr("core.main.get_today_weekday", lambda: 6)
+    monkeypatch.setattr("core.main.PROJECT_SCHEDULE", {
+        0: [("PRO-1", "Английский"), ("PRO-3", "Алгоритмы")]})
+    mock_init.return_value = (MagicMock(), MagicMock())
+    # В PRO-3 есть задача в бэклоге: утром её просто переведут в работу
+    mock_prefetch.return_value = {
+        "PRO-1": {main.STATUS_IN_PROGRESS: [], main.STATUS_BACKLOG: []},
+        "PRO-3": {main.STATUS_IN_PROGRESS: [], main.STATUS_BACKLOG: [MagicMock()]},
+    }
+    mock_load.return_value.iter_themes.return_value = ["Past Simple"]
+    mock_generate.return_value = {"summary": "Present Perfect", "description": "# Present Perfect"}
+
+    main.pregenerate_tasks()
+
+    mock_generate.assert_called_once_with(mock_init.return_value[1], "Past Simple", "Английский")
+    store = PregeneratedTaskStore(path)
+    assert store.peek("PRO-1", "Английский")[1]["summary"] == "Present Perfect"
+    assert store.count("PRO-3", "Алгоритмы") == 0
+    store.close()
@@ -72,7 +72,7 @@ def test_process_project_backlog_exists(
     mock_transition.assert_called_once_with(
         mock_jira, backlog_issue, main.STATUS_IN_PROGRESS)
     mock_update_history.assert_called_once_with(
-        mock_jira, epic_key, "Backlog summary")
+        mock_jira, epic_key, "Backlog summary", snapshot=None)
     mock_notify.assert_called_once_with(
         backlog_issue.key,
         ANY
@@ -108,7 +108,7 @@ def test_process_project_creates_new_issue(
 
     mock_create.assert_called_once()
     mock_update_history.assert_called_once_with(
-        mock_jira, epic_key, "New summary")
+        mock_jira, epic_key, "New summary", snapshot=None)
     mock_transition.assert_called_once_with(
         mock_jira, new_issue, main.STATUS_IN_PROGRESS)
     mock_notify.assert_called_once_with(new_issue.key, ANY)
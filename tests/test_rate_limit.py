@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock, patch
+
+from core.main import call_groq_generate_content
+from core.rate_limit import GroqRateLimiter, TokenBucket, parse_duration
+
+
+def test_parse_duration_formats():
+    assert parse_duration("7.66s") == 7.66
+    assert abs(parse_duration("2m59.56s") - 179.56) < 1e-9
+    assert parse_duration("120ms") == 0.12
+    assert parse_duration("30") == 30.0
+    assert parse_duration(None) is None
+    assert parse_duration("soon") is None
+
+
+def test_token_bucket_sync_waits_for_reset():
+    with patch("core.rate_limit.time.monotonic", return_value=100.0):
+        bucket = TokenBucket(rate=1, capacity=10)
+        bucket.sync(0, reset_after=5)
+        assert bucket.reserve() == 5
+
+
+def test_groq_limiter_adapts_to_headers():
+    with patch("core.rate_limit.time.monotonic", return_value=100.0):
+        limiter = GroqRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        limiter.update_from_headers({
+            "x-ratelimit-limit-tokens": "6000",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "2s",
+        })
+        assert limiter.tokens.rate == 100
+        # Остаток исчерпан: следующий токен — после сброса окна
+        assert limiter.tokens.reserve(1) == 2
+
+
+def test_groq_limiter_honors_retry_after():
+    with patch("core.rate_limit.time.monotonic", return_value=100.0):
+        limiter = GroqRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        limiter.update_from_headers({"retry-after": "3"})
+        assert limiter.requests.reserve() == 3
+
+
+def test_call_groq_with_limiter_reads_rate_limit_headers(monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.get_llm_cache", lambda: None)
+    groq_client = MagicMock()
+    raw_response = groq_client.chat.completions.with_raw_response.create.return_value
+    raw_response.headers = {"x-ratelimit-remaining-tokens": "500"}
+    raw_response.parse.return_value.choices[0].message.content = "Темы"
+    limiter = MagicMock()
+    assert call_groq_generate_content(groq_client, "prompt", limiter=limiter) == "Темы"
+    limiter.acquire.assert_called_once()
+    limiter.update_from_headers.assert_called_once_with(raw_response.headers)
+    groq_client.chat.completions.create.assert_not_called()
+
+
+def test_groq_limiter_keeps_daily_requests_out_of_minute_bucket():
+    with patch("core.rate_limit.time.monotonic", return_value=100.0):
+        limiter = GroqRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        limiter.update_from_headers({
+            "x-ratelimit-limit-requests": "14400",
+            "x-ratelimit-remaining-requests": "3",
+            "x-ratelimit-reset-requests": "2m59.56s",
+        })
+        # Суточный остаток не урезает минутный bucket
+        assert limiter.requests.reserve() == 0
+        assert limiter.requests.rate == 10
+        assert limiter.daily_blocked_until == 0.0
+
+
+def test_groq_limiter_waits_for_daily_reset_when_exhausted():
+    with patch("core.rate_limit.time.monotonic", return_value=100.0), \
+            patch("core.rate_limit.time.sleep") as sleep:
+        limiter = GroqRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        limiter.update_from_headers({
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "1h",
+        })
+        assert limiter.acquire(1) == 3600
+        sleep.assert_called_once_with(3600)
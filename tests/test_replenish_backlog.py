@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import ANY, MagicMock, patch
+import core.main as main
+
+
+def backlog_issue(summary):
+    issue = MagicMock()
+    issue.fields.summary = summary
+    return issue
+
+
+def bulk_result(key):
+    issue = MagicMock()
+    issue.raw = {"id": key.split("-")[1], "key": key, "self": f"https://jira/rest/api/2/issue/{key}"}
+    return {"status": "Success", "issue": issue, "error": None, "input_fields": {}}
+
+
+@pytest.fixture
+def jira():
+    jira = MagicMock()
+    jira._options = {"server": "https://jira", "rest_path": "api", "rest_api_version": "2"}
+    return jira
+
+
+def test_parse_generated_themes_reads_headings_only():
+    content = "Вот темы:\n# GIL\n\n# Декораторы\nлишний текст\n#"
+    assert main.parse_generated_themes(content) == ["GIL", "Декораторы"]
+
+
+@patch("core.main.call_groq_generate_content")
+def test_generate_new_themes_skips_covered_queued_and_repeated(mock_call):
+    mock_call.return_value = "# GIL\n# Генераторы\n# генераторы\n# Дескрипторы\n# Метаклассы"
+    themes = main.generate_new_themes(MagicMock(), "GIL", "Python", 2, queued=["Дескрипторы"])
+    assert themes == ["Генераторы", "Метаклассы"]
+    prompt = mock_call.call_args.args[1]
+    assert "Дескрипторы" in prompt and "2 разных" in prompt
+
+
+@patch("core.main.jira_create_issues")
+@patch("core.main.generate_new_themes", return_value=["GIL", "Генераторы"])
+def test_replenish_backlog_bulk_creates_issues(mock_themes, mock_create, jira, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.BACKLOG_REPLENISH_SIZE", 2)
+    mock_create.return_value = [bulk_result("PRO-10"), bulk_result("PRO-11")]
+    created = main.replenish_backlog(jira, MagicMock(), "PRO-6", "Python", "", [])
+    mock_create.assert_called_once()
+    field_list = mock_create.call_args.args[1]
+    assert [fields["summary"] for fields in field_list] == ["GIL", "Генераторы"]
+    assert all(fields["parent"] == {"key": "PRO-6"} for fields in field_list)
+    assert [issue.key for issue in created] == ["PRO-10", "PRO-11"]
+    assert created[0].fields.summary == "GIL"
+    assert created[0].fields.status.name == main.STATUS_BACKLOG
+    assert not created[0].fields.description
+    # Без типа задачи кеш переходов не смог бы построить ключ
+    assert main.transition_resolver.key("https://jira", created[0], "In Progress") is not None
+
+
+@patch("core.main.notify")
+@patch("core.main.record_topic_theme")
+@patch("core.main.transition_issue_to_status")
+@patch("core.main.generate_description_for_existing_task")
+@patch("core.main.jira_update_issue")
+@patch("core.main.replenish_backlog")
+@patch("core.main.epic_exists", return_value=True)
+@patch("core.main.jira_search_issues")
+def test_process_project_replenishes_below_low_water(
+    mock_search, mock_epic_exists, mock_replenish, mock_update, mock_describe,
+    mock_transition, mock_record, mock_notify, monkeypatch
+):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.BACKLOG_REPLENISH_SIZE", 3)
+    monkeypatch.setattr("core.main.BACKLOG_LOW_WATER", {"PRO-6": 2})
+    queued = backlog_issue("GIL")
+    mock_search.side_effect = [[], [queued]]
+    mock_replenish.return_value = [backlog_issue("Генераторы")]
+    jira = MagicMock()
+    main.process_project(jira, MagicMock(), "PRO-6", "Python", "history")
+    mock_replenish.assert_called_once_with(
+        jira, ANY, "PRO-6", "Python", "history", [queued])
+    # В работу уходит задача, стоявшая в бэклоге первой
+    mock_transition.assert_called_once_with(jira, queued, main.STATUS_IN_PROGRESS)
+    mock_record.assert_called_once_with(jira, "PRO-6", "GIL", None)
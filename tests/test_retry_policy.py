@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+import requests
+from jira.exceptions import JIRAError
+
+from retry_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    get_breaker,
+    is_retryable,
+    parse_retry_after,
+    retry_after,
+    service_retry,
+)
+
+
+def http_error(status, headers=None):
+    response = SimpleNamespace(status_code=status, headers=headers or {})
+    return JIRAError(status_code=status, text="error", response=response)
+
+
+def test_is_retryable_classifies_errors():
+    assert is_retryable(http_error(404)) is False
+    assert is_retryable(http_error(403)) is False
+    assert is_retryable(http_error(429)) is True
+    assert is_retryable(http_error(503)) is True
+    assert is_retryable(ConnectionError("reset")) is True
+    assert is_retryable(requests.Timeout("read timed out")) is True
+    assert is_retryable(httpx.ReadTimeout("read timed out")) is True
+    assert is_retryable(CircuitOpenError("open")) is False
+    # Ошибки в коде — не сбой сервиса
+    assert is_retryable(KeyError("summary")) is False
+    assert is_retryable(TypeError("'NoneType' object is not subscriptable")) is False
+
+
+def test_code_errors_are_not_retried_and_do_not_open_circuit():
+    fn = MagicMock(side_effect=AttributeError("'NoneType' object has no attribute 'key'"))
+    call = service_retry("test", attempts=5)(fn)
+    for _ in range(get_breaker("test").threshold + 1):
+        with pytest.raises(AttributeError):
+            call()
+    assert fn.call_count == get_breaker("test").threshold + 1
+    assert get_breaker("test").failures == 0
+    assert not get_breaker("test").is_open
+
+
+def test_retry_after_reads_headers():
+    assert retry_after(http_error(429, {"Retry-After": "7"})) == 7
+    assert retry_after(http_error(429, {"x-ratelimit-reset-requests": "2m0.5s"})) == 120.5
+    assert retry_after(http_error(503)) is None
+    # Время восстановления квоты у 5xx — не просьба подождать
+    assert retry_after(http_error(503, {"x-ratelimit-reset-tokens": "30s"})) is None
+    # У 429 важен исчерпанный лимит, а не ближайшее восстановление
+    assert retry_after(http_error(429, {
+        "x-ratelimit-remaining-requests": "14", "x-ratelimit-reset-requests": "1s",
+        "x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "7.5s",
+    })) == 7.5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_service_retry_does_not_retry_client_errors():
+    fn = MagicMock(side_effect=http_error(404))
+    with pytest.raises(JIRAError):
+        service_retry("test")(fn)()
+    assert fn.call_count == 1
+    assert get_breaker("test").failures == 0
+
+
+def test_service_retry_honors_retry_after():
+    fn = MagicMock(side_effect=[http_error(429, {"Retry-After": "0"}), "ok"])
+    with patch("tenacity.nap.time.sleep") as mock_sleep:
+        assert service_retry("test")(fn)() == "ok"
+    assert fn.call_count == 2
+    mock_sleep.assert_called_once_with(0)
+
+
+def test_circuit_opens_and_fails_fast():
+    fn = MagicMock(side_effect=http_error(503, {"Retry-After": "0"}))
+    call = service_retry("test", attempts=5)(fn)
+    with patch("tenacity.nap.time.sleep"):
+        for _ in range(get_breaker("test").threshold):
+            with pytest.raises(JIRAError):
+                call()
+    assert fn.call_count == 5 * get_breaker("test").threshold
+    with pytest.raises(CircuitOpenError):
+        call()
+    assert fn.call_count == 5 * get_breaker("test").threshold
+
+
+def test_circuit_counts_calls_not_attempts():
+    fn = MagicMock(side_effect=[http_error(503, {"Retry-After": "0"})] * 4 + ["ok"])
+    with patch("tenacity.nap.time.sleep"):
+        assert service_retry("test", attempts=5)(fn)() == "ok"
+    assert get_breaker("test").failures == 0
+    assert not get_breaker("test").is_open
+
+
+def test_circuit_breaker_lets_one_trial_through_after_reset_timeout():
+    breaker = CircuitBreaker("test", threshold=1, reset_timeout=10)
+    with patch("retry_policy.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+    with patch("retry_policy.time.monotonic", return_value=111.0):
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        breaker.before_call()
+    assert not breaker.is_open
@@ -1,5 +1,6 @@
+import threading
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 import core.main as main
 
 
@@ -30,8 +31,11 @@ def test_run_daily_calls_process_project(mock_init, mock_process, mock_get_histo
     monkeypatch.setattr(main, "datetime", FakeDate)
     main.run_daily()
     assert mock_process.call_count == 2
-    mock_process.assert_any_call(jira, groq, "EPIC-1", "Тема 1", "history")
-    mock_process.assert_any_call(jira, groq, "EPIC-2", "Тема 2", "history")
+    mock_process.assert_any_call(
+        jira, groq, "EPIC-1", "Тема 1", "history", run=ANY)
+    mock_process.assert_any_call(
+        jira, groq, "EPIC-2", "Тема 2", "history", run=ANY)
+    assert isinstance(mock_process.call_args.kwargs["run"], main.RunContext)
 
 
 @patch("core.main.get_topic_history")
@@ -82,3 +86,43 @@ def test_run_daily_process_project_exception(mock_init, mock_process, mock_get_h
             main.run_daily()
         except Exception:
             pytest.fail("run_daily should not propagate exceptions")
+
+
+@patch("core.main.get_topic_history", return_value="history")
+@patch("core.main.process_project")
+@patch("core.main.init_clients")
+def test_run_daily_parallel_workers(mock_init, mock_process, mock_get_history, monkeypatch, fake_schedule):
+    jira = MagicMock()
+    groq = MagicMock()
+    mock_init.return_value = (jira, groq)
+    # Оба эпика должны выполняться одновременно, иначе барьер не пройдёт
+    barrier = threading.Barrier(2, timeout=5)
+    mock_process.side_effect = lambda *a, **k: barrier.wait()
+    monkeypatch.setattr(main, "PROJECT_SCHEDULE", fake_schedule)
+    monkeypatch.setattr(main, "get_today_weekday", lambda: 0)
+    main.run_daily(workers=2)
+    assert mock_process.call_count == 2
+    mock_process.assert_any_call(
+        jira, groq, "EPIC-1", "Тема 1", "history", run=ANY)
+    mock_process.assert_any_call(
+        jira, groq, "EPIC-2", "Тема 2", "history", run=ANY)
+
+
+@patch("core.main.get_topic_history", return_value="history")
+@patch("core.main.process_project")
+@patch("core.main.init_clients")
+def test_run_daily_parallel_isolates_failures(mock_init, mock_process, mock_get_history, monkeypatch, fake_schedule, caplog):
+    mock_init.return_value = (MagicMock(), MagicMock())
+
+    def fail_first(jira, groq, epic, topic, history, run=None):
+        if epic == "EPIC-1":
+            raise Exception("fail")
+
+    mock_process.side_effect = fail_first
+    monkeypatch.setattr(main, "PROJECT_SCHEDULE", fake_schedule)
+    monkeypatch.setattr(main, "get_today_weekday", lambda: 0)
+    with caplog.at_level("INFO"):
+        main.run_daily(workers=2)
+    assert mock_process.call_count == 2
+    assert "epic=EPIC-1" in caplog.text
+    assert "Epic EPIC-2 processed in" in caplog.text
@@ -0,0 +1,118 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from jira.exceptions import JIRAError
+
+import core.main as main
+from deadline import DeadlineExceeded, deadline_scope, remaining
+from retry_policy import service_retry
+
+
+def test_prioritized_schedule_keeps_schedule_order_for_equal_priority(monkeypatch):
+    monkeypatch.setattr("core.main.EPIC_PRIORITY", {"PRO-6": 10})
+    schedule = [("PRO-1", "Английский"), ("PRO-3", "Алгоритмы"), ("PRO-6", "Python")]
+    assert main.prioritized_schedule(schedule) == [
+        ("PRO-6", "Python"), ("PRO-1", "Английский"), ("PRO-3", "Алгоритмы")]
+
+
+def test_deadline_scope_never_extends_outer_deadline():
+    with deadline_scope(10):
+        with deadline_scope(100):
+            assert remaining() <= 10
+        with deadline_scope(until=time.monotonic() + 1):
+            assert remaining() <= 1
+    assert remaining() is None
+
+
+def test_service_retry_refuses_calls_past_deadline():
+    fn = MagicMock()
+    with deadline_scope(until=time.monotonic() - 1):
+        with pytest.raises(DeadlineExceeded):
+            service_retry("test")(fn)()
+    fn.assert_not_called()
+
+
+def test_service_retry_gives_up_when_wait_exceeds_budget():
+    error = JIRAError(status_code=503, response=SimpleNamespace(status_code=503, headers={"Retry-After": "100"}))
+    fn = MagicMock(side_effect=error)
+    with deadline_scope(5):
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            service_retry("test")(fn)()
+    assert exc_info.value.__cause__ is error
+    assert fn.call_count == 1
+
+
+def test_service_retry_defers_timeout_cut_by_deadline():
+    # Таймаут, урезанный до остатка срока, откладывает эпик, а не проваливает его
+    def slow_call():
+        time.sleep(0.05)
+        raise httpx.ReadTimeout("timed out")
+
+    with deadline_scope(0.01):
+        with pytest.raises(DeadlineExceeded):
+            service_retry("test")(slow_call)()
+
+
+@patch("core.main.DRY_RUN", False)
+@patch("core.main.jira_transition_issue", side_effect=main.DeadlineExceeded("budget"))
+def test_transition_issue_to_status_passes_deadline_through(mock_transition):
+    jira = MagicMock()
+    jira.transitions.return_value = [{"id": "31", "name": "Done", "to": {"name": "Done"}}]
+    issue = MagicMock()
+    issue.fields.status.name = "To Do"
+    with pytest.raises(main.DeadlineExceeded):
+        main.transition_issue_to_status(jira, issue, "Done")
+
+
+@patch("core.main.read_topic_history", return_value="history")
+@patch("core.main.process_project")
+def test_process_epic_reports_deadline_as_deferred(mock_process, mock_history):
+    mock_process.side_effect = main.DeadlineExceeded("budget")
+    assert main.process_epic(MagicMock(), MagicMock(), "PRO-1", "Английский", main.RunContext()) is False
+    mock_process.side_effect = Exception("boom")
+    assert main.process_epic(MagicMock(), MagicMock(), "PRO-1", "Английский", main.RunContext()) is True
+
+
+@patch("core.main.notify_critical_error")
+@patch("core.main.read_topic_history", return_value="history")
+@patch("core.main.process_project")
+@patch("core.main.init_clients")
+def test_run_daily_catches_up_deferred_epics(mock_init, mock_process, mock_history, mock_critical, monkeypatch):
+    mock_init.return_value = (MagicMock(), MagicMock())
+    monkeypatch.setattr("core.main.PROJECT_SCHEDULE", {0: [("PRO-1", "Английский"), ("PRO-6", "Python")]})
+    monkeypatch.setattr("core.main.EPIC_PRIORITY", {"PRO-6": 1})
+    monkeypatch.setattr("core.main.get_today_weekday", lambda: 0)
+    monkeypatch.setattr("core.main.RUN_CATCHUP_SECONDS", 60)
+    monkeypatch.setattr("core.main.validate_epics", lambda *a, **k: {"PRO-1", "PRO-6"})
+    monkeypatch.setattr("core.main.prefetch_epic_issues", lambda *a, **k: {})
+    calls = []
+
+    def process(jira, groq, epic, topic, history, run=None):
+        calls.append(epic)
+        if calls.count("PRO-1") == 1 and epic == "PRO-1":
+            raise main.DeadlineExceeded("budget")
+
+    mock_process.side_effect = process
+    main.run_daily()
+    # PRO-6 важнее и идёт первым, PRO-1 доделывается повторным проходом
+    assert calls == ["PRO-6", "PRO-1", "PRO-1"]
+    mock_critical.assert_not_called()
+
+
+@patch("core.main.notify_critical_error")
+@patch("core.main.read_topic_history", return_value="history")
+@patch("core.main.process_project", side_effect=main.DeadlineExceeded("budget"))
+@patch("core.main.init_clients")
+def test_run_daily_reports_unfinished_epics(mock_init, mock_process, mock_history, mock_critical, monkeypatch):
+    mock_init.return_value = (MagicMock(), MagicMock())
+    monkeypatch.setattr("core.main.PROJECT_SCHEDULE", {0: [("PRO-1", "Английский")]})
+    monkeypatch.setattr("core.main.get_today_weekday", lambda: 0)
+    monkeypatch.setattr("core.main.RUN_CATCHUP_SECONDS", 0)
+    monkeypatch.setattr("core.main.validate_epics", lambda *a, **k: {"PRO-1"})
+    monkeypatch.setattr("core.main.prefetch_epic_issues", lambda *a, **k: {})
+    main.run_daily()
+    mock_process.assert_called_once()
+    mock_critical.assert_called_once_with("Epics not finished in time: PRO-1")
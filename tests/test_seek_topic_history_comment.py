@@ -50,3 +50,12 @@ def test_comment_with_key_line_but_no_epic():
     ]
     result = seek_topic_history_comment(comments, "EPIC-2")
     assert result is None
+
+
+def test_epic_key_is_matched_exactly():
+    comments = [
+        make_comment("Топик: ten\nКлюч топика: PRO-10\nИстория топика:"),
+        make_comment("Топик: one\nКлюч топика: PRO-1\nИстория топика:"),
+    ]
+    assert seek_topic_history_comment(comments, "PRO-1") is comments[1]
+    assert seek_topic_history_comment(comments, "PRO-10") is comments[0]
@@ -0,0 +1,40 @@
+from core.themes import (
+    compact_themes,
+    compact_topic_history,
+    estimate_tokens,
+    normalize_theme,
+    ThemeIndex,
+)
+
+
+def test_normalize_theme_ignores_case_heading_and_punctuation():
+    assert normalize_theme("# Present  Perfect!") == "present perfect"
+    assert normalize_theme("Декораторы, в Python") == "декораторы в python"
+
+
+def test_compact_themes_dedups_and_keeps_chronological_order():
+    themes = ["GIL", "Декораторы", "gil", "Генераторы"]
+    assert compact_themes(themes, budget_tokens=1000) == ["Декораторы", "gil", "Генераторы"]
+
+
+def test_compact_themes_drops_near_duplicates():
+    themes = ["Present Perfect tense usage", "Present Perfect tense usage rules"]
+    assert compact_themes(themes, budget_tokens=1000, distinct_threshold=0.8) == [
+        "Present Perfect tense usage rules"]
+
+
+def test_compact_topic_history_fits_budget_with_most_recent_themes():
+    history = "\n".join(f"Тема номер {i}" for i in range(200))
+    budget = 50
+    compacted = compact_topic_history(history, budget)
+    themes = compacted.splitlines()
+    assert themes[-1] == "Тема номер 199"
+    assert len(themes) < 200
+    assert sum(estimate_tokens(theme) + 1 for theme in themes) <= budget
+
+
+def test_theme_index_finds_near_duplicate():
+    index = ThemeIndex(["Present Perfect Continuous", "Декораторы в Python"], threshold=0.6)
+    assert index.find_duplicate("# Present perfect continuous tense") == "Present Perfect Continuous"
+    assert index.find_duplicate("Past Simple") is None
+    assert index.most_similar("Бинарный поиск") == (None, 0.0)
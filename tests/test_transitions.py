@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch, ANY
+
+from jira.exceptions import JIRAError
+
+import core.main as main
+from core.transitions import TransitionResolver, find_transition
+
+
+def make_issue(key="PRO-1", issuetype="Task", status="Backlog"):
+    fields = SimpleNamespace(
+        issuetype=SimpleNamespace(name=issuetype), status=SimpleNamespace(name=status))
+    return SimpleNamespace(key=key, fields=fields)
+
+
+def make_jira():
+    jira = MagicMock()
+    jira.server_url = "https://jira.test"
+    jira.transitions.return_value = [
+        {"id": "11", "name": "Start", "to": {"name": "In Progress"}},
+        {"id": "21", "name": "Done", "to": {"name": "Done"}},
+    ]
+    return jira
+
+
+def test_find_transition_by_name_or_target_status():
+    transitions = [{"id": "11", "name": "Start", "to": {"name": "In Progress"}}]
+    assert find_transition(transitions, "Start")["id"] == "11"
+    assert find_transition(transitions, "In Progress")["id"] == "11"
+    assert find_transition(transitions, "Done") is None
+
+
+def test_transition_resolver_expires_entries():
+    resolver = TransitionResolver(ttl=10)
+    key = resolver.key("server", make_issue(), "In Progress")
+    with patch("core.transitions.time.monotonic", return_value=100.0):
+        resolver.store(key, [{"id": "11", "name": "In Progress"}], "In Progress")
+        assert resolver.get(key)["id"] == "11"
+    with patch("core.transitions.time.monotonic", return_value=111.0):
+        assert resolver.get(key) is None
+    # Без типа задачи ключа нет — такие переходы не кешируются
+    assert resolver.key("server", SimpleNamespace(key="PRO-1", fields=None), "Done") is None
+
+
+@patch("core.main.jira_transition_issue")
+def test_transition_issue_to_status_reuses_cached_transition(mock_transition, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.transition_resolver", TransitionResolver())
+    jira = make_jira()
+    assert main.transition_issue_to_status(jira, make_issue("PRO-1"), "In Progress")
+    assert main.transition_issue_to_status(jira, make_issue("PRO-2"), "In Progress")
+    jira.transitions.assert_called_once()
+    # Переход из кеша тоже идёт через обёртку с повторами и предохранителем
+    assert mock_transition.call_args_list == [((jira, ANY, "11"),), ((jira, ANY, "11"),)]
+    jira.transition_issue.assert_not_called()
+    jira.issue.assert_not_called()
+
+
+@patch("core.main.jira_transition_issue")
+def test_transition_issue_to_status_refreshes_stale_transition(mock_transition, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    resolver = TransitionResolver()
+    monkeypatch.setattr("core.main.transition_resolver", resolver)
+    jira = make_jira()
+    issue = make_issue()
+    key = resolver.key(jira.server_url, issue, "In Progress")
+    resolver.store(key, [{"id": "99", "name": "In Progress"}], "In Progress")
+    mock_transition.side_effect = [JIRAError(status_code=400, text="Transition 99 is not valid"), None]
+    assert main.transition_issue_to_status(jira, issue, "In Progress")
+    jira.transitions.assert_called_once()
+    assert mock_transition.call_args_list == [((jira, issue, "99"),), ((jira, issue, "11"),)]
+    assert resolver.get(key)["id"] == "11"
+
+
+@patch("core.main.jira_transition_issue")
+def test_transition_issue_to_status_keeps_cache_when_jira_is_down(mock_transition, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    resolver = TransitionResolver()
+    monkeypatch.setattr("core.main.transition_resolver", resolver)
+    jira = make_jira()
+    issue = make_issue()
+    key = resolver.key(jira.server_url, issue, "In Progress")
+    resolver.store(key, [{"id": "11", "name": "In Progress"}], "In Progress")
+    mock_transition.side_effect = JIRAError(status_code=503, text="Service Unavailable")
+    assert main.transition_issue_to_status(jira, issue, "In Progress") is False
+    jira.transitions.assert_not_called()
+    assert resolver.get(key)["id"] == "11"
+
+
+@patch("core.main.jira_transition_issue")
+def test_transition_issue_to_status_retries_transitions_lookup(mock_transition, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.transition_resolver", TransitionResolver())
+    jira = make_jira()
+    transitions = jira.transitions.return_value
+    jira.transitions.side_effect = [JIRAError(status_code=503, text="Service Unavailable"), transitions]
+    with patch("tenacity.nap.time.sleep"):
+        assert main.transition_issue_to_status(jira, make_issue(), "In Progress")
+    assert jira.transitions.call_count == 2
+    mock_transition.assert_called_once_with(jira, ANY, "11")
+
+
+@patch("core.main.jira_issue")
+@patch("core.main.jira_transition_issue")
+def test_transition_issue_to_status_verifies_only_on_request(mock_transition, mock_issue, monkeypatch):
+    monkeypatch.setattr("core.main.DRY_RUN", False)
+    monkeypatch.setattr("core.main.transition_resolver", TransitionResolver())
+    mock_issue.return_value = make_issue(status="Backlog")
+    assert main.transition_issue_to_status(make_jira(), make_issue(), "In Progress", verify=True) is False
+    mock_issue.assert_called_once_with(ANY, "PRO-1", fields="status")
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from core.main import update_topic_history
+from core.main import HistorySnapshot, update_topic_history
 
 
 @pytest.fixture
@@ -16,8 +16,7 @@ def mock_comment():
 
 
 def test_update_topic_history_updates_comment(mock_jira, mock_comment):
-    mock_jira.issue.return_value.fields.comment.comments = [mock_comment]
-    with patch("core.main.seek_topic_history_comment", return_value=mock_comment), \
+    with patch.object(HistorySnapshot, "load", return_value=HistorySnapshot([mock_comment])), \
             patch("core.main.DRY_RUN", False):
         update_topic_history(mock_jira, "EPIC-1", "New theme")
         mock_comment.update.assert_called_once()
@@ -25,16 +24,59 @@ def test_update_topic_history_updates_comment(mock_jira, mock_comment):
 
 
 def test_update_topic_history_dry_run(mock_jira, mock_comment):
-    mock_jira.issue.return_value.fields.comment.comments = [mock_comment]
-    with patch("core.main.seek_topic_history_comment", return_value=mock_comment), \
+    with patch.object(HistorySnapshot, "load", return_value=HistorySnapshot([mock_comment])), \
             patch("core.main.DRY_RUN", True):
         update_topic_history(mock_jira, "EPIC-1", "New theme")
         mock_comment.update.assert_not_called()
 
 
 def test_update_topic_history_no_comment_found(mock_jira):
-    mock_jira.issue.return_value.fields.comment.comments = []
-    with patch("core.main.seek_topic_history_comment", return_value=None), \
+    with patch.object(HistorySnapshot, "load", return_value=HistorySnapshot([])), \
             patch("core.main.DRY_RUN", False):
         # Should not raise
         update_topic_history(mock_jira, "EPIC-1", "New theme")
+
+
+def test_update_topic_history_starts_new_segment_when_full(mock_jira):
+    head = MagicMock()
+    head.body = "Топик: test\nКлюч топика: EPIC-1\n\nИстория топика:\n" + "x" * 80
+    created = MagicMock()
+    created.body = "Топик: test\nКлюч топика: EPIC-1\nЧасть: 2\n\nИстория топика:\nNew theme"
+    snapshot = HistorySnapshot([head])
+    with patch("core.main.DRY_RUN", False), \
+            patch("core.main.HISTORY_SEGMENT_MAX_CHARS", 100), \
+            patch("core.main.jira_add_comment", return_value=created) as add_mock:
+        update_topic_history(mock_jira, "EPIC-1", "New theme", snapshot=snapshot)
+    head.update.assert_not_called()
+    add_mock.assert_called_once()
+    assert add_mock.call_args[0][2] == created.body
+    assert snapshot.latest("EPIC-1") is created
+
+
+def test_update_topic_history_appends_only_to_latest_segment(mock_jira):
+    head = MagicMock()
+    head.body = "Топик: test\nКлюч топика: EPIC-1\n\nИстория топика:\nOld"
+    tail = MagicMock()
+    tail.body = "Топик: test\nКлюч топика: EPIC-1\nЧасть: 2\n\nИстория топика:\nNewer"
+    snapshot = HistorySnapshot([tail, head])
+    with patch("core.main.DRY_RUN", False):
+        update_topic_history(mock_jira, "EPIC-1", "Newest", snapshot=snapshot)
+    head.update.assert_not_called()
+    tail.update.assert_called_once()
+    assert list(snapshot.iter_themes("EPIC-1")) == ["Old", "Newer", "Newest"]
+
+
+def test_update_topic_history_reports_each_written_comment(mock_jira):
+    head = MagicMock()
+    head.body = "Топик: test\nКлюч топика: EPIC-1\n\nИстория топика:\n" + "x" * 60
+    created = MagicMock()
+    created.body = "Топик: test\nКлюч топика: EPIC-1\nЧасть: 2\n\nИстория топика:\nB"
+    snapshot = HistorySnapshot([head])
+    written = []
+    with patch("core.main.DRY_RUN", False), \
+            patch("core.main.HISTORY_SEGMENT_MAX_CHARS", 120), \
+            patch("core.main.jira_add_comment", return_value=created):
+        update_topic_history(mock_jira, "EPIC-1", "A\n" + "B" * 50, snapshot=snapshot,
+                             on_written=written.append)
+    head.update.assert_called_once()
+    assert written == [1, 1]